@@ -0,0 +1,69 @@
+# coding: utf-8
+"""
+   Wallabag API - Benchmark
+
+   throughput of bulk_patch() by concurrency, against a local stub server
+   answering in `latency` seconds, with a pool of `max_connections`.
+   It should grow about linearly until the pool is full.
+
+   python benchmarks/bench_bulk.py [number of entries] [max_connections]
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from wallabagapi.core import WallabagAPI
+
+LATENCY = 0.02
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    wbufsize = 65536
+
+    def do_PATCH(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(LATENCY)
+        body = json.dumps({'id': int(self.path.split('/')[3].split('.')[0]), 'is_archived': 1}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+async def bulk(host, number, concurrency, max_connections):
+    async with WallabagAPI(host=host, token='abc', max_connections=max_connections) as w:
+        job = await w.bulk_patch(range(1, number + 1), concurrency=concurrency, archive=1)
+        assert not job.failures, job.failures
+
+
+def main(number=200, max_connections=16):
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    ThreadingHTTPServer.request_queue_size = 128
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = 'http://127.0.0.1:{port}'.format(port=server.server_address[1])
+    print('{number} entries, {latency:.0f}ms per response, pool of {max_connections} connections'.format(
+        number=number, latency=LATENCY * 1000, max_connections=max_connections))
+    try:
+        for concurrency in (1, 2, 4, 8, 16, 32, 64):
+            start = time.perf_counter()
+            asyncio.run(bulk(host, number, concurrency, max_connections))
+            elapsed = time.perf_counter() - start
+            print('concurrency {concurrency:>3}: {rate:>6.0f} entries/s'.format(concurrency=concurrency,
+                                                                              rate=number / elapsed))
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,77 @@
+# coding: utf-8
+"""
+   Wallabag API - Benchmark
+
+   compare one httpx.AsyncClient per request (the old behavior of
+   WallabagAPI.query) with the connection pool owned by WallabagAPI,
+   against a local stub server.
+
+   python benchmarks/bench_connection_pool.py [number of requests]
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+
+BODY = json.dumps({'version': '2.4.2'}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # one write per response, the stub should not be the bottleneck
+    wbufsize = 65536
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+async def per_request_client(host, number):
+    w = WallabagAPI(host=host, token='abc')
+    for _ in range(number):
+        # what query() used to do
+        async with httpx.AsyncClient() as client:
+            resp = await w.call_method(client, 'get', host + '/api/version.json')
+            resp.json()
+
+
+async def pooled_client(host, number):
+    async with WallabagAPI(host=host, token='abc') as w:
+        for _ in range(number):
+            await w.version
+
+
+def main(number=500):
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = 'http://127.0.0.1:{port}'.format(port=server.server_address[1])
+    try:
+        for name, func in (('per request client', per_request_client),
+                           ('pooled client', pooled_client)):
+            start = time.perf_counter()
+            asyncio.run(func(host, number))
+            elapsed = time.perf_counter() - start
+            print('{name:<20} {number} requests in {elapsed:.3f}s '
+                  '({rate:.0f} req/s)'.format(name=name, number=number, elapsed=elapsed,
+                                              rate=number / elapsed))
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,59 @@
+# coding: utf-8
+"""
+   Wallabag API - Benchmark
+
+   cold start: cumulative time of the imports (python -X importtime) of
+   the package, the command line and WallabagAPI, in new interpreters,
+   and what httpx adds once the first client is created. The best of
+   the runs is kept.
+
+   python benchmarks/bench_import.py [runs]
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = [
+    ('import wallabagapi', 'wallabagapi', 'import wallabagapi'),
+    ('import wallabagapi.cli', 'wallabagapi.cli', 'import wallabagapi.cli'),
+    ('import wallabagapi.core', 'wallabagapi.core', 'import wallabagapi.core'),
+    ('import asyncio (reference)', 'asyncio', 'import asyncio'),
+    ('import httpx (reference)', 'httpx', 'import httpx'),
+]
+
+
+def import_time(module, code):
+    """
+    :return int cumulative time in microseconds of the import of `module`
+    """
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                             cwd=ROOT, check=True)
+    total = 0
+    for line in process.stderr.splitlines():
+        _, cumulative, name = line.rsplit('|', 2)
+        if name.strip() == module:
+            total = int(cumulative)
+    return total
+
+
+def first_client(runs):
+    # the import of httpx, paid when the first client is created
+    code = ("import time\nimport wallabagapi.core\nstart = time.perf_counter()\n"
+            "wallabagapi.core.WallabagAPI(host='http://wallabag', token='abc').client\n"
+            "print(int((time.perf_counter() - start) * 1e6))")
+    return min(int(subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=ROOT,
+                                  check=True).stdout) for _ in range(runs))
+
+
+def main(runs=5):
+    for title, module, code in SCENARIOS:
+        best = min(import_time(module, code) for _ in range(runs))
+        print('{0:28} {1:7.1f} ms'.format(title, best / 1000))
+    print('{0:28} {1:7.1f} ms'.format('first client (httpx)', first_client(runs) / 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,49 @@
+# coding: utf-8
+"""
+   Wallabag API - Benchmark
+
+   decoding time and peak memory of big get_entries pages (perPage=500)
+   with each JSON backend of WallabagAPI.
+
+   python benchmarks/bench_json.py [number of pages]
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+
+from wallabagapi import jsonlib
+
+
+def make_page(per_page=500):
+    content = '<p>' + 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 80 + '</p>'
+    items = [{'id': i, 'title': 'entry {}'.format(i), 'url': 'https://example.com/{}'.format(i),
+              'is_archived': 0, 'is_starred': 1, 'content': content, 'language': 'en',
+              'created_at': '2021-03-01T10:20:30+0100', 'updated_at': '2021-03-01T10:20:30+0100',
+              'reading_time': 4, 'domain_name': 'example.com', 'mimetype': 'text/html',
+              'tags': [{'id': 1, 'label': 'foo', 'slug': 'foo'}], 'annotations': []}
+             for i in range(per_page)]
+    return json.dumps({'page': 1, 'limit': per_page, 'pages': 20, 'total': per_page * 20,
+                       '_embedded': {'items': items}}).encode()
+
+
+def main(pages=20):
+    body = make_page()
+    print('page of {0:.1f} MB, {1} pages'.format(len(body) / 1e6, pages))
+    backends = ['json'] + ([] if jsonlib.orjson is None else ['orjson'])
+    for backend in backends:
+        loads = jsonlib.get_loads(backend)
+        start = time.perf_counter()
+        for _ in range(pages):
+            loads(body)
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        loads(body)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print('{0:<8} {1:.1f}ms per page, peak {2:.1f} MB'.format(backend, elapsed * 1000 / pages, peak / 1e6))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,86 @@
+# coding: utf-8
+"""
+   Wallabag API - Benchmark
+
+   cost of an incremental Mirror.sync() depending on the size of the
+   library, for the same number of changes.
+
+   python benchmarks/bench_mirror.py [number of changes]
+"""
+
+import asyncio
+import bisect
+import datetime
+import logging
+import sys
+import time
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.mirror import Mirror
+
+
+class Library(object):
+    """
+        entries of a fake wallabag, sorted by update
+    """
+
+    def __init__(self, size):
+        self.now = 1600000000
+        self.entries = {}
+        self.requests = 0
+        for entry_id in range(1, size + 1):
+            self.touch(entry_id)
+
+    def touch(self, entry_id):
+        self.now += 1
+        date = datetime.datetime.fromtimestamp(self.now, datetime.timezone.utc)
+        self.entries[entry_id] = {'id': entry_id, 'url': 'https://example.com/{}'.format(entry_id),
+                                  'title': 'entry {}'.format(entry_id), 'is_archived': 0, 'is_starred': 0,
+                                  'updated_at': date.strftime('%Y-%m-%dT%H:%M:%S%z'), 'ts': self.now,
+                                  'content': '<p>lorem ipsum</p>' * 20, 'tags': [], 'annotations': []}
+        self.sorted = None
+
+    def handler(self, request):
+        self.requests += 1
+        if self.sorted is None:
+            self.sorted = sorted(self.entries.values(), key=lambda e: e['ts'])
+            self.stamps = [e['ts'] for e in self.sorted]
+        params = request.url.params
+        start = bisect.bisect_right(self.stamps, int(params.get('since', 0)))
+        page, per_page = int(params['page']), int(params['perPage'])
+        total = len(self.sorted) - start
+        first = start + (page - 1) * per_page
+        items = self.sorted[first:min(first + per_page, len(self.sorted))]
+        return httpx.Response(200, json={'page': page, 'limit': per_page, 'total': total,
+                                         'pages': max(1, -(-total // per_page)),
+                                         '_embedded': {'items': items}})
+
+
+async def run(size, changes):
+    library = Library(size)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(library.handler))
+    w = WallabagAPI(host='http://wallabag', token='abc', client=client)
+    mirror = Mirror(w, per_page=100)
+    await mirror.sync()
+    for entry_id in range(1, changes + 1):
+        library.touch(entry_id * (size // changes))
+    library.requests = 0
+    start = time.perf_counter()
+    result = await mirror.sync()
+    elapsed = time.perf_counter() - start
+    print('library {0:>6} entries, {1:>4} changed: {2} requests, {3:.1f}ms'.format(
+        size, result['updated'], library.requests, elapsed * 1000))
+    mirror.close()
+    await client.aclose()
+
+
+def main(changes=50):
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    for size in (1000, 10000, 50000):
+        asyncio.run(run(size, changes))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
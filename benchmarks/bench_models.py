@@ -0,0 +1,71 @@
+# coding: utf-8
+"""
+   Wallabag API - Benchmark
+
+   memory kept by 10k entries (20 pages of 500) as plain dicts and as
+   models, after decoding the responses.
+
+   python benchmarks/bench_models.py
+"""
+
+import gc
+import json
+import time
+import tracemalloc
+
+from wallabagapi.models import EntriesPage
+
+
+def make_page(page, per_page=500):
+    items = [{'id': page * per_page + i, 'title': 'entry {}'.format(i), 'url': 'https://example.com/{}'.format(i),
+              'given_url': 'https://example.com/{}'.format(i), 'origin_url': None,
+              'is_archived': 0, 'is_starred': 1, 'is_public': False, 'language': 'en',
+              'content': '<p>' + 'Lorem ipsum dolor sit amet. ' * 40 + '{}</p>'.format(i),
+              'created_at': '2021-03-01T10:20:30+0100', 'updated_at': '2021-03-01T10:20:30+0100',
+              'published_at': None, 'published_by': ['John Doe'], 'starred_at': None, 'archived_at': None,
+              'reading_time': 4, 'domain_name': 'example.com', 'mimetype': 'text/html',
+              'preview_picture': None, 'http_status': '200', 'uid': None, 'user_id': 1,
+              'user_name': 'wallabag', 'user_email': 'wallabag@example.com', 'hashed_url': 'a' * 40,
+              'hashed_given_url': 'b' * 40, 'headers': {'server': 'nginx', 'content-type': 'text/html'},
+              'tags': [{'id': 1, 'label': 'foo', 'slug': 'foo'}], 'annotations': [],
+              '_links': {'self': {'href': '/api/entries/{}'.format(i)}}}
+             for i in range(per_page)]
+    return json.dumps({'page': page, 'limit': per_page, 'pages': 20, 'total': per_page * 20,
+                       '_embedded': {'items': items}}).encode()
+
+
+def measure(bodies, build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = build(bodies)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return kept, current, peak, elapsed
+
+
+def as_dicts(bodies):
+    return [json.loads(body)['_embedded']['items'] for body in bodies]
+
+
+def as_models(bodies):
+    pages = [EntriesPage.from_dict(json.loads(body)) for body in bodies]
+    for page in pages:
+        for _ in page:
+            pass
+    return pages
+
+
+def main():
+    bodies = [make_page(page) for page in range(20)]
+    for name, build in (('dicts', as_dicts), ('models', as_models)):
+        kept, current, peak, elapsed = measure(bodies, build)
+        print('{0:<7} 10000 entries: kept {1:.1f} MB, peak {2:.1f} MB, {3:.0f}ms'.format(
+            name, current / 1e6, peak / 1e6, elapsed * 1000))
+        del kept
+
+
+if __name__ == '__main__':
+    main()
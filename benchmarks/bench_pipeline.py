@@ -0,0 +1,55 @@
+# coding: utf-8
+"""
+   Wallabag API - Benchmark
+
+   text and reading stats of every entry of a library: inline, in the loop
+   of the queries, compared with iter_entries_processed() and its pool of
+   processes, against the fake Wallabag (with some latency per page).
+
+   python benchmarks/bench_pipeline.py [entries] [content size]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.fakeserver import FakeWallabag
+from wallabagapi.pipeline import text_and_stats
+
+
+async def run(entries, content_size, workers):
+    app = FakeWallabag(latency=0.02)
+    app.populate(entries, content_size=content_size)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    w = WallabagAPI(host='http://wallabag', token=FakeWallabag.TOKEN, client=client)
+    start = time.perf_counter()
+    words = 0
+    if workers:
+        async for result in w.iter_entries_processed(workers=workers, chunk_size=8, perPage=50):
+            words += result['stats']['words']
+    else:
+        async for entry in w.iter_entries(perPage=50):
+            words += text_and_stats(entry)['stats']['words']
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return elapsed
+
+
+def main(entries=2000, content_size=50000):
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    print('{0} entries of {1} bytes, {2} CPUs'.format(entries, content_size, os.cpu_count()))
+    inline = asyncio.run(run(entries, content_size, 0))
+    print('inline        {0:6.2f}s  {1:6.0f} entries/s'.format(inline, entries / inline))
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        elapsed = asyncio.run(run(entries, content_size, workers))
+        print('{0:>2} processes  {1:6.2f}s  {2:6.0f} entries/s  x{3:.2f}'.format(
+            workers, elapsed, entries / elapsed, inline / elapsed))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
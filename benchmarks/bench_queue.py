@@ -0,0 +1,90 @@
+# coding: utf-8
+"""
+   Wallabag API - Benchmark
+
+   the durable queue of changes: jobs queued per second (one transaction
+   per job, or put_many()), jobs sent per second against the fake Wallabag,
+   and a run stopped in the middle then resumed, without duplicates.
+
+   python benchmarks/bench_queue.py [jobs] [concurrency]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.fakeserver import FakeWallabag
+from wallabagapi.jobqueue import WriteQueue
+
+
+def jobs_of(jobs, entries):
+    # a retag job: every entry patched, then tagged, in order
+    for n in range(jobs):
+        entry = n % entries + 1
+        if n // entries % 2:
+            yield 'add_tags', {'entry': entry, 'tags': ['tag{}'.format(n // entries)]}
+        else:
+            yield 'patch', {'entry': entry, 'title': 'title {}'.format(n)}
+
+
+async def send(path, jobs, concurrency, stop_after=None):
+    app = FakeWallabag()
+    app.populate(1000)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    w = WallabagAPI(host='http://wallabag', token=FakeWallabag.TOKEN, client=client)
+    queue = WriteQueue(w, path, concurrency=concurrency)
+    queue.put_many(('create', {'url': 'https://new.example/{}'.format(n)}) for n in range(jobs))
+    if stop_after:
+        task = asyncio.ensure_future(queue.run())
+        await asyncio.sleep(stop_after)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        queue.close()
+        # a new process
+        queue = WriteQueue(w, path, concurrency=concurrency)
+        print('stopped after {0} jobs done, {1} created'.format(queue.counts()['done'], len(app.entries) - 1000))
+    start = time.perf_counter()
+    summary = await queue.run()
+    elapsed = time.perf_counter() - start
+    queue.close()
+    await client.aclose()
+    return elapsed, summary, len(app.entries) - 1000
+
+
+def main(jobs=10000, concurrency=8):
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        queue = WriteQueue(None, os.path.join(directory, 'one.db'))
+        count = min(jobs, 2000)
+        start = time.perf_counter()
+        for kind, params in jobs_of(count, 1000):
+            queue.put(kind, **params)
+        elapsed = time.perf_counter() - start
+        queue.close()
+        print('put()       {0:6d} jobs  {1:6.2f}s  {2:8.0f} jobs/s'.format(count, elapsed, count / elapsed))
+
+        queue = WriteQueue(None, os.path.join(directory, 'many.db'))
+        start = time.perf_counter()
+        queue.put_many(jobs_of(jobs, 1000))
+        elapsed = time.perf_counter() - start
+        queue.close()
+        print('put_many()  {0:6d} jobs  {1:6.2f}s  {2:8.0f} jobs/s'.format(jobs, elapsed, jobs / elapsed))
+
+        elapsed, summary, created = asyncio.run(send(os.path.join(directory, 'send.db'), jobs, concurrency))
+        print('run()       {0:6d} jobs  {1:6.2f}s  {2:8.0f} jobs/s  {3}'.format(
+            jobs, elapsed, jobs / elapsed, summary))
+
+        elapsed, summary, created = asyncio.run(send(os.path.join(directory, 'resume.db'), jobs, concurrency,
+                                                     stop_after=0.5))
+        print('resumed     {0:6d} jobs  {1:6.2f}s  {2}, {3} entries created for {4} jobs'.format(
+            summary['done'], elapsed, summary, created, jobs))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,113 @@
+# coding: utf-8
+"""
+   Wallabag API - Benchmark
+
+   indexing throughput of SearchIndex on a synthetic corpus, and the
+   latency of the searches once it is indexed.
+
+   python benchmarks/bench_search.py [number of entries]
+"""
+
+import datetime
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+from wallabagapi.search import SearchIndex
+
+TAGS = ('news', 'python', 'later', 'science', 'music', 'cooking', 'travel', 'work')
+QUERIES = ('python', 'asyncio loops', 'pyth*', 'music travel', 'lorem', 'zyxwv')
+
+
+class Corpus(object):
+    """
+        entries with html content of about 2KB, made of words drawn from
+        a Zipf-like vocabulary
+    """
+
+    def __init__(self, size, seed=42):
+        self.size = size
+        self.random = random.Random(seed)
+        syllables = ['ka', 'lo', 're', 'mi', 'tu', 'sa', 'ne', 'po', 'vi', 'da', 'ge', 'zu']
+        vocabulary = [''.join(self.random.choice(syllables) for _ in range(self.random.randint(2, 4)))
+                      for _ in range(20000)]
+        # the words searched from the frequent ones to the rare ones
+        for rank, word in ((30, 'travel'), (100, 'python'), (300, 'loops'), (1000, 'asyncio'), (3000, 'music')):
+            vocabulary.insert(rank, word)
+        # the first words are the most frequent ones
+        weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+        self.pool = self.random.choices(vocabulary, cum_weights=weights, k=1000000)
+
+    def words(self, number):
+        start = self.random.randrange(len(self.pool) - number)
+        return ' '.join(self.pool[start:start + number])
+
+    def batches(self, batch_size=500, start=1600000000):
+        for first in range(1, self.size + 1, batch_size):
+            batch = []
+            for entry_id in range(first, min(first + batch_size, self.size + 1)):
+                date = datetime.datetime.fromtimestamp(start + entry_id, datetime.timezone.utc)
+                paragraphs = ''.join('<p>{}</p>'.format(self.words(60)) for _ in range(5))
+                batch.append({'id': entry_id, 'url': 'https://site{}.example/{}'.format(entry_id % 500, entry_id),
+                              'title': self.words(6), 'content': '<div>{}</div>'.format(paragraphs),
+                              'domain_name': 'site{}.example'.format(entry_id % 500),
+                              'published_by': [self.words(2)], 'is_archived': entry_id % 3 == 0,
+                              'is_starred': entry_id % 10 == 0, 'language': 'en',
+                              'updated_at': date.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                              'tags': [{'id': entry_id % 8, 'label': TAGS[entry_id % 8],
+                                        'slug': TAGS[entry_id % 8]}]})
+            yield batch
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main(size=100000):
+    directory = tempfile.TemporaryDirectory()
+    index = SearchIndex(path=os.path.join(directory.name, 'search.db'))
+    corpus = Corpus(size)
+
+    indexed = 0.0
+    # the corpus is made lazily, only the indexing is timed
+    for batch in corpus.batches(start=1600000000):
+        start = time.perf_counter()
+        index.add(batch)
+        indexed += time.perf_counter() - start
+    print('indexed {0} entries in {1:.1f}s: {2:.0f} entries/s'.format(size, indexed, size / indexed))
+
+    start = time.perf_counter()
+    index.optimize()
+    print('optimize: {0:.1f}s, database {1:.0f}MB'.format(
+        time.perf_counter() - start, os.path.getsize(os.path.join(directory.name, 'search.db')) / 2 ** 20))
+
+    for query in QUERIES:
+        for filters in ({}, {'starred': 1, 'tags': ['music']}):
+            timings = []
+            for _ in range(20):
+                start = time.perf_counter()
+                results = index.search(query, **filters)
+                timings.append(time.perf_counter() - start)
+            print('search {0!r:<16} {1:<32} {2:>3} results  p50 {3:6.2f}ms  p95 {4:6.2f}ms'.format(
+                query, str(filters or ''), len(results), percentile(timings, 0.5) * 1000,
+                percentile(timings, 0.95) * 1000))
+
+    # a later sync: 1000 entries changed
+    batches = list(Corpus(1000, seed=7).batches(start=1700000000))
+    for batch in batches:
+        for entry in batch:
+            entry['id'] = entry['id'] * (size // 1000)
+    start = time.perf_counter()
+    for batch in batches:
+        index.add(batch)
+    print('update of 1000 entries: {0:.0f}ms'.format((time.perf_counter() - start) * 1000))
+    index.close()
+    directory.cleanup()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
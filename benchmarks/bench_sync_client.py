@@ -0,0 +1,67 @@
+# coding: utf-8
+"""
+   Wallabag API - Benchmark
+
+   compare asyncio.run() around each call (a new loop and a new client
+   every time) with WallabagClient, from several threads, against a local
+   stub server.
+
+   python benchmarks/bench_sync_client.py [calls per thread] [threads]
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+from bench_connection_pool import StubHandler
+from wallabagapi.client import WallabagClient
+from wallabagapi.core import WallabagAPI
+
+
+def naive(host, number):
+    async def call():
+        async with WallabagAPI(host=host, token='abc') as w:
+            return await w.get_version()
+    for _ in range(number):
+        asyncio.run(call())
+
+
+def facade(wall):
+    def run(host, number):
+        for _ in range(number):
+            wall.get_version()
+    return run
+
+
+def measure(func, host, number, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(lambda _: func(host, number), range(threads)))
+    return time.perf_counter() - start
+
+
+def main(number=100, threads=8):
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = 'http://127.0.0.1:{port}'.format(port=server.server_address[1])
+    try:
+        with WallabagClient(host=host, token='abc') as wall:
+            for count in sorted({1, threads}):
+                for name, func in (('asyncio.run per call', naive),
+                                   ('WallabagClient', facade(wall))):
+                    elapsed = measure(func, host, number, count)
+                    total = number * count
+                    print('{name:<22} {count} threads, {total} calls in {elapsed:.3f}s '
+                          '({rate:.0f} calls/s)'.format(name=name, count=count, total=total,
+                                                        elapsed=elapsed, rate=total / elapsed))
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,159 @@
+# coding: utf-8
+"""
+   Wallabag API - Benchmark suite
+
+   runs the main scenarios against the fake Wallabag server, through
+   httpx.ASGITransport, and writes the results as JSON. Given the JSON of
+   a previous run, the results are compared and the exit status is 1 when
+   a scenario is slower than allowed.
+
+   python benchmarks/suite.py --output results.json
+   python benchmarks/suite.py --compare results.json --max-regression 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.fakeserver import FakeWallabag
+from wallabagapi.retry import RetryPolicy
+
+HOST = 'http://wallabag'
+
+
+def session(app):
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    return WallabagAPI(host=HOST, token=FakeWallabag.TOKEN, client=client, raise_errors=True,
+                       retry=RetryPolicy(backoff=0.01))
+
+
+async def pagination(args):
+    app = FakeWallabag(latency=args.latency)
+    app.populate(args.entries)
+    async with session(app) as w:
+        count = 0
+        async for _ in w.iter_entries(perPage=100, window=4):
+            count += 1
+        await w.client.aclose()
+    return count, 'entries'
+
+
+async def bulk_create(args):
+    app = FakeWallabag(latency=args.latency)
+    # half of the urls are already stored
+    app.populate(args.entries // 2)
+    urls = ['https://example.com/articles/{}'.format(n) for n in range(args.entries)]
+    async with session(app) as w:
+        count = 0
+        async for _ in w.post_entries_bulk(urls, concurrency=8, batch_size=50):
+            count += 1
+        await w.client.aclose()
+    return count, 'urls'
+
+
+async def export_streaming(args):
+    app = FakeWallabag(latency=args.latency, export_size=args.export_size)
+    app.populate(args.exports)
+    async with session(app) as w:
+        with tempfile.TemporaryDirectory() as directory:
+            report = await w.export_entries(range(1, args.exports + 1), directory, format='epub', concurrency=4)
+        await w.client.aclose()
+    return report['bytes'], 'bytes'
+
+
+async def tag_fanout(args):
+    app = FakeWallabag(latency=args.latency)
+    app.populate(args.entries, tags=('news', 'python'))
+    async with session(app) as w:
+        summary = await w.retag(range(1, args.entries + 1), add=['read', 'python'], remove=['news'])
+        await w.client.aclose()
+    return summary['calls'], 'calls'
+
+
+SCENARIOS = {
+    'pagination': pagination,
+    'bulk_create': bulk_create,
+    'export_streaming': export_streaming,
+    'tag_fanout': tag_fanout,
+}
+
+
+def run(args):
+    results = {}
+    for name in args.scenarios:
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            count, unit = asyncio.run(SCENARIOS[name](args))
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = {'seconds': round(best, 4), 'count': count, 'unit': unit,
+                         'per_second': round(count / best, 1)}
+        print('{name:<18} {count:>10} {unit:<8} {seconds:.3f}s  {rate:>12.1f} {unit}/s'.format(
+            name=name, count=count, unit=unit, seconds=best, rate=count / best))
+    return results
+
+
+def compare(results, baseline, max_regression):
+    """
+    :return list of the scenarios slower than the baseline by more than
+        `max_regression` (0.2 for 20%)
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        ratio = result['per_second'] / previous['per_second']
+        print('{name:<18} {ratio:.2f}x the baseline'.format(name=name, ratio=ratio))
+        if ratio < 1 - max_regression:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='benchmarks of wallabagapi against the fake Wallabag server')
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help='one of {}, all by default'.format(', '.join(sorted(SCENARIOS))))
+    parser.add_argument('--entries', type=int, default=2000)
+    parser.add_argument('--exports', type=int, default=50)
+    parser.add_argument('--export-size', type=int, default=1024 * 1024)
+    parser.add_argument('--latency', type=float, default=0.002, help='seconds added by the server to each response')
+    parser.add_argument('--repeat', type=int, default=3, help='runs of each scenario, the best one is kept')
+    parser.add_argument('--output', help='JSON file of the results')
+    parser.add_argument('--compare', help='JSON file of a previous run')
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    args = parser.parse_args(argv)
+    args.scenarios = args.scenarios or sorted(SCENARIOS)
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error('unknown scenario {}'.format(name))
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    results = run(args)
+    report = {'python': platform.python_version(), 'httpx': httpx.__version__, 'time': time.time(),
+              'params': {'entries': args.entries, 'exports': args.exports, 'export_size': args.export_size,
+                         'latency': args.latency},
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            print('regressions: {}'.format(', '.join(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
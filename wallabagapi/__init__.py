@@ -2,4 +2,32 @@
 """
    Wallabag API
 """
-from wallabagapi.core import WallabagAPI
+
+import logging
+
+__all__ = ['WallabagAPI', 'WallabagClient', 'WallabagPool']
+
+# imported on first use, so that the command line starts without httpx
+_LAZY = {
+    'WallabagAPI': 'wallabagapi.core',
+    'WallabagClient': 'wallabagapi.client',
+    'WallabagPool': 'wallabagapi.pool',
+}
+
+# the application configures the logging, not the library: without any
+# handler, the warnings of every module (core, watch...) are not printed on
+# stderr by the last resort handler of logging
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module 'wallabagapi' has no attribute {!r}".format(name))
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY))
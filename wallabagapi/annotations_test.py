@@ -0,0 +1,84 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the annotations of many entries, without Wallabag server
+"""
+
+import json
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.fakeserver import FakeWallabag
+
+RANGE = {'start': '/p[1]', 'startOffset': 0, 'end': '/p[1]', 'endOffset': 5}
+
+
+class TestAnnotations(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    async def asyncSetUp(self):
+        self.app = FakeWallabag()
+        self.app.populate(10)
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app))
+        self.w = WallabagAPI(host=self.host, token=FakeWallabag.TOKEN, client=self.client)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_put_annotations(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={'id': 3, 'text': 'new'})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            w = WallabagAPI(host=self.host, token='abc', client=client)
+            self.assertEqual(await w.put_annotations(3, text='new'), {'id': 3, 'text': 'new'})
+        self.assertEqual(requests[0].method, 'PUT')
+        self.assertEqual(requests[0].headers['content-type'], 'application/json')
+        self.assertEqual(json.loads(requests[0].content), {'text': 'new'})
+
+        annotation = await self.w.post_annotations(1, text='note', quote='lorem', ranges=[RANGE])
+        self.assertEqual(annotation['ranges'], [RANGE])
+        await self.w.put_annotations(annotation['id'], text='changed')
+        self.assertEqual((await self.w.get_annotations(1))['rows'][0]['text'], 'changed')
+
+    async def test_get_annotations_many(self):
+        for entry in (2, 4, 4):
+            await self.w.post_annotations(entry, text='note {}'.format(entry), quote='q')
+        results = dict([result async for result in self.w.get_annotations_many(range(1, 6), concurrency=3)])
+        self.assertEqual(sorted(results), [1, 2, 3, 4, 5])
+        self.assertEqual([len(results[entry]) for entry in range(1, 6)], [0, 1, 0, 2, 0])
+        results = [result async for result in self.w.get_annotations_many([1, 404])]
+        self.assertIn((404, None), results)
+
+    async def test_sync_annotations(self):
+        kept = await self.w.post_annotations(1, text='kept', quote='a', ranges=[RANGE])
+        edited = await self.w.post_annotations(1, text='old', quote='b', ranges=[])
+        removed = await self.w.post_annotations(1, text='gone', quote='c', ranges=[])
+        self.app.requests.clear()
+
+        desired = [{'quote': 'a', 'ranges': [dict(RANGE, startOffset='0')], 'text': 'kept'},
+                   {'id': edited['id'], 'quote': 'b', 'ranges': [], 'text': 'new'},
+                   {'quote': 'd', 'ranges': [], 'text': 'added'}]
+        summary = await self.w.sync_annotations(1, desired)
+        self.assertEqual(summary, {'created': 1, 'updated': 1, 'deleted': 1, 'unchanged': 1, 'calls': 3,
+                                   'failed': []})
+        self.assertEqual(sum(self.app.requests.values()), 4)
+        rows = (await self.w.get_annotations(1))['rows']
+        self.assertEqual(sorted((row['quote'], row['text']) for row in rows),
+                         [('a', 'kept'), ('b', 'new'), ('d', 'added')])
+        self.assertNotIn(removed['id'], [row['id'] for row in rows])
+        self.assertIn(kept['id'], [row['id'] for row in rows])
+
+        summary = await self.w.sync_annotations(1, desired[:2])
+        self.assertEqual((summary['deleted'], summary['calls']), (1, 1))
+        self.assertIsNone(await self.w.sync_annotations(404, desired))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+# coding: utf-8
+"""
+   Wallabag API - on disk cache of the OAuth tokens
+"""
+
+import json
+import os
+import tempfile
+
+__author__ = 'foxmask'
+
+__all__ = ['TokenCache']
+
+
+class TokenCache(object):
+    """
+        Keep the OAuth tokens in a JSON file, so that a short-lived process
+        can reuse the token of the previous one instead of asking a new one.
+        One file can hold the tokens of several accounts.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: string path of the JSON file
+        """
+        self.path = os.path.expanduser(path)
+
+    @staticmethod
+    def key(host, client_id, username):
+        """
+        :return string identifying the account in the file
+        """
+        return '{client_id}:{username}@{host}'.format(host=host, client_id=client_id, username=username)
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, key):
+        """
+        :param key: string returned by TokenCache.key()
+        :return dict access_token, refresh_token, expires_at or None
+        """
+        return self._read().get(key)
+
+    def save(self, key, token):
+        """
+        write the file atomically, readable by its owner only
+        :param key: string returned by TokenCache.key()
+        :param token: dict access_token, refresh_token, expires_at
+        """
+        data = self._read()
+        data[key] = token
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.wallabag-token-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
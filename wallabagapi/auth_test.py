@@ -0,0 +1,97 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the OAuth token renewal, without Wallabag server
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from urllib.parse import parse_qs
+
+import httpx
+
+from wallabagapi.auth import TokenCache
+from wallabagapi.core import WallabagAPI
+
+
+class TestTokenRenewal(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    async def handler(self, request):
+        if request.url.path == '/oauth/v2/token':
+            form = {k: v[0] for k, v in parse_qs(request.content.decode()).items()}
+            self.grants.append(form['grant_type'])
+            if form['grant_type'] == 'refresh_token' and form['refresh_token'] != self.refresh:
+                return httpx.Response(400, json={'error': 'invalid_grant'})
+            await asyncio.sleep(0.01)
+            self.issued += 1
+            self.valid = 'token{}'.format(self.issued)
+            self.refresh = 'refresh{}'.format(self.issued)
+            return httpx.Response(200, json={'access_token': self.valid, 'expires_in': 3600,
+                                             'refresh_token': self.refresh, 'token_type': 'bearer'})
+        if request.url.params.get('access_token') != self.valid:
+            return httpx.Response(401, json={'error': 'invalid_grant'})
+        return httpx.Response(200, json={'version': '2.4.2'})
+
+    async def asyncSetUp(self):
+        self.grants = []
+        self.issued = 0
+        self.valid = 'token0'
+        self.refresh = 'refresh0'
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    def api(self, **kwargs):
+        return WallabagAPI(host=self.host, client=self.client, client_id='id', client_secret='secret',
+                           **kwargs)
+
+    async def test_password_grant_when_no_token(self):
+        w = self.api(username='foo', password='bar')
+        self.assertEqual(await w.version, {'version': '2.4.2'})
+        self.assertEqual(self.grants, ['password'])
+        self.assertEqual(w.refresh_token, 'refresh1')
+        self.assertGreater(w.token_expires_at, time.time() + 3000)
+
+    async def test_single_flight_refresh_before_expiry(self):
+        w = self.api(token='token0', refresh_token='refresh0', token_expires_at=time.time() + 10)
+        results = await asyncio.gather(*[w.get_tags() for _ in range(20)])
+        self.assertTrue(all(results))
+        self.assertEqual(self.grants, ['refresh_token'])
+        self.assertEqual(w.token, 'token1')
+
+    async def test_replay_after_401(self):
+        w = self.api(token='revoked', refresh_token='refresh0')
+        results = await asyncio.gather(*[w.get_tags() for _ in range(10)])
+        self.assertTrue(all(results))
+        self.assertEqual(self.grants, ['refresh_token'])
+
+    async def test_password_grant_when_refresh_refused(self):
+        w = self.api(token='revoked', refresh_token='old', username='foo', password='bar')
+        self.assertTrue(await w.get_tags())
+        self.assertEqual(self.grants, ['refresh_token', 'password'])
+
+    async def test_401_without_credentials(self):
+        w = WallabagAPI(host=self.host, client=self.client, token='revoked')
+        self.assertIsNone(await w.get_tags())
+        self.assertEqual(self.grants, [])
+
+    async def test_token_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tokens.json')
+            w = self.api(username='foo', password='bar', token_cache=path)
+            await w.get_tags()
+            other = self.api(username='foo', password='bar', token_cache=path)
+            self.assertEqual(other.token, 'token1')
+            await other.get_tags()
+            self.assertEqual(self.grants, ['password'])
+            self.assertIsNone(TokenCache(path).load(TokenCache.key(self.host, 'id', 'baz')))
+
+
+if __name__ == '__main__':
+    unittest.main()
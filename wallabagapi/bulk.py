@@ -0,0 +1,183 @@
+# coding: utf-8
+"""
+   Wallabag API - helpers to run many queries concurrently
+"""
+
+import asyncio
+import collections
+
+__author__ = 'foxmask'
+
+__all__ = ['bounded_map', 'achunks', 'BulkJob']
+
+
+async def _aiter(items):
+    """
+    iterate over a sync or an async iterable
+    :param items: iterable or async iterable
+    """
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def achunks(items, size):
+    """
+    group the items of a (async) iterable in lists of `size` items,
+    without reading more than one chunk in advance
+    :param items: iterable or async iterable
+    :param size: int number of items per chunk
+    :return async iterator of lists
+    """
+    chunk = []
+    async for item in _aiter(items):
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def bounded_map(func, items, concurrency=8, ordered=False):
+    """
+    call the coroutine function `func` on each item with at most
+    `concurrency` calls running at once.
+    The items are read lazily, only when a slot is free, so the input
+    can be a huge (async) iterable.
+
+    :param func: coroutine function taking one item
+    :param items: iterable or async iterable
+    :param concurrency: int max number of calls running at once
+    :param ordered: yield the results in the order of the items,
+        instead of as soon as they are ready
+    :return async iterator of the results
+    """
+    if concurrency < 1:
+        raise ValueError('concurrency should be at least 1')
+    iterator = _aiter(items).__aiter__()
+    pending = collections.deque() if ordered else set()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                task = asyncio.ensure_future(func(item))
+                if ordered:
+                    pending.append(task)
+                else:
+                    pending.add(task)
+
+            if not pending:
+                return
+
+            if ordered:
+                yield await pending.popleft()
+            else:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                pending.difference_update(done)
+                for task in done:
+                    yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+class BulkJob(object):
+    """
+        one coroutine function called on many ids, with at most
+        `concurrency` calls at once.
+
+        The calls run while the job is iterated, giving a dict per id:
+        {'id': id, 'ok': bool, 'status': HTTP status or None, 'result' or
+        'error'}. Awaiting the job runs it to the end. Then `failures`
+        lists the failed calls, and retry() gives a job of the retryable
+        ones.
+
+        >>> job = wall.bulk_delete(ids, concurrency=16)
+        >>> async for result in job:
+        ...     print(result['id'], result['ok'])
+        >>> if job.failures:
+        ...     await job.retry()
+    """
+    # network errors (no status) and these statuses can be retried
+    RETRYABLE_STATUSES = (408, 429, 500, 502, 503, 504)
+
+    def __init__(self, func, ids, concurrency=8, ordered=False, progress=None, errors=(Exception,)):
+        """
+        :param func: coroutine function taking one id
+        :param ids: (async) iterable of ids
+        :param concurrency: int max number of calls at once
+        :param ordered: give the results in the order of the ids, instead
+            of as soon as they are ready
+        :param progress: function called with (done, total) after each
+            call, total being None when the ids have no len()
+        :param errors: tuple of the exceptions making a call fail
+        """
+        self.func = func
+        self.ids = ids
+        self.concurrency = concurrency
+        self.ordered = ordered
+        self.progress = progress
+        self.errors = errors
+        self.total = len(ids) if hasattr(ids, '__len__') else None
+        self.done = 0
+        self.succeeded = 0
+        self.failures = []
+        self._started = False
+
+    async def _call(self, item):
+        try:
+            result = await self.func(item)
+        except self.errors as exc:
+            response = getattr(exc, 'response', None)
+            status = getattr(response, 'status_code', None)
+            return {'id': item, 'ok': False, 'status': status, 'error': str(exc),
+                    'retryable': status is None or status in self.RETRYABLE_STATUSES}
+        return {'id': item, 'ok': True, 'status': None, 'result': result}
+
+    async def __aiter__(self):
+        if self._started:
+            raise RuntimeError('a BulkJob runs once, use retry() to run it again')
+        self._started = True
+        async for result in bounded_map(self._call, self.ids, concurrency=self.concurrency, ordered=self.ordered):
+            self.done += 1
+            if result['ok']:
+                self.succeeded += 1
+            else:
+                self.failures.append(result)
+            if self.progress is not None:
+                self.progress(self.done, self.total)
+            yield result
+
+    async def run(self):
+        """
+        run the job to the end
+        :return the job itself
+        """
+        async for _ in self:
+            pass
+        return self
+
+    def __await__(self):
+        return self.run().__await__()
+
+    def retry(self, everything=False):
+        """
+        :param everything: retry every failure, not only the retryable ones
+        :return BulkJob of the failed ids
+        """
+        ids = [failure['id'] for failure in self.failures if everything or failure['retryable']]
+        return BulkJob(self.func, ids, concurrency=self.concurrency, ordered=self.ordered,
+                       progress=self.progress, errors=self.errors)
+
+    def __repr__(self):
+        return '<BulkJob {done}/{total} done, {failed} failed>'.format(
+            done=self.done, total='?' if self.total is None else self.total, failed=len(self.failures))
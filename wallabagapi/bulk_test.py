@@ -0,0 +1,146 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the bulk operations, without Wallabag server
+"""
+
+import asyncio
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from urllib.parse import parse_qs
+
+import httpx
+
+from wallabagapi.bulk import achunks, bounded_map
+from wallabagapi.core import WallabagAPI
+from wallabagapi.fakeserver import FakeWallabag
+from wallabagapi.retry import RetryPolicy
+
+
+class TestBoundedMap(IsolatedAsyncioTestCase):
+
+    async def test_ordered(self):
+        running = []
+
+        async def double(value):
+            running.append(value)
+            self.assertLessEqual(len(running), 3)
+            await asyncio.sleep(0.001 * (10 - value))
+            running.remove(value)
+            return value * 2
+
+        results = [r async for r in bounded_map(double, range(10), concurrency=3, ordered=True)]
+        self.assertEqual(results, [v * 2 for v in range(10)])
+
+    async def test_unordered(self):
+        async def identity(value):
+            await asyncio.sleep(0.01 * (5 - value))
+            return value
+
+        results = [r async for r in bounded_map(identity, range(5), concurrency=5)]
+        self.assertEqual(sorted(results), list(range(5)))
+        self.assertNotEqual(results, list(range(5)))
+
+    async def test_achunks(self):
+        chunks = [chunk async for chunk in achunks(iter(range(7)), 3)]
+        self.assertEqual(chunks, [[0, 1, 2], [3, 4, 5], [6]])
+
+
+class TestPostEntriesBulk(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    def handler(self, request):
+        if request.url.path == '/api/entries/exists.json':
+            self.exists_calls += 1
+            urls = request.url.params.get_list('urls[]')
+            return httpx.Response(200, json={url: self.stored.get(url) for url in urls})
+        if request.method == 'POST':
+            url = parse_qs(request.content.decode())['url'][0]
+            if 'broken' in url:
+                return httpx.Response(500)
+            self.stored[url] = len(self.stored) + 1
+            return httpx.Response(200, json={'id': self.stored[url], 'url': url})
+        return httpx.Response(404)
+
+    async def asyncSetUp(self):
+        self.stored = {'https://a.example/': 1}
+        self.exists_calls = 0
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        self.w = WallabagAPI(host=self.host, token='abc', client=client)
+
+    async def asyncTearDown(self):
+        await self.w.client.aclose()
+
+    async def test_post_entries_bulk(self):
+        items = ['https://a.example/',
+                 'https://b.example/',
+                 'https://b.example/',
+                 {'url': 'https://c.example/', 'title': 'C'},
+                 'https://broken.example/']
+        results = [r async for r in self.w.post_entries_bulk(items, concurrency=2, batch_size=3)]
+        status = sorted((r['url'], r['status']) for r in results)
+        # the url duplicated in a batch is only posted once
+        self.assertEqual(status, [('https://a.example/', 'existed'),
+                                  ('https://b.example/', 'created'),
+                                  ('https://broken.example/', 'failed'),
+                                  ('https://c.example/', 'created')])
+        self.assertEqual(self.exists_calls, 2)
+        self.assertIn('https://c.example/', self.stored)
+
+
+class TestBulkJobs(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    async def asyncSetUp(self):
+        self.app = FakeWallabag(latency=0.01)
+        self.app.populate(20)
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app))
+        self.w = WallabagAPI(host=self.host, token=FakeWallabag.TOKEN, client=self.client,
+                             retry=RetryPolicy(max_retries=0))
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_bulk_patch(self):
+        progress = []
+        job = self.w.bulk_patch(range(1, 11), concurrency=5, ordered=True,
+                                progress=lambda done, total: progress.append((done, total)), archive=1)
+        results = [result async for result in job]
+        self.assertEqual([result['id'] for result in results], list(range(1, 11)))
+        self.assertEqual(progress[-1], (10, 10))
+        self.assertEqual(sum(entry['is_archived'] for entry in self.app.entries.values()), 10)
+        # only the given fields are sent
+        self.assertEqual(self.app.entries[1]['title'], 'Article 0')
+
+    async def test_bulk_delete_failures_and_retry(self):
+        self.app.error_rate = 0.3
+        job = await self.w.bulk_delete([1, 2, 3, 4, 5, 6, 7, 8, 999], concurrency=4)
+        self.assertEqual(job.done, 9)
+        self.assertEqual(job.succeeded + len(job.failures), 9)
+        missing = [failure for failure in job.failures if failure['id'] == 999]
+        self.assertTrue(missing and missing[0]['status'] in (404, 503))
+        self.app.error_rate = 0
+        retried = await job.retry(everything=True)
+        self.assertEqual([failure['id'] for failure in retried.failures], [999])
+        self.assertEqual(retried.failures[0]['status'], 404)
+        self.assertFalse(retried.failures[0]['retryable'])
+        self.assertEqual(sorted(self.app.entries), list(range(9, 21)))
+        with self.assertRaises(RuntimeError):
+            await job
+
+    async def test_concurrency(self):
+        # long enough for the latency to outweigh the cost of the queries
+        self.app.latency = 0.03
+        start = time.perf_counter()
+        await self.w.bulk_patch(range(1, 21), concurrency=1, starred=1)
+        sequential = time.perf_counter() - start
+        start = time.perf_counter()
+        await self.w.bulk_patch(range(1, 21), concurrency=10, starred=0)
+        concurrent = time.perf_counter() - start
+        self.assertLess(concurrent * 4, sequential)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,285 @@
+# coding: utf-8
+"""
+   Wallabag API - cache of the responses of the GET queries
+"""
+
+import collections
+import re
+import sqlite3
+import threading
+import time
+
+__author__ = 'foxmask'
+
+__all__ = ['CachedResponse', 'MemoryCache', 'SQLiteCache', 'cache_scope', 'invalidated_scopes']
+
+ENTRY_PATH = re.compile(r'^/api/entries/(\d+)[./]')
+
+
+def cache_scope(path):
+    """
+    what a path is about, to know which responses a mutation makes stale
+    :param path: path of the query, like /api/entries/1/tags.json
+    :return string 'entry:<id>', 'entries', 'tags', 'annotations' or 'version'
+    """
+    match = ENTRY_PATH.match(path)
+    if match:
+        return 'entry:' + match.group(1)
+    for scope in ('annotations', 'tags', 'tag', 'version'):
+        if path.startswith('/api/' + scope):
+            return 'tags' if scope == 'tag' else scope
+    return 'entries'
+
+
+def invalidated_scopes(path):
+    """
+    scopes to drop from the cache after a post/patch/put/delete on `path`
+    :param path: path of the mutation
+    :return tuple (scopes, prefixes)
+    """
+    scope = cache_scope(path)
+    if scope.startswith('entry:'):
+        # the lists of entries and of tags may change with the entry
+        return (scope, 'entries', 'tags'), ()
+    if scope == 'entries':
+        return ('entries', 'tags'), ()
+    # annotations and tags are embedded in every entry
+    return (scope, 'entries'), ('entry:',)
+
+
+class CachedResponse(object):
+    """
+        body and validators of a cached response
+    """
+    __slots__ = ('body', 'content_type', 'etag', 'last_modified', 'stored_at', 'scope')
+
+    def __init__(self, body, content_type='', etag=None, last_modified=None, stored_at=None, scope=''):
+        self.body = body
+        self.content_type = content_type
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = time.time() if stored_at is None else stored_at
+        self.scope = scope
+
+    @classmethod
+    def from_response(cls, resp, scope):
+        """
+        :param resp: httpx.Response
+        :param scope: string returned by cache_scope()
+        """
+        return cls(resp.content,
+                   content_type=resp.headers.get('Content-Type', ''),
+                   etag=resp.headers.get('ETag'),
+                   last_modified=resp.headers.get('Last-Modified'),
+                   scope=scope)
+
+    @property
+    def size(self):
+        return len(self.body)
+
+    def validators(self):
+        """
+        :return dict headers of a conditional request
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class MemoryCache(object):
+    """
+        LRU cache of the responses in memory, limited in bytes.
+
+        A response older than `ttl` seconds is revalidated when the server
+        gave an ETag or a Last-Modified, or fetched again otherwise.
+    """
+
+    def __init__(self, ttl=60, max_bytes=32 * 1024 * 1024):
+        """
+        :param ttl: seconds a response is used without asking the server
+        :param max_bytes: int max size of the bodies kept
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.stats = collections.Counter()
+        self._responses = collections.OrderedDict()
+
+    def get(self, key):
+        """
+        :param key: string
+        :return CachedResponse, possibly stale, or None
+        """
+        cached = self._responses.get(key)
+        if cached is not None:
+            self._responses.move_to_end(key)
+        return cached
+
+    def set(self, key, cached):
+        """
+        :param key: string
+        :param cached: CachedResponse
+        """
+        self.delete(key)
+        if cached.size > self.max_bytes:
+            return
+        self._responses[key] = cached
+        self.size += cached.size
+        while self.size > self.max_bytes:
+            _, evicted = self._responses.popitem(last=False)
+            self.size -= evicted.size
+            self.stats['evictions'] += 1
+
+    def touch(self, key):
+        """
+        the response has been revalidated by the server
+        :param key: string
+        """
+        cached = self._responses.get(key)
+        if cached is not None:
+            cached.stored_at = time.time()
+
+    def delete(self, key):
+        cached = self._responses.pop(key, None)
+        if cached is not None:
+            self.size -= cached.size
+
+    def invalidate(self, scopes, prefixes=()):
+        """
+        drop the responses of the given scopes
+        :param scopes: iterable of scopes
+        :param prefixes: iterable of prefixes of scopes
+        """
+        scopes = set(scopes)
+        prefixes = tuple(prefixes)
+        for key in [key for key, cached in self._responses.items()
+                    if cached.scope in scopes or (prefixes and cached.scope.startswith(prefixes))]:
+            self.delete(key)
+            self.stats['invalidations'] += 1
+
+    def clear(self):
+        self._responses.clear()
+        self.size = 0
+
+
+class SQLiteCache(object):
+    """
+        Same as MemoryCache, kept in a SQLite database so that it is shared
+        by the processes of a host and survives them.
+
+        A hit writes nothing: the access times are kept in memory and
+        written with the next response stored (or every `access_batch`
+        hits), so the LRU order is the one of this process. `size` is
+        counted in memory from the size of the database at its opening.
+
+        The connection can be used from any thread (WallabagClient calls it
+        from its own), one at a time.
+    """
+
+    # access times kept in memory before writing them
+    access_batch = 1000
+
+    def __init__(self, path, ttl=60, max_bytes=256 * 1024 * 1024):
+        """
+        :param path: path of the SQLite database
+        :param ttl: seconds a response is used without asking the server
+        :param max_bytes: int max size of the bodies kept
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = collections.Counter()
+        self._lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS responses ("
+                        "key TEXT PRIMARY KEY, scope TEXT, body BLOB, content_type TEXT, etag TEXT, "
+                        "last_modified TEXT, stored_at REAL, accessed_at REAL, size INTEGER)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_scope ON responses (scope)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self.db.commit()
+        self.size = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self._accessed = {}
+
+    def _size_of(self, key):
+        row = self.db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else 0
+
+    def _write_accesses(self):
+        """
+        write the access times kept in memory, in the current transaction
+        """
+        if self._accessed:
+            self.db.executemany("UPDATE responses SET accessed_at = ? WHERE key = ?",
+                                [(accessed_at, key) for key, accessed_at in self._accessed.items()])
+            self._accessed.clear()
+
+    def get(self, key):
+        with self._lock:
+            row = self.db.execute("SELECT body, content_type, etag, last_modified, stored_at, scope "
+                                  "FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._accessed[key] = time.time()
+            if len(self._accessed) >= self.access_batch:
+                with self.db:
+                    self._write_accesses()
+        return CachedResponse(row[0], content_type=row[1], etag=row[2], last_modified=row[3],
+                              stored_at=row[4], scope=row[5])
+
+    def set(self, key, cached):
+        if cached.size > self.max_bytes:
+            self.delete(key)
+            return
+        with self._lock, self.db:
+            self._write_accesses()
+            self.size -= self._size_of(key)
+            self.db.execute("INSERT OR REPLACE INTO responses "
+                            "(key, scope, body, content_type, etag, last_modified, stored_at, accessed_at, size) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (key, cached.scope, cached.body, cached.content_type, cached.etag,
+                             cached.last_modified, cached.stored_at, time.time(), cached.size))
+            self.size += cached.size
+            while self.size > self.max_bytes:
+                row = self.db.execute("SELECT key, size FROM responses ORDER BY accessed_at LIMIT 1").fetchone()
+                if row is None:
+                    # emptied by another process
+                    self.size = 0
+                    break
+                self.db.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+                self.size -= row[1]
+                self.stats['evictions'] += 1
+
+    def touch(self, key):
+        with self._lock, self.db:
+            self.db.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key))
+
+    def delete(self, key):
+        with self._lock, self.db:
+            self.size -= self._size_of(key)
+            self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def invalidate(self, scopes, prefixes=()):
+        scopes = list(scopes)
+        where = ' OR '.join(['scope IN ({})'.format(', '.join('?' * len(scopes)))] +
+                            ["scope LIKE ? || '%'"] * len(prefixes))
+        with self._lock, self.db:
+            self.size -= self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses WHERE " + where,
+                                         scopes + list(prefixes)).fetchone()[0]
+            cursor = self.db.execute("DELETE FROM responses WHERE " + where, scopes + list(prefixes))
+        self.stats['invalidations'] += cursor.rowcount
+
+    def clear(self):
+        with self._lock, self.db:
+            self.db.execute("DELETE FROM responses")
+            self.size = 0
+            self._accessed.clear()
+
+    def close(self):
+        with self._lock:
+            if self._accessed:
+                with self.db:
+                    self._write_accesses()
+            self.db.close()
@@ -0,0 +1,155 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the responses cache, without Wallabag server
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.cache import CachedResponse, MemoryCache, SQLiteCache, cache_scope, invalidated_scopes
+from wallabagapi.core import WallabagAPI
+
+
+class TestScopes(unittest.TestCase):
+
+    def test_cache_scope(self):
+        self.assertEqual(cache_scope('/api/entries/12.json'), 'entry:12')
+        self.assertEqual(cache_scope('/api/entries/12/tags.json'), 'entry:12')
+        self.assertEqual(cache_scope('/api/entries.json'), 'entries')
+        self.assertEqual(cache_scope('/api/entries/exists.json'), 'entries')
+        self.assertEqual(cache_scope('/api/tag/label.json'), 'tags')
+        self.assertEqual(cache_scope('/api/annotations/3.json'), 'annotations')
+        self.assertEqual(cache_scope('/api/version.json'), 'version')
+
+    def test_invalidated_scopes(self):
+        self.assertEqual(invalidated_scopes('/api/entries/12/tags/foo.json'), (('entry:12', 'entries', 'tags'), ()))
+        self.assertEqual(invalidated_scopes('/api/tags/foo.json'), (('tags', 'entries'), ('entry:',)))
+
+
+class BackendMixin(object):
+
+    def test_lru_byte_budget(self):
+        cache = self.backend(ttl=60, max_bytes=10)
+        cache.set('a', CachedResponse(b'1234', scope='entries'))
+        cache.set('b', CachedResponse(b'1234', scope='entries'))
+        cache.get('a')
+        cache.set('c', CachedResponse(b'1234', scope='entries'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a').body, b'1234')
+        self.assertEqual(cache.size, 8)
+        self.assertEqual(cache.stats['evictions'], 1)
+        cache.set('d', CachedResponse(b'x' * 11))
+        self.assertIsNone(cache.get('d'))
+
+    def test_invalidate(self):
+        cache = self.backend()
+        cache.set('a', CachedResponse(b'{}', scope='entry:1'))
+        cache.set('b', CachedResponse(b'{}', scope='entry:12'))
+        cache.set('c', CachedResponse(b'{}', scope='tags'))
+        cache.invalidate(['entry:1'])
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('b'))
+        cache.invalidate(['tags'], ['entry:'])
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNone(cache.get('c'))
+        self.assertEqual(cache.stats['invalidations'], 3)
+
+
+class TestMemoryCache(BackendMixin, unittest.TestCase):
+
+    def backend(self, **kwargs):
+        return MemoryCache(**kwargs)
+
+
+class TestSQLiteCache(BackendMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def backend(self, **kwargs):
+        return SQLiteCache(os.path.join(self.directory.name, 'cache.db'), **kwargs)
+
+    def test_writes(self):
+        cache = self.backend(max_bytes=10)
+        cache.set('a', CachedResponse(b'1234', scope='entries'))
+        cache.set('b', CachedResponse(b'1234', scope='entries'))
+        changes = cache.db.total_changes
+        for _ in range(10):
+            cache.get('a')
+        # the hits write nothing, their access times are kept for the close
+        self.assertEqual(cache.db.total_changes, changes)
+        cache.close()
+        cache = self.backend(max_bytes=10)
+        self.assertEqual(cache.size, 8)
+        cache.set('c', CachedResponse(b'12', scope='entries'))
+        cache.set('d', CachedResponse(b'12', scope='entries'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        cache.set('a', CachedResponse(b'123', scope='entries'))
+        self.assertEqual(cache.size, 7)
+        cache.close()
+
+
+class TestCachedQueries(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    def handler(self, request):
+        self.requests.append(request)
+        if request.method != 'GET':
+            self.version += 1
+            return httpx.Response(200, json={'id': 1})
+        etag = '"v{}"'.format(self.version)
+        if request.headers.get('If-None-Match') == etag:
+            return httpx.Response(304, headers={'ETag': etag})
+        return httpx.Response(200, json={'id': 1, 'version': self.version}, headers={'ETag': etag})
+
+    async def asyncSetUp(self):
+        self.requests = []
+        self.version = 1
+        self.cache = MemoryCache(ttl=60)
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        self.w = WallabagAPI(host=self.host, token='abc', client=client, cache=self.cache)
+
+    async def asyncTearDown(self):
+        await self.w.client.aclose()
+
+    async def test_hit(self):
+        self.assertEqual(await self.w.get_entry(1), {'id': 1, 'version': 1})
+        self.assertEqual(await self.w.get_entry(1), {'id': 1, 'version': 1})
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.cache.stats['hits'], 1)
+        self.assertEqual(self.cache.stats['misses'], 1)
+
+    async def test_revalidation(self):
+        self.cache.ttl = 0
+        await self.w.get_entry(1)
+        self.assertEqual(await self.w.get_entry(1), {'id': 1, 'version': 1})
+        self.assertEqual(self.requests[1].headers['If-None-Match'], '"v1"')
+        self.assertEqual(self.cache.stats['revalidations'], 1)
+
+    async def test_mutation_invalidates(self):
+        await self.w.get_entry(1)
+        await self.w.get_entry(2)
+        await self.w.patch_entries(1, title='new')
+        self.assertEqual(await self.w.get_entry(1), {'id': 1, 'version': 2})
+        await self.w.get_entry(2)
+        self.assertEqual(len(self.requests), 4)
+
+    async def test_errors_not_cached(self):
+        w = WallabagAPI(host=self.host, token='abc', cache=self.cache,
+                        client=httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(404))))
+        self.assertIsNone(await w.get_tags())
+        self.assertEqual(self.cache.size, 0)
+        await w.client.aclose()
+
+
+if __name__ == '__main__':
+    unittest.main()
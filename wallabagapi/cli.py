@@ -0,0 +1,303 @@
+# coding: utf-8
+"""
+   Wallabag API - command line
+
+   wallabag import urls.txt --concurrency 32
+   wallabag export --format epub --out exports/ --since 2021-01-01
+   wallabag sync --db wallabag.db
+   wallabag tags retag --add read --remove later --tag later
+   wallabag tags rename old new
+   wallabag bench --requests 200
+
+   Each result is written as one JSON object per line (NDJSON). The
+   connection comes from the options or from the WALLABAG_* environment
+   variables. httpx is only imported once a command runs.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+
+__author__ = 'foxmask'
+
+__all__ = ['main', 'run']
+
+
+def parse_since(value):
+    """
+    :param value: timestamp, or date YYYY-MM-DD[THH:MM:SS] in UTC when
+        there is no timezone
+    :return int timestamp
+    """
+    if value.isdigit():
+        return int(value)
+    try:
+        date = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError('timestamp or date expected, not {!r}'.format(value))
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    return int(date.timestamp())
+
+
+def read_urls(path):
+    """
+    :param path: file of urls, one per line, '-' for stdin
+    :return iterator of urls, without the empty lines and the # comments
+    """
+    f = sys.stdin if path == '-' else open(path)
+    try:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def parser():
+    env = os.environ.get
+    parser = argparse.ArgumentParser(prog='wallabag', description='Wallabag from the command line, NDJSON output')
+    parser.add_argument('--host', default=env('WALLABAG_HOST'), help='url of Wallabag, $WALLABAG_HOST')
+    parser.add_argument('--token', default=env('WALLABAG_TOKEN', ''), help='access token, $WALLABAG_TOKEN')
+    parser.add_argument('--client-id', default=env('WALLABAG_CLIENT_ID', ''), help='$WALLABAG_CLIENT_ID')
+    parser.add_argument('--client-secret', default=env('WALLABAG_CLIENT_SECRET', ''),
+                        help='$WALLABAG_CLIENT_SECRET')
+    parser.add_argument('--username', default=env('WALLABAG_USERNAME', ''), help='$WALLABAG_USERNAME')
+    parser.add_argument('--password', default=env('WALLABAG_PASSWORD', ''), help='$WALLABAG_PASSWORD')
+    parser.add_argument('--token-cache', default=env('WALLABAG_TOKEN_CACHE'),
+                        help='file keeping the token between two commands, $WALLABAG_TOKEN_CACHE')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    command = commands.add_parser('import', help='add the urls of a file, skipping the ones already stored')
+    command.add_argument('file', help="one url per line, '-' for stdin")
+    command.add_argument('--concurrency', type=int, default=8)
+    command.add_argument('--batch-size', type=int, default=50, help='urls per existence check')
+    command.add_argument('--tag', action='append', default=[], help='tag of the new entries, repeatable')
+    command.set_defaults(func=import_urls)
+
+    command = commands.add_parser('export', help='export the entries in files, {id}.{format}')
+    command.add_argument('--format', default='epub', choices=('xml', 'json', 'txt', 'csv', 'pdf', 'epub', 'mobi',
+                                                              'html'))
+    command.add_argument('--out', required=True, help='directory of the files')
+    command.add_argument('--since', type=parse_since, help='only the entries updated since, timestamp or date')
+    command.add_argument('--tag', action='append', default=[], help='only the entries with this tag')
+    command.add_argument('--archive', choices=('0', '1'))
+    command.add_argument('--starred', choices=('0', '1'))
+    command.add_argument('--concurrency', type=int, default=4)
+    command.set_defaults(func=export)
+
+    command = commands.add_parser('sync', help='update the local SQLite mirror of the entries')
+    command.add_argument('--db', default='wallabag.db', help='path of the mirror')
+    command.add_argument('--no-deletions', action='store_true', help='do not look for the deleted entries')
+    command.set_defaults(func=sync)
+
+    command = commands.add_parser('tags', help='change the tags of many entries')
+    tags = command.add_subparsers(dest='tags_command', metavar='action')
+    tags.required = True
+    command = tags.add_parser('retag', help='add and remove tags on many entries')
+    command.add_argument('--add', action='append', default=[], help='tag to add, repeatable')
+    command.add_argument('--remove', action='append', default=[], help='tag to remove, repeatable')
+    command.add_argument('--ids', type=lambda value: [int(i) for i in value.split(',')],
+                         help='comma separated entry IDs')
+    command.add_argument('--tag', help='the entries with this tag, instead of --ids')
+    command.add_argument('--concurrency', type=int, default=8)
+    command.set_defaults(func=retag)
+    command = tags.add_parser('rename', help='rename a tag on every entry')
+    command.add_argument('old')
+    command.add_argument('new')
+    command.add_argument('--concurrency', type=int, default=8)
+    command.set_defaults(func=rename)
+
+    command = commands.add_parser('bench', help='latency of the main queries, per endpoint')
+    command.add_argument('--requests', type=int, default=100, help='queries of each kind')
+    command.add_argument('--concurrency', type=int, default=8)
+    command.add_argument('--fake', type=int, metavar='ENTRIES',
+                         help='against an in-process fake Wallabag of ENTRIES entries instead of --host')
+    command.set_defaults(func=bench)
+    return parser
+
+
+class Output(object):
+    """
+        NDJSON writer, counting the failures
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.failures = 0
+
+    def __call__(self, data, failed=False):
+        self.failures += bool(failed)
+        self.stream.write(json.dumps(data, default=str) + '\n')
+        self.stream.flush()
+
+
+async def import_urls(wallabag, args, out):
+    items = ({'url': url, 'tags': args.tag} if args.tag else url for url in read_urls(args.file))
+    async for result in wallabag.post_entries_bulk(items, concurrency=args.concurrency,
+                                                   batch_size=args.batch_size):
+        out(result, failed=result['status'] == 'failed')
+
+
+async def export(wallabag, args, out):
+    import httpx
+    from wallabagapi.bulk import bounded_map
+
+    os.makedirs(args.out, exist_ok=True)
+    params = {'detail': 'metadata', 'perPage': 100}
+    if args.since is not None:
+        params.update(since=args.since, sort='updated', order='asc')
+    for name in ('archive', 'starred'):
+        if getattr(args, name) is not None:
+            params[name] = getattr(args, name)
+    if args.tag:
+        params['tags'] = args.tag
+
+    async def ids():
+        async for entry in wallabag.iter_entries(**params):
+            yield entry['id']
+
+    async def export_one(entry):
+        path = os.path.join(args.out, '{entry}.{ext}'.format(entry=entry, ext=args.format))
+        try:
+            size = await wallabag.export_entry_to(entry, path, format=args.format)
+        except (httpx.HTTPError, OSError) as exc:
+            return {'id': entry, 'status': 'failed', 'error': str(exc)}
+        return {'id': entry, 'status': 'exported', 'path': path, 'bytes': size}
+
+    async for result in bounded_map(export_one, ids(), concurrency=args.concurrency):
+        out(result, failed=result['status'] == 'failed')
+
+
+async def sync(wallabag, args, out):
+    from wallabagapi.mirror import Mirror
+
+    mirror = Mirror(wallabag, path=args.db)
+    try:
+        result = await mirror.sync(detect_deletions=not args.no_deletions)
+        result['total'] = mirror.count()
+    finally:
+        mirror.close()
+    out(result)
+
+
+async def retag(wallabag, args, out):
+    if args.ids is None and args.tag is None:
+        raise SystemExit('wallabag tags retag: --ids or --tag is required')
+    entries = args.ids
+    if entries is None:
+        entries = [entry['id'] async for entry in wallabag.iter_entries(tags=[args.tag], perPage=500,
+                                                                         detail='metadata')]
+    summary = await wallabag.retag(entries, add=args.add, remove=args.remove, concurrency=args.concurrency)
+    for failed in summary['failed']:
+        out(failed, failed=True)
+    out(summary)
+
+
+async def rename(wallabag, args, out):
+    summary = await wallabag.rename_tag(args.old, args.new, concurrency=args.concurrency)
+    for failed in summary['failed']:
+        out(failed, failed=True)
+    out(summary)
+
+
+async def bench(wallabag, args, out):
+    import time
+    from wallabagapi.bulk import bounded_map
+    from wallabagapi.hooks import LatencyHistogram
+
+    histogram = LatencyHistogram()
+    wallabag.add_hook(histogram)
+    start = time.perf_counter()
+    page = await wallabag.get_entries(format='json', perPage=30, detail='metadata')
+    ids = [entry['id'] for entry in (page or {}).get('_embedded', {}).get('items', [])]
+    pages = max(1, int((page or {}).get('pages') or 1))
+
+    async def call(n):
+        if n % 3 == 0:
+            await wallabag.get_entries(format='json', perPage=30, page=n // 3 % pages + 1)
+        elif n % 3 == 1 and ids:
+            await wallabag.get_entry(ids[n % len(ids)], format='json')
+        else:
+            await wallabag.get_tags(format='json')
+    async for _ in bounded_map(call, range(args.requests * 3), concurrency=args.concurrency):
+        pass
+    elapsed = time.perf_counter() - start
+    wallabag.remove_hook(histogram)
+
+    for endpoint, summary in histogram.summary().items():
+        out(dict(summary, endpoint=endpoint))
+    out({'requests': sum(histogram.counts.values()), 'seconds': round(elapsed, 3),
+         'requests_per_second': round(sum(histogram.counts.values()) / elapsed, 1)})
+
+
+def make_api(args):
+    """
+    :return WallabagAPI of the options of the command line
+    """
+    from wallabagapi.core import WallabagAPI
+
+    params = dict(host=args.host, token=args.token, client_id=args.client_id, client_secret=args.client_secret,
+                  username=args.username, password=args.password, token_cache=args.token_cache)
+    if getattr(args, 'fake', None) is not None:
+        import httpx
+        from wallabagapi.fakeserver import FakeWallabag
+
+        app = FakeWallabag()
+        app.populate(args.fake)
+        params.update(host='http://wallabag', token=FakeWallabag.TOKEN,
+                      client=httpx.AsyncClient(transport=httpx.ASGITransport(app=app)))
+    elif not args.host:
+        raise SystemExit('wallabag: --host or $WALLABAG_HOST is required')
+    return WallabagAPI(**params)
+
+
+async def run(argv, wallabag=None, stream=None):
+    """
+    run a command
+    :param argv: list of the arguments
+    :param wallabag: WallabagAPI to use instead of the one of the options
+    :param stream: file where the results are written, stdout by default
+    :return int exit status, 1 when something failed
+    """
+    import httpx
+
+    args = parser().parse_args(argv)
+    out = Output(stream or sys.stdout)
+    owned = wallabag is None
+    if owned:
+        wallabag = make_api(args)
+    try:
+        await args.func(wallabag, args, out)
+    except httpx.HTTPError as exc:
+        # a read that could not be completed, like a page lost by the server
+        out({'error': str(exc)}, failed=True)
+    finally:
+        if owned:
+            await wallabag.aclose()
+            if getattr(args, 'fake', None) is not None:
+                await wallabag.client.aclose()
+    return 1 if out.failures else 0
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    # parse before starting the loop, so that --help stays fast
+    parser().parse_args(args)
+    import asyncio
+    import logging
+    # the errors of the queries on stderr, the results on stdout
+    logging.basicConfig(format='%(message)s', level=logging.WARNING)
+    try:
+        return asyncio.run(run(args))
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the command line, without Wallabag server
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi import cli
+from wallabagapi.core import WallabagAPI
+from wallabagapi.fakeserver import FakeWallabag
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_help_does_not_import_httpx(self):
+        code = ("import sys\nfrom wallabagapi import cli\n"
+                "try:\n    cli.main(['--help'])\nexcept SystemExit:\n    pass\n"
+                "sys.stderr.write(str('httpx' in sys.modules))")
+        process = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                 cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertIn('import', process.stdout)
+        self.assertEqual(process.stderr, 'False')
+
+    def test_parse_since(self):
+        self.assertEqual(cli.parse_since('1600000000'), 1600000000)
+        self.assertEqual(cli.parse_since('2020-09-13T12:26:40'), 1600000000)
+        self.assertEqual(cli.parse_since('2020-09-13T14:26:40+02:00'), 1600000000)
+
+
+class TestCommands(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = FakeWallabag(export_size=1000)
+        self.app.populate(10, tags=('news', 'later'))
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app))
+        self.w = WallabagAPI(host=self.host, token=FakeWallabag.TOKEN, client=self.client)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        self.directory.cleanup()
+
+    async def run_command(self, *argv):
+        stream = io.StringIO()
+        status = await cli.run(list(argv), self.w, stream)
+        return status, [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    async def test_import(self):
+        path = os.path.join(self.directory.name, 'urls.txt')
+        with open(path, 'w') as f:
+            f.write('# comment\nhttps://example.com/articles/1\nhttps://new.example/\n\nhttps://new.example/\n')
+        status, lines = await self.run_command('import', path, '--concurrency', '4', '--tag', 'imported')
+        self.assertEqual(status, 0)
+        self.assertEqual(sorted(line['status'] for line in lines), ['created', 'existed'])
+        self.assertEqual(len(self.app.entries), 11)
+        self.assertEqual([tag['label'] for tag in self.app.entries[11]['tags']], ['imported'])
+
+    async def test_export(self):
+        out = os.path.join(self.directory.name, 'out')
+        since = self.app.entries[7]['updated_at']
+        status, lines = await self.run_command('export', '--format', 'pdf', '--out', out, '--since', str(since))
+        self.assertEqual(status, 0)
+        self.assertEqual(sorted(line['id'] for line in lines), [8, 9, 10])
+        self.assertEqual(sorted(os.listdir(out)), ['10.pdf', '8.pdf', '9.pdf'])
+        self.assertEqual(lines[0]['bytes'], 1000)
+
+    async def test_sync(self):
+        db = os.path.join(self.directory.name, 'mirror.db')
+        self.assertEqual(await self.run_command('sync', '--db', db), (0, [{'updated': 10, 'deleted': 0, 'total': 10}]))
+        self.assertEqual((await self.run_command('sync', '--db', db))[1][0]['updated'], 0)
+        self.app.fail('GET', '/api/entries.json')
+        status, lines = await self.run_command('sync', '--db', db)
+        self.assertEqual(status, 1)
+        self.assertIn('500', lines[0]['error'])
+
+    async def test_tags(self):
+        status, lines = await self.run_command('tags', 'retag', '--tag', 'later', '--add', 'read', '--remove', 'later')
+        self.assertEqual(status, 0)
+        self.assertEqual(lines[-1]['failed'], [])
+        labels = [sorted(tag['label'] for tag in entry['tags']) for entry in self.app.entries.values()]
+        self.assertEqual(labels.count(['read']), 5)
+        status, lines = await self.run_command('tags', 'rename', 'news', 'headlines')
+        self.assertEqual(labels.count(['news']), 5)
+        self.assertEqual(sorted(self.app.tags), ['headlines', 'read'])
+
+    async def test_bench(self):
+        stream = io.StringIO()
+        self.assertEqual(await cli.run(['bench', '--fake', '30', '--requests', '5'], stream=stream), 0)
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([line['endpoint'] for line in lines[:-1]],
+                         ['GET /api/entries', 'GET /api/entries/{entry}', 'GET /api/tags'])
+        self.assertEqual(lines[-1]['requests'], 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
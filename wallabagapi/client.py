@@ -0,0 +1,164 @@
+# coding: utf-8
+"""
+   Wallabag API - synchronous facade
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+
+from wallabagapi.core import WallabagAPI
+
+__author__ = 'foxmask'
+
+__all__ = ['WallabagClient']
+
+
+class WallabagClient(object):
+    """
+        Synchronous WallabagAPI, for the code without event loop (WSGI,
+        Celery...).
+
+        Every method of WallabagAPI is available and blocks until its
+        result is there. The queries all run on one event loop, in a
+        background thread, so the connections are kept from one call to
+        another. Any number of threads can share the same instance.
+
+        >>> with WallabagClient(host=my_host, token=token) as wall:
+        ...     wall.get_entries(perPage=10)
+        ...     for entry in wall.iter_entries():
+        ...         print(entry['title'])
+    """
+
+    def __init__(self, **kwargs):
+        """
+        :param kwargs: the parameters of WallabagAPI
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='wallabag-client', daemon=True)
+        self._thread.start()
+        try:
+            self.api = WallabagAPI(**kwargs)
+        except BaseException:
+            self._stop()
+            raise
+
+    def _run(self, coro):
+        """
+        run a coroutine on the loop of this client and wait for its result
+        :param coro: coroutine
+        :return its result
+        """
+        if self._loop.is_closed():
+            coro.close()
+            raise RuntimeError("the WallabagClient is closed")
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("WallabagClient can not be used from a coroutine of its own loop, "
+                               "use WallabagClient.api instead")
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result()
+        except BaseException:
+            # KeyboardInterrupt of the caller for example
+            future.cancel()
+            raise
+
+    def _iterate(self, agen):
+        """
+        iterate over an async generator from the loop of this client
+        :param agen: async generator
+        :return generator
+        """
+        async def anext():
+            return await agen.__anext__()
+
+        try:
+            while True:
+                try:
+                    yield self._run(anext())
+                except StopAsyncIteration:
+                    return
+        finally:
+            if not self._loop.is_closed():
+                self._run(agen.aclose())
+
+    def __getattr__(self, name):
+        # attributes of the WallabagAPI: token, stats, cache...
+        if name in ('_loop', '_thread', 'api'):
+            raise AttributeError(name)
+        return getattr(self.api, name)
+
+    @property
+    def version(self):
+        return self._run(self.api.get_version())
+
+    @classmethod
+    def get_token(cls, host, **params):
+        """
+        POST /oauth/v2/token
+
+        :param host: host of wallabag
+        :param params: see WallabagAPI.get_token
+        :return access token
+        """
+        return asyncio.run(WallabagAPI.get_token(host, **params))
+
+    def close(self):
+        """
+        close the connections and stop the background thread
+        """
+        if self._loop.is_closed():
+            return
+        self._run(self.api.aclose())
+        self._stop()
+
+    def _stop(self):
+        """
+        stop the background thread and close its loop
+        """
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _blocking(func):
+    @functools.wraps(func)
+    def method(self, *args, **kwargs):
+        return self._run(func(self.api, *args, **kwargs))
+    return method
+
+
+def _running(func):
+    @functools.wraps(func)
+    def method(self, *args, **kwargs):
+        # the BulkJob is run to the end, see its `failures`
+        return self._run(func(self.api, *args, **kwargs).run())
+    return method
+
+
+def _iterating(func):
+    @functools.wraps(func)
+    def method(self, *args, **kwargs):
+        return self._iterate(func(self.api, *args, **kwargs))
+    return method
+
+
+# mirror the public methods of WallabagAPI
+for _name, _func in list(vars(WallabagAPI).items()):
+    if _name.startswith('_') or _name in ('aclose', 'call_method') or hasattr(WallabagClient, _name):
+        continue
+    if inspect.iscoroutinefunction(_func):
+        setattr(WallabagClient, _name, _blocking(_func))
+    elif inspect.isasyncgenfunction(_func):
+        setattr(WallabagClient, _name, _iterating(_func))
+    elif _name in ('bulk_patch', 'bulk_delete'):
+        setattr(WallabagClient, _name, _running(_func))
+del _name, _func
@@ -0,0 +1,98 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the synchronous facade, without Wallabag server
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from wallabagapi.cache import SQLiteCache
+from wallabagapi.client import WallabagClient
+from wallabagapi.retry import RetryPolicy
+
+
+class TestWallabagClient(unittest.TestCase):
+
+    host = 'http://wallabag'
+
+    def handler(self, request):
+        self.threads.add(threading.current_thread().name)
+        path = request.url.path
+        if path == '/api/version.json':
+            return httpx.Response(200, json='2.4.2')
+        if path == '/api/entries.json':
+            page = int(request.url.params.get('page', 1))
+            return httpx.Response(200, json={'page': page, 'pages': 3, 'total': 6,
+                                             '_embedded': {'items': [{'id': page * 2 - 1}, {'id': page * 2}]}})
+        entry = int(path.split('/')[3].split('.')[0])
+        if entry == 404:
+            return httpx.Response(404)
+        return httpx.Response(200, json={'id': entry})
+
+    def setUp(self):
+        self.threads = set()
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        self.w = WallabagClient(host=self.host, token='abc', client=client, raise_errors=True,
+                                retry=RetryPolicy(max_retries=0))
+
+    def tearDown(self):
+        self.w.close()
+
+    def test_methods(self):
+        self.assertEqual(self.w.get_entry(3), {'id': 3})
+        self.assertEqual(self.w.version, '2.4.2')
+        self.assertEqual(self.w.token, 'abc')
+        self.assertEqual(self.w.get_entry.__doc__, self.w.api.get_entry.__doc__)
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.w.get_entry(404)
+        self.assertEqual(self.threads, {'wallabag-client'})
+
+    def test_async_generator(self):
+        self.assertEqual([entry['id'] for entry in self.w.iter_entries(perPage=2)], [1, 2, 3, 4, 5, 6])
+        entries = self.w.iter_entries(perPage=2)
+        self.assertEqual(next(entries)['id'], 1)
+        entries.close()
+
+    def test_threads(self):
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(self.w.get_entry, range(200)))
+        self.assertEqual([result['id'] for result in results], list(range(200)))
+        self.assertEqual(self.w.stats['requests'], 200)
+
+    def test_bulk_job(self):
+        job = self.w.bulk_delete([1, 2, 404], concurrency=2)
+        self.assertEqual(job.succeeded, 2)
+        self.assertEqual([failure['id'] for failure in job.failures], [404])
+
+    def test_sqlite_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # opened in this thread, used from the one of the client
+            cache = SQLiteCache(os.path.join(directory, 'cache.db'))
+            client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+            with WallabagClient(host=self.host, token='abc', client=client, cache=cache) as wall:
+                self.assertEqual(wall.get_entry(3), {'id': 3})
+                self.assertEqual(wall.get_entry(3), {'id': 3})
+                self.assertEqual(wall.stats['requests'], 1)
+            self.assertEqual(cache.stats['hits'], 1)
+            cache.close()
+
+    def test_failed_init(self):
+        before = threading.active_count()
+        with self.assertRaises(ValueError):
+            WallabagClient(host=self.host, token='abc', extension='yaml')
+        self.assertEqual(threading.active_count(), before)
+
+    def test_closed(self):
+        self.w.close()
+        with self.assertRaises(RuntimeError):
+            self.w.get_entry(1)
+        self.w.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
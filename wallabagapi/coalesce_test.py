@@ -0,0 +1,97 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the coalescing of the identical queries, without Wallabag server
+"""
+
+import asyncio
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.retry import RetryPolicy
+
+
+class TestCoalescing(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    async def handler(self, request):
+        self.requests.append((request.method, request.url.path))
+        await asyncio.sleep(0.02)
+        if request.url.path == '/api/entries/404.json':
+            return httpx.Response(404)
+        if request.method == 'PATCH':
+            self.title = 'changed'
+        return httpx.Response(200, json={'id': 1, 'title': self.title, 'tags': []})
+
+    async def asyncSetUp(self):
+        self.requests = []
+        self.title = 'first'
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        self.w = WallabagAPI(host=self.host, token='abc', client=self.client, coalesce=True,
+                             retry=RetryPolicy(max_retries=0))
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_identical_gets(self):
+        results = await asyncio.gather(*[self.w.get_entry(1) for _ in range(10)], self.w.get_tags())
+        self.assertEqual(self.requests, [('GET', '/api/entries/1.json'), ('GET', '/api/tags.json')])
+        self.assertEqual(self.w.stats['coalesced'], 9)
+        self.assertEqual(results[0], results[9])
+        # each caller may change its own result
+        results[0]['tags'].append('mine')
+        self.assertEqual(results[1]['tags'], [])
+
+        # one after the other, nothing is shared
+        await self.w.get_entry(1)
+        self.assertEqual(len(self.requests), 3)
+
+    async def test_mutations(self):
+        first = asyncio.ensure_future(self.w.get_entry(1))
+        await asyncio.sleep(0.005)
+        results = await asyncio.gather(self.w.patch_entries(1, title='changed'),
+                                       self.w.patch_entries(1, title='changed'))
+        after = await self.w.get_entry(1)
+        self.assertEqual(len([request for request in self.requests if request[0] == 'PATCH']), 2)
+        self.assertEqual(((await first)['title'], after['title']), ('first', 'changed'))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(self.w.stats['coalesced'], 0)
+
+    async def test_errors(self):
+        strict = asyncio.ensure_future(self.w._request('/api/entries/404.json', 'get', {}, raise_errors=True))
+        results = await asyncio.gather(self.w.get_entry(404), self.w.get_entry(404))
+        self.assertEqual(results, [None, None])
+        with self.assertRaises(httpx.HTTPStatusError):
+            await strict
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_cancelled_caller(self):
+        first = asyncio.ensure_future(self.w.get_entry(1))
+        second = asyncio.ensure_future(self.w.get_entry(1))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        self.assertEqual((await second)['id'], 1)
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_window(self):
+        self.w.coalesce_window = 0.02
+
+        async def later(delay):
+            await asyncio.sleep(delay)
+            return await self.w.get_version()
+
+        await asyncio.gather(*[later(delay) for delay in (0, 0.005, 0.01, 0.015)])
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.w.stats['coalesced'], 3)
+
+    async def test_disabled(self):
+        self.w.coalesce = False
+        await asyncio.gather(*[self.w.get_entry(1) for _ in range(3)])
+        self.assertEqual(len(self.requests), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the connection pool, without Wallabag server
+"""
+
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+
+
+class TestConnectionPool(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    def handler(self, request):
+        self.requests.append(request)
+        if request.url.path == '/oauth/v2/token':
+            return httpx.Response(200, json={'access_token': 'abc'})
+        return httpx.Response(200, json={'items': []})
+
+    async def asyncSetUp(self):
+        self.requests = []
+        self.transport = httpx.MockTransport(self.handler)
+
+    async def test_client_is_reused(self):
+        w = WallabagAPI(host=self.host, token='abc')
+        w._client = httpx.AsyncClient(transport=self.transport)
+        client = w.client
+        await w.get_tags()
+        await w.get_tags()
+        self.assertIs(w.client, client)
+        self.assertEqual(len(self.requests), 2)
+        await w.aclose()
+        self.assertTrue(client.is_closed)
+
+    async def test_context_manager_closes_owned_client(self):
+        async with WallabagAPI(host=self.host, token='abc', http2=False) as w:
+            client = w.client
+            self.assertIsInstance(client, httpx.AsyncClient)
+            self.assertEqual(client.headers['User-Agent'], w.user_agent)
+        self.assertTrue(client.is_closed)
+
+    async def test_injected_client_is_not_closed(self):
+        async with httpx.AsyncClient(transport=self.transport) as client:
+            async with WallabagAPI(host=self.host, token='abc', client=client) as w:
+                data = await w.get_tags()
+                self.assertEqual(data, {'items': []})
+            self.assertFalse(client.is_closed)
+            self.assertEqual(self.requests[0].url.params['access_token'], 'abc')
+
+    async def test_get_token_with_client(self):
+        async with httpx.AsyncClient(transport=self.transport) as client:
+            token = await WallabagAPI.get_token(host=self.host, client=client,
+                                                username='foo', password='bar')
+        self.assertEqual(token, 'abc')
+        self.assertIn(b'grant_type=password', self.requests[0].content)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,12 +3,33 @@
    Wallabag API
 """
 
+import asyncio
+import collections
+import copy
 import logging
-import httpx
+import os
+import time
+import urllib.parse
+
+from wallabagapi.auth import TokenCache
+from wallabagapi.bulk import BulkJob, achunks, bounded_map
+from wallabagapi.cache import CachedResponse, cache_scope, invalidated_scopes
+from wallabagapi.hooks import RequestEvent
+from wallabagapi.jsonlib import get_loads
+from wallabagapi.lazy import lazy_import
+from wallabagapi.models import Annotation, EntriesPage, Entry, Tag
+from wallabagapi.pipeline import process_entries, text_and_stats
+from wallabagapi.retry import RetryPolicy
+from wallabagapi.urlindex import normalize_url
+from wallabagapi.watch import Watcher
 
 __author__ = 'foxmask'
 
-logging.basicConfig(format='%(message)s', level=logging.INFO)
+# imported with the first client, see lazy_import()
+httpx = lazy_import('httpx')
+
+# the application configures the logging, not the library
+logger = logging.getLogger(__name__)
 
 __all__ = ['WallabagAPI']
 
@@ -19,6 +40,7 @@ class WallabagAPI(object):
         This class is able to handle any data from your Wallabag account
     """
     EXTENTIONS = ('xml', 'json', 'txt', 'csv', 'pdf', 'epub', 'mobi', 'html')
+    BINARY_CONTENT_TYPES = ('application/pdf', 'application/epub', 'application/x-mobipocket-ebook')
     host = ''
     token = ''
     client_id = ''
@@ -35,7 +57,27 @@ class WallabagAPI(object):
                  client_secret='',
                  extension='json',
                  user_agent="WallabagPython/1.3.0 "
-                            " +https://gitlab.com/foxmask/wallabagapi"):
+                            " +https://gitlab.com/foxmask/wallabagapi",
+                 client=None,
+                 max_connections=100,
+                 max_keepalive_connections=20,
+                 keepalive_expiry=5.0,
+                 http2=False,
+                 timeout=30.0,
+                 retry=None,
+                 rate_limiter=None,
+                 raise_errors=False,
+                 username='',
+                 password='',
+                 refresh_token='',
+                 token_expires_at=None,
+                 token_cache=None,
+                 token_margin=60,
+                 cache=None,
+                 json_backend='auto',
+                 hooks=(),
+                 coalesce=False,
+                 coalesce_window=0.0):
         """
         init variable
         :param host: string url to the official API Wallabag
@@ -44,6 +86,37 @@ class WallabagAPI(object):
         :param client_secret client secret
         :param extension: xml|json|txt|csv|pdf|epub|mobi|html
         :param user_agent
+        :param client: an existing httpx.AsyncClient to use instead of
+            creating one. The caller stays in charge of closing it.
+        :param max_connections: size of the connection pool
+        :param max_keepalive_connections: idle connections kept open
+        :param keepalive_expiry: seconds before an idle connection is closed
+        :param http2: enable HTTP/2 (requires ``httpx[http2]``)
+        :param timeout: default timeout in seconds of each request
+        :param retry: RetryPolicy of the queries, default to RetryPolicy()
+            use RetryPolicy(max_retries=0) to never retry
+        :param rate_limiter: RateLimiter shared by every query, none by
+            default
+        :param raise_errors: raise the httpx errors after logging them
+            instead of returning None
+        :param username: login, to get a token when it is missing or expired
+        :param password: password of the login
+        :param refresh_token: string OAuth refresh token
+        :param token_expires_at: float timestamp when `token` expires
+        :param token_cache: path of a JSON file (or a TokenCache) keeping
+            the tokens from one process to another
+        :param token_margin: seconds before the expiration of the token
+            when it is renewed
+        :param cache: MemoryCache or SQLiteCache of the responses of the
+            GET queries, none by default
+        :param json_backend: 'auto', 'orjson', 'json' or a function
+            decoding the JSON responses, 'auto' uses orjson when installed
+        :param hooks: functions called with a RequestEvent after each query,
+            see add_hook()
+        :param coalesce: bool identical GET queries running at the same time
+            share one request, see stats['coalesced']
+        :param coalesce_window: seconds a coalesced GET waits before being
+            sent, so that the identical ones coming just after share it too
         """
         self.host = host
         self.client_id = client_id
@@ -54,23 +127,177 @@ class WallabagAPI(object):
         if self.format not in self.EXTENTIONS:
             raise ValueError("format invalid {0} should be one of {1}".format(
                 self.format, self.EXTENTIONS))
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.timeout = timeout
+        self._client = client
+        # only close the client we created ourselves
+        self._owns_client = client is None
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.raise_errors = raise_errors
+        self.stats = collections.Counter()
+        self.cache = cache
+        self.json_loads = get_loads(json_backend)
+        self.hooks = list(hooks)
+        self.coalesce = coalesce
+        self.coalesce_window = coalesce_window
+        # (method, path, params, token) -> [task, number of callers]
+        self._flights = {}
+        self.username = username
+        self.password = password
+        self.refresh_token = refresh_token
+        self.token_expires_at = token_expires_at
+        self.token_margin = token_margin
+        if isinstance(token_cache, str):
+            token_cache = TokenCache(token_cache)
+        self.token_cache = token_cache
+        self._token_task = None
+        if self.token_cache is not None and not self.token:
+            cached = self.token_cache.load(self._token_cache_key)
+            if cached:
+                self.token = cached['access_token']
+                self.refresh_token = cached.get('refresh_token', '')
+                self.token_expires_at = cached.get('expires_at')
 
-    async def call_method(self, client: str, method: str, full_path: str, **data):
+    @property
+    def client(self):
+        """
+        the httpx.AsyncClient shared by every query of this instance.
+        It is created on first use, so its connections are kept alive
+        and reused from one call to another.
+        :return httpx.AsyncClient
+        """
+        if self._client is None or self._client.is_closed:
+            if not self._owns_client:
+                raise RuntimeError("the httpx.AsyncClient given to WallabagAPI is closed")
+            limits = httpx.Limits(max_connections=self.max_connections,
+                                  max_keepalive_connections=self.max_keepalive_connections,
+                                  keepalive_expiry=self.keepalive_expiry)
+            self._client = httpx.AsyncClient(limits=limits,
+                                             http2=self.http2,
+                                             timeout=self.timeout,
+                                             headers={'User-Agent': self.user_agent})
+        return self._client
+
+    async def aclose(self):
+        """
+        close the connection pool, if this instance created it
+        """
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    # OAUTH
+    @property
+    def _token_cache_key(self):
+        return TokenCache.key(self.host, self.client_id, self.username)
+
+    @property
+    def can_renew_token(self):
+        """
+        :return bool True if a new token can be asked without the user
+        """
+        return bool(self.client_id and (self.refresh_token or (self.username and self.password)))
+
+    def token_expired(self):
+        """
+        :return bool True if the token is missing or expires in less than
+        `token_margin` seconds
+        """
+        if not self.token:
+            return True
+        if self.token_expires_at is None:
+            return False
+        return time.time() >= self.token_expires_at - self.token_margin
+
+    async def renew_token(self, stale_token=None):
+        """
+        POST /oauth/v2/token
+
+        Get a new token with the refresh token, or with the password if
+        there is no refresh token or if it is refused.
+        Concurrent callers share the same request.
+
+        :param stale_token: the token refused by the server, nothing is done
+            if it has already been replaced
+        :return access token
+        """
+        if stale_token is not None and stale_token != self.token:
+            return self.token
+        if self._token_task is None:
+            self._token_task = asyncio.ensure_future(self._renew_token())
+
+            def done(task):
+                self._token_task = None
+            self._token_task.add_done_callback(done)
+        # a cancelled caller should not cancel the other ones
+        return await asyncio.shield(self._token_task)
+
+    async def _renew_token(self):
+        params = {'client_id': self.client_id,
+                  'client_secret': self.client_secret}
+        data = None
+        if self.refresh_token:
+            resp = await self.client.post(self.host + '/oauth/v2/token',
+                                          data=dict(params, grant_type='refresh_token',
+                                                    refresh_token=self.refresh_token))
+            if resp.status_code < 400:
+                data = resp.json()
+            elif not (self.username and self.password):
+                resp.raise_for_status()
+        if data is None:
+            resp = await self.client.post(self.host + '/oauth/v2/token',
+                                          data=dict(params, grant_type='password',
+                                                    username=self.username, password=self.password))
+            resp.raise_for_status()
+            data = resp.json()
+        self.stats['token_renewals'] += 1
+
+        self.token = data['access_token']
+        self.refresh_token = data.get('refresh_token', self.refresh_token)
+        expires_in = data.get('expires_in')
+        self.token_expires_at = time.time() + int(expires_in) if expires_in else None
+        if self.token_cache is not None:
+            self.token_cache.save(self._token_cache_key, {'access_token': self.token,
+                                                          'refresh_token': self.refresh_token,
+                                                          'expires_at': self.token_expires_at})
+        return self.token
+
+    async def call_method(self, client, method: str, full_path: str, headers=None, extensions=None,
+                          json_body=False, **data):
         """
         dynamic call of the expected httpx methods
-        :param client: instance of httpx.AsyncClient
+        :param client: instance of httpx.AsyncClient, usually self.client
         :param method: method name
         :param full_path: URL to wallabag
+        :param headers: dict of additional headers
+        :param extensions: dict of httpx request extensions
+        :param json_body: bool send the data of a put/post/patch as JSON
+            instead of a form
         :param data: dict
         """
         if hasattr(client, method) and callable(func := getattr(client, method)):
             if method == 'get':
                 data['access_token'] = self.token
-                resp = await func(full_path, params=data)
+                resp = await func(full_path, params=data, headers=headers, extensions=extensions)
             elif method == 'delete':
-                resp = await func(full_path, params={'access_token': self.token})
+                resp = await func(full_path, params=dict(data, access_token=self.token), headers=headers,
+                                  extensions=extensions)
+            elif json_body:
+                resp = await func(full_path, params={'access_token': self.token}, json=data, headers=headers,
+                                  extensions=extensions)
             else:  # put post patch, all size with same calls
-                resp = await func(full_path, params={'access_token': self.token}, data=data)
+                resp = await func(full_path, params={'access_token': self.token}, data=data, headers=headers,
+                                  extensions=extensions)
 
             return resp
 
@@ -84,30 +311,231 @@ class WallabagAPI(object):
         necessary things to query the API
         :return json data
         """
+        return await self._request(path, method, data)
 
+    async def _request(self, path, method, data, raise_errors=None, json_body=False):
+        """
+        query() with the parameters in a dict
+        :param raise_errors: bool overriding the one of the instance
+        :param json_body: bool send the data as JSON, see call_method()
+        """
         if method not in ('get', 'post', 'patch', 'delete', 'put'):
             raise ValueError('method expected: get, post, patch, delete, put')
 
+        if self.coalesce:
+            if method == 'get':
+                return await self._single_flight(path, data, raise_errors)
+            # the GET sent before a change should not answer the ones after it
+            self._flights.clear()
+        return await self._measured(path, method, data, raise_errors, json_body)
+
+    async def _single_flight(self, path, data, raise_errors=None):
+        """
+        GET query shared by all the identical ones asked while it runs
+        :return json data, a copy of its own to each caller
+        """
+        key = ('get', path, urllib.parse.urlencode(sorted(data.items()), doseq=True), self.token)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = [asyncio.ensure_future(self._fly(key, path, data)), 1]
+        else:
+            flight[1] += 1
+            self.stats['coalesced'] += 1
+        try:
+            # a cancelled caller does not cancel the request of the others
+            result = await asyncio.shield(flight[0])
+        except httpx.HTTPError:
+            if raise_errors if raise_errors is not None else self.raise_errors:
+                raise
+            return None
+        return result if flight[1] == 1 else copy.deepcopy(result)
+
+    async def _fly(self, key, path, data):
+        try:
+            if self.coalesce_window:
+                await asyncio.sleep(self.coalesce_window)
+            return await self._measured(path, 'get', data, raise_errors=True)
+        finally:
+            # nobody joins once the result is known
+            if self._flights.get(key, [None])[0] is asyncio.current_task():
+                del self._flights[key]
+
+    async def _measured(self, path, method, data, raise_errors=None, json_body=False):
+        """
+        _query() reported to the hooks
+        """
+        if not self.hooks:
+            return await self._query(path, method, None, data, raise_errors, json_body)
+
+        event = RequestEvent(method, path)
+        try:
+            return await self._query(path, method, event, data, raise_errors, json_body)
+        except Exception as exc:
+            event.error = exc
+            raise
+        finally:
+            event.total = time.perf_counter() - event.started
+            self._emit(event)
+
+    def add_hook(self, hook):
+        """
+        call `hook` with a RequestEvent after each query, for example a
+        wallabagapi.hooks.LatencyHistogram. Nothing is measured while
+        there is no hook.
+        :param hook: function taking a RequestEvent
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def _emit(self, event):
+        for hook in self.hooks:
+            try:
+                hook(event)
+            except Exception:
+                # a broken hook should not break the queries
+                logger.exception(f"Hook {hook!r} failed.")
+
+    async def _query(self, path, method, event, data, raise_errors=None, json_body=False):
+        """
+        query() itself
+        :param event: RequestEvent filled along the way, or None
+        """
+        if raise_errors is None:
+            raise_errors = self.raise_errors
         full_path = self.host + path
 
+        key = cached = headers = None
+        if self.cache is not None and method == 'get':
+            key = self._cache_key(path, data)
+            cached = self.cache.get(key)
+            if cached is not None:
+                if time.time() - cached.stored_at < self.cache.ttl:
+                    self.cache.stats['hits'] += 1
+                    if event is not None:
+                        event.cache = 'hit'
+                        event.bytes = cached.size
+                    return self.json_loads(cached.body)
+                headers = cached.validators() or None
+
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await self.call_method(client, method, full_path, **data)
+            resp = await self._send(method, full_path, headers=headers, event=event, json_body=json_body, **data)
+            if event is not None:
+                event.status = resp.status_code
+                event.bytes = len(resp.content)
+                if key is not None:
+                    event.cache = 'miss'
+
+            if headers is not None and resp.status_code == 304:
+                if event is not None:
+                    event.cache = 'revalidated'
+                self.cache.stats['revalidations'] += 1
+                self.cache.touch(key)
+                return self.json_loads(cached.body)
 
             # return the content if its a binary one
-            if resp.headers['Content-Type'].startswith('application/pdf') or \
-                    resp.headers['Content-Type'].startswith('application/epub'):
-                return await resp.read()
+            content_type = resp.headers.get('Content-Type', '')
+            if content_type.startswith(self.BINARY_CONTENT_TYPES):
+                return resp.content
 
             resp.raise_for_status()
 
-            return resp.json()
+            if key is not None:
+                self.cache.stats['misses'] += 1
+                if content_type.startswith('application/json'):
+                    self.cache.set(key, CachedResponse.from_response(resp, cache_scope(path)))
+
+            if content_type.startswith(('text/', 'application/xml')):
+                return resp.text
+            return self.json_loads(resp.content)
 
         except httpx.RequestError as exc:
-            logging.error(f"An error occurred while requesting {exc.request.url!r}.")
+            logger.error(f"An error occurred while requesting {exc.request.url!r}.")
+            if event is not None:
+                event.error = exc
+            if raise_errors:
+                raise
 
         except httpx.HTTPStatusError as exc:
-            logging.error(f"Error response {exc.response.status_code} while requesting {exc.request.url!r}.")
+            logger.error(f"Error response {exc.response.status_code} while requesting {exc.request.url!r}.")
+            if raise_errors:
+                raise
+
+        finally:
+            if self.cache is not None and method != 'get':
+                self.cache.invalidate(*invalidated_scopes(path))
+
+    def _cache_key(self, path, data):
+        """
+        key of a GET query in the cache, without the token which changes
+        when it is renewed, but with the account
+        :param path: url to the API
+        :param data: dict of the query string
+        :return string
+        """
+        params = urllib.parse.urlencode(sorted(data.items()), doseq=True)
+        return '{account}@{host}{path}?{params}'.format(account=self.username or self.token,
+                                                        host=self.host, path=path, params=params)
+
+    async def _send(self, method, full_path, headers=None, stream=False, event=None, json_body=False, **data):
+        """
+        send the request through the rate limiter, and send it again
+        as long as the retry policy asks for it
+        :param method: the kind of query to do
+        :param full_path: URL to wallabag
+        :param headers: dict of additional headers
+        :param stream: bool for a GET, return the response before reading
+            its body, the caller has to close it
+        :param event: RequestEvent to fill with the retries and timings
+        :param json_body: bool send the data as JSON
+        :param data: dict
+        :return httpx.Response
+        """
+        attempt = 0
+        replayed = False
+        while True:
+            if self.can_renew_token and self.token_expired():
+                await self.renew_token(stale_token=self.token)
+            token = self.token
+            self.stats['requests'] += 1
+            if self.rate_limiter is not None and await self.rate_limiter.acquire():
+                self.stats['throttled'] += 1
+            extensions = None
+            if event is not None:
+                event.retries = attempt
+                extensions = {'trace': event.trace()}
+            try:
+                if stream:
+                    request = self.client.build_request('GET', full_path, headers=headers, extensions=extensions,
+                                                        params=dict(data, access_token=self.token))
+                    resp = await self.client.send(request, stream=True)
+                else:
+                    resp = await self.call_method(self.client, method, full_path, headers=headers,
+                                                  extensions=extensions, json_body=json_body, **data)
+            except httpx.RequestError as exc:
+                if not self.retry.should_retry(attempt, method, exc=exc):
+                    raise
+                delay = self.retry.delay(attempt)
+            else:
+                if resp.status_code == 401 and not replayed and self.can_renew_token:
+                    # the token expired sooner than expected, replay once
+                    replayed = True
+                    await resp.aclose()
+                    await self.renew_token(stale_token=token)
+                    continue
+                if not self.retry.should_retry(attempt, method, response=resp):
+                    return resp
+                await resp.aclose()
+                delay = self.retry.delay(attempt, resp)
+            finally:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.release()
+
+            self.stats['retries'] += 1
+            attempt += 1
+            logger.debug(f"Retry {attempt} of {method} {full_path} in {delay:.2f}s.")
+            await asyncio.sleep(delay)
 
     @staticmethod
     def __get_value_from_kwars(what, type_attr, value_attr, **kwargs):
@@ -126,8 +554,19 @@ class WallabagAPI(object):
             return value
         return None
 
+    def _ext(self, format=None):
+        """
+        extension of a query
+        :param format: the extension asked for this query, if any
+        :return string
+        """
+        ext = format or self.format
+        if ext not in self.EXTENTIONS:
+            raise ValueError("format invalid {0} should be one of {1}".format(ext, self.EXTENTIONS))
+        return ext
+
     # ENTRIES
-    async def get_entries(self, **kwargs):
+    async def get_entries(self, format=None, models=False, **kwargs):
         """
         GET /api/entries.{_format}
 
@@ -142,9 +581,114 @@ class WallabagAPI(object):
             perPage: int default 30 result per page
             tags: list of tags url encoded.
             since: int default 0 from what timestamp you want
+            detail: 'metadata' or 'full', default 'full', 'metadata' omits
+            the content of the entries
             Will returns entries that matches ALL tags
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
+        :param models: bool return an EntriesPage instead of dicts (JSON only)
         :return data related to the ext
         """
+        params = self._entries_params(**kwargs)
+        path = '/api/entries.{ext}'.format(ext='json' if models else self._ext(format))
+        data = await self.query(path, "get", **params)
+        return EntriesPage.from_dict(data) if models and data is not None else data
+
+    async def iter_entries(self, window=4, **kwargs):
+        """
+        GET /api/entries.{_format}, page after page
+
+        Iterate over every entry matching the filters, without having to
+        loop over `page` by hand. The first page gives the number of
+        pages, then the next `window` pages are fetched concurrently
+        while the entries of the current one are consumed.
+        Only `window` pages are kept in memory at once.
+
+        :param window: int number of pages fetched in advance
+        :param kwargs: the same filters as get_entries, `page` being the
+            page to start from
+        :return async iterator of the entries (dict of `_embedded.items`)
+        :raise httpx.HTTPError when a page could not be read, after the
+            entries of the pages before it: the iteration is either
+            complete or stopped by an error, never silently partial
+        """
+        if window < 1:
+            raise ValueError('window should be at least 1')
+        params = self._entries_params(**kwargs)
+        # the pages have to be parsed whatever the extension of this instance
+        path = '/api/entries.json'
+
+        data = await self._request(path, "get", params, raise_errors=True)
+        pages = int(data.get('pages', 1))
+        next_page = params['page'] + 1
+        pending = collections.deque()
+        try:
+            while True:
+                while len(pending) < window and next_page <= pages:
+                    page_params = dict(params, page=next_page)
+                    pending.append(asyncio.ensure_future(self._request(path, "get", page_params,
+                                                                       raise_errors=True)))
+                    next_page += 1
+
+                for item in data.get('_embedded', {}).get('items', []):
+                    yield item
+
+                if not pending:
+                    break
+                data = await pending.popleft()
+        finally:
+            for task in pending:
+                if task.done() and not task.cancelled():
+                    # the error of a page after the one that stopped does not matter
+                    task.exception()
+                task.cancel()
+
+    async def iter_entries_processed(self, func=text_and_stats, workers=None, chunk_size=16, window=4, **kwargs):
+        """
+        iter_entries(), each entry going through `func` in a pool of
+        processes, so that the CPU work does not block the event loop
+
+        :param func: function taking an entry dict, defined at the top
+            level of a module, default to pipeline.text_and_stats (the text
+            of the content and its reading stats)
+        :param workers: int number of processes, default to the number of CPUs
+        :param chunk_size: int entries sent to a process at once
+        :param window: int number of pages fetched in advance
+        :param kwargs: the same filters as get_entries
+        :return async iterator of the results of `func`, in the order of the
+            entries, see pipeline.process_entries()
+        """
+        async for result in process_entries(self.iter_entries(window=window, **kwargs), func, workers=workers,
+                                            chunk_size=chunk_size):
+            yield result
+
+    async def watch(self, interval=30, min_interval=5, max_interval=300, **filters):
+        """
+        Poll the entries updated since the previous poll, forever
+
+        The first poll only records the current entries. Then each change
+        gives an event {'type': type, 'id': id, 'entry': entry}, type being
+        'created', 'updated', 'archived', 'starred' or 'deleted'.
+        The polls get closer while the entries change, and farther apart
+        while nothing happens, from `min_interval` to `max_interval`.
+
+        :param interval: seconds between the first polls
+        :param min_interval: seconds, the shortest interval
+        :param max_interval: seconds, the longest interval, and so the
+            longest delay before an event
+        :param filters: the filters of get_entries, and the options of
+            Watcher (deletions_every, per_page, detail, emit_existing)
+        :return async iterator of the events
+        """
+        async for event in Watcher(self, interval, min_interval, max_interval, **filters):
+            yield event
+
+    def _entries_params(self, **kwargs):
+        """
+        build the query string of GET /api/entries from the filters
+        :param kwargs: filters of get_entries
+        :return dict
+        """
         # default values
         params = dict({'sort': 'created',
                        'order': 'desc',
@@ -165,6 +709,12 @@ class WallabagAPI(object):
                                                       type_attr=str,
                                                       value_attr=('asc', 'desc'),
                                                       **kwargs)
+        if kwargs.get('sort') in ('created', 'updated'):
+            params['sort'] = kwargs['sort']
+
+        if kwargs.get('detail') in ('metadata', 'full'):
+            params['detail'] = kwargs['detail']
+
         if 'page' in kwargs:
             params['page'] = int(kwargs['page'])
 
@@ -177,10 +727,9 @@ class WallabagAPI(object):
         if 'tags' in kwargs and isinstance(kwargs['tags'], list):
             params['tags'] = ', '.join(kwargs['tags'])
 
-        path = '/api/entries.{ext}'.format(ext=self.format)
-        return await self.query(path, "get", **params)
+        return params
 
-    async def post_entries(self, url, **kwargs):
+    async def post_entries(self, url, format=None, **kwargs):
         """
         POST /api/entries.{_format}
 
@@ -198,8 +747,17 @@ class WallabagAPI(object):
             authors
             public: '0' or '1', default '1' public status.
             original_url
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return result
         """
+        path = '/api/entries.{ext}'.format(ext=self._ext(format))
+        return await self.query(path, "post", **self._post_params(url, **kwargs))
+
+    def _post_params(self, url, **kwargs):
+        """
+        parameters of post_entries
+        """
         params = dict({'url': url})
 
         if 'title' in kwargs and isinstance(kwargs['title'], str):
@@ -235,37 +793,41 @@ class WallabagAPI(object):
 
         if 'tags' in kwargs and isinstance(kwargs['tags'], list):
             params['tags'] = ', '.join(kwargs['tags'])
+        return params
 
-        path = '/api/entries.{ext}'.format(ext=self.format)
-        return await self.query(path, "post", **params)
-
-    async def get_entry(self, entry):
+    async def get_entry(self, entry, format=None, models=False):
         """
         GET /api/entries/{entry}.{_format}
 
         Retrieve a single entry
 
         :param entry \\w+ integer The entry ID
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
+        :param models: bool return an Entry instead of dicts (JSON only)
         :return data related to the ext
         """
-        url = '/api/entries/{entry}.{ext}'.format(entry=entry, ext=self.format)
-        return await self.query(url, "get", **{})
+        url = '/api/entries/{entry}.{ext}'.format(entry=entry, ext='json' if models else self._ext(format))
+        data = await self.query(url, "get", **{})
+        return Entry.from_dict(data) if models and data is not None else data
 
-    async def reaload_entry(self, entry):
+    async def reaload_entry(self, entry, format=None):
         """
         PATCH /api/entries/{entry}/reload.{_format}
 
         Reload a single entry
 
         :param entry \\w+ integer The entry ID
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return data related to the ext
         """
 
         url = '/api/entries/{entry}/reload.{ext}'.format(entry=entry,
-                                                         ext=self.format)
+                                                         ext=self._ext(format))
         return await self.query(url, "patch", **{})
 
-    async def patch_entries(self, entry, **kwargs):
+    async def patch_entries(self, entry, format=None, **kwargs):
         """
         PATCH /api/entries/{entry}.{_format}
 
@@ -278,10 +840,20 @@ class WallabagAPI(object):
             archive:  '0' or '1', default '0' archived the entry.
             starred: '0' or '1', default '0' starred the entry
             In case that you don't want to *really* remove it..
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return data related to the ext
         """
-        # default values
-        params = {'title': '', 'tags': []}
+        path = '/api/entries/{entry}.{ext}'.format(
+            entry=entry, ext=self._ext(format))
+        return await self.query(path, "patch", **self._patch_params(**kwargs))
+
+    def _patch_params(self, **kwargs):
+        """
+        parameters of patch_entries, only the given ones are sent: wallabag
+        would set an empty title, or unarchive the entry, for the others
+        """
+        params = {}
 
         if 'title' in kwargs:
             params['title'] = kwargs['title']
@@ -300,25 +872,118 @@ class WallabagAPI(object):
                                                       type_attr=str,
                                                       value_attr=('asc', 'desc'),
                                                       **kwargs)
+        return {name: value for name, value in params.items() if value is not None}
 
-        path = '/api/entries/{entry}.{ext}'.format(
-            entry=entry, ext=self.format)
-        return await self.query(path, "patch", **params)
-
-    async def get_entry_export(self, entry):
+    async def get_entry_export(self, entry, format=None):
         """
         GET /api/entries/{entry}/export.{_format}
 
         Retrieve a single entry as a predefined format.
 
         :param entry \\w+ integer The entry ID
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return data related to the ext
         """
 
-        url = '/api/entries/{entry}/export.{ext}'.format(entry=entry, ext=self.format)
+        url = '/api/entries/{entry}/export.{ext}'.format(entry=entry, ext=self._ext(format))
         return await self.query(url, "get", **{})
 
-    async def patch_entry_reload(self, entry):
+    async def export_entry_to(self, entry, dest, format=None, chunk_size=64 * 1024):
+        """
+        GET /api/entries/{entry}/export.{_format}
+
+        Write the export of an entry to a file, chunk after chunk, without
+        holding the whole document in memory.
+        When `dest` is a path, the file only appears once complete.
+        The httpx errors are raised.
+
+        :param entry \\w+ integer The entry ID
+        :param dest: path of the file, or a binary file object
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
+        :param chunk_size: int bytes read at once
+        :return int number of bytes written
+        """
+        ext = self._ext(format)
+        full_path = self.host + '/api/entries/{entry}/export.{ext}'.format(entry=entry, ext=ext)
+
+        if hasattr(dest, 'write'):
+            return await self._stream_to(full_path, dest, chunk_size)
+
+        part = os.fspath(dest) + '.part'
+        try:
+            with open(part, 'wb') as f:
+                size = await self._stream_to(full_path, f, chunk_size)
+            os.replace(part, dest)
+        except BaseException:
+            if os.path.exists(part):
+                os.unlink(part)
+            raise
+        return size
+
+    async def _stream_to(self, full_path, fileobj, chunk_size):
+        event = RequestEvent('get', full_path[len(self.host):]) if self.hooks else None
+        size = 0
+        try:
+            resp = await self._send('get', full_path, stream=True, event=event)
+            try:
+                if event is not None:
+                    event.status = resp.status_code
+                resp.raise_for_status()
+                async for chunk in resp.aiter_bytes(chunk_size):
+                    fileobj.write(chunk)
+                    size += len(chunk)
+                return size
+            finally:
+                await resp.aclose()
+        except Exception as exc:
+            if event is not None:
+                event.error = exc
+            raise
+        finally:
+            if event is not None:
+                event.bytes = size
+                event.total = time.perf_counter() - event.started
+                self._emit(event)
+
+    async def export_entries(self, entries, directory, format=None, concurrency=4):
+        """
+        Export many entries in a directory, as {entry}.{format} files,
+        with at most `concurrency` downloads at once.
+
+        :param entries: (async) iterable of entry IDs
+        :param directory: path of the directory, created if needed
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
+        :param concurrency: int max number of downloads at once
+        :return dict with the number of 'exported' entries, the 'failed'
+            ones ({'id': .., 'error': ..}), 'bytes', 'seconds' and
+            'bytes_per_second'
+        """
+        ext = self._ext(format)
+        os.makedirs(directory, exist_ok=True)
+
+        async def export(entry):
+            path = os.path.join(directory, '{entry}.{ext}'.format(entry=entry, ext=ext))
+            try:
+                return entry, await self.export_entry_to(entry, path, format=ext), None
+            except (httpx.HTTPError, OSError) as exc:
+                return entry, 0, str(exc)
+
+        report = {'exported': 0, 'failed': [], 'bytes': 0}
+        start = time.monotonic()
+        async for entry, size, error in bounded_map(export, entries, concurrency=concurrency):
+            if error is None:
+                report['exported'] += 1
+                report['bytes'] += size
+            else:
+                report['failed'].append({'id': entry, 'error': error})
+        report['seconds'] = time.monotonic() - start
+        report['bytes_per_second'] = report['bytes'] / report['seconds'] if report['seconds'] else 0
+        return report
+
+    async def patch_entry_reload(self, entry, format=None):
         """
         PATCH /api/entries/{entry}/reload.{_format}
 
@@ -327,24 +992,93 @@ class WallabagAPI(object):
         or we got an error).
 
         :param entry \\w+ integer The entry ID
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return data related to the ext
         """
-        url = '/api/entries/{entry}/reload.{ext}'.format(entry=entry, ext=self.format)
+        url = '/api/entries/{entry}/reload.{ext}'.format(entry=entry, ext=self._ext(format))
         return await self.query(url, "patch", **{})
 
-    async def delete_entries(self, entry):
+    async def delete_entries(self, entry, format=None):
         """
         DELETE /api/entries/{entry}.{_format}
 
         Delete permanently an entry
 
         :param entry \\w+ integer The entry ID
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return result
         """
-        path = '/api/entries/{entry}.{ext}'.format(entry=entry, ext=self.format)
+        path = '/api/entries/{entry}.{ext}'.format(entry=entry, ext=self._ext(format))
         return await self.query(path, "delete", **{})
 
-    async def entries_exists(self, url, urls=''):
+    def bulk_patch(self, ids, concurrency=8, ordered=False, progress=None, **fields):
+        """
+        PATCH /api/entries/{entry}.{_format} on many entries
+
+        :param ids: (async) iterable of entry IDs
+        :param concurrency: int max number of queries at once
+        :param ordered: give the results in the order of the ids
+        :param progress: function called with (done, total) after each
+            entry
+        :param fields: the properties of patch_entries, title, tags,
+            archive, starred
+        :return BulkJob, to iterate over or to await, its failures can be
+            retried
+        """
+        params = self._patch_params(**fields)
+
+        async def patch(entry):
+            path = '/api/entries/{entry}.json'.format(entry=entry)
+            return await self._request(path, 'patch', dict(params), raise_errors=True)
+        return BulkJob(patch, ids, concurrency=concurrency, ordered=ordered, progress=progress,
+                       errors=(httpx.HTTPError,))
+
+    def bulk_delete(self, ids, concurrency=8, ordered=False, progress=None):
+        """
+        DELETE /api/entries/{entry}.{_format} on many entries
+
+        :param ids: (async) iterable of entry IDs
+        :param concurrency: int max number of queries at once
+        :param ordered: give the results in the order of the ids
+        :param progress: function called with (done, total) after each
+            entry
+        :return BulkJob, to iterate over or to await, its failures can be
+            retried
+        """
+        async def delete(entry):
+            path = '/api/entries/{entry}.json'.format(entry=entry)
+            return await self._request(path, 'delete', {}, raise_errors=True)
+        return BulkJob(delete, ids, concurrency=concurrency, ordered=ordered, progress=progress,
+                       errors=(httpx.HTTPError,))
+
+    async def _write_job(self, kind, params):
+        """
+        one job of a wallabagapi.jobqueue.WriteQueue, raising the httpx errors
+        :param kind: 'create', 'patch', 'delete', 'add_tags' or 'remove_tag'
+        :param params: dict of the job: 'url' or 'entry', and the fields
+        :return json data
+        """
+        fields = {name: value for name, value in params.items() if name not in ('url', 'entry')}
+        if kind == 'create':
+            return await self._request('/api/entries.json', 'post', self._post_params(params['url'], **fields),
+                                       raise_errors=True)
+        path = '/api/entries/{entry}.json'.format(entry=params['entry'])
+        if kind == 'patch':
+            return await self._request(path, 'patch', self._patch_params(**fields), raise_errors=True)
+        if kind == 'delete':
+            return await self._request(path, 'delete', {}, raise_errors=True)
+        path = '/api/entries/{entry}/tags'.format(entry=params['entry'])
+        if kind == 'add_tags':
+            return await self._request(path + '.json', 'post', {'tags': ', '.join(fields['tags'])},
+                                       raise_errors=True)
+        if kind == 'remove_tag':
+            return await self._request('{path}/{tag}.json'.format(path=path, tag=fields['tag']), 'delete', {},
+                                       raise_errors=True)
+        raise ValueError('unknown job {!r}'.format(kind))
+
+    async def entries_exists(self, url=None, urls='', return_id=False, format=None):
         """
         GET /api/entries/exists.{_format}
 
@@ -353,29 +1087,155 @@ class WallabagAPI(object):
         :param url 	string 	true 	An url 	Url to check if it exists
         :param urls string 	false 	An array of urls
         (?urls[]=http...&urls[]=http...) Urls (as an array)
-        to check if it exists
+        to check if it exists. When a list is given, it is sent as urls[]
+        and the result is a dict {url: exists}
+        :param return_id: bool return the id of the entry instead of true
 
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return result
         """
-        params = {'url': url, 'urls': urls}
-        path = '/api/entries/exists.{ext}'.format(ext=self.format)
+        params = {}
+        if url is not None:
+            params['url'] = url
+        if isinstance(urls, (list, tuple)):
+            params['urls[]'] = list(urls)
+        elif urls:
+            params['urls'] = urls
+        if return_id:
+            params['return_id'] = 1
+        path = '/api/entries/exists.{ext}'.format(ext=self._ext(format))
         return await self.query(path, "get", **params)
 
+    async def exists_many(self, urls, concurrency=4, max_url_length=8000, index=None):
+        """
+        GET /api/entries/exists.{_format}
+
+        Check if many urls exist, with as few queries as possible: the
+        urls are sent as urls[] by chunks keeping each query under
+        `max_url_length`, the chunks being checked concurrently.
+        Two urls with the same normalized form (see
+        wallabagapi.urlindex.normalize_url) are the same entry.
+
+        :param urls: iterable of urls
+        :param concurrency: int max number of queries at once
+        :param max_url_length: int max length of the url of a query, the
+            servers usually refuse more than 8K
+        :param index: UrlIndex answering instead of the server
+        :return dict {url: id of its entry or None}, without the urls
+            whose check failed
+        """
+        keys = {url: normalize_url(url) for url in urls}
+        if index is not None:
+            return {url: index.lookup(key) for url, key in keys.items()}
+
+        # wallabag compares the urls as they are, ask for both forms
+        variants = list(dict.fromkeys(variant for url, key in keys.items() for variant in (url, key)))
+        base = len(self.host + '/api/entries/exists.json?return_id=1&access_token=' + (self.token or ''))
+
+        def chunks():
+            chunk, length = [], base
+            for variant in variants:
+                size = len('&urls%5B%5D=') + len(urllib.parse.quote_plus(variant))
+                if chunk and length + size > max_url_length:
+                    yield chunk
+                    chunk, length = [], base
+                chunk.append(variant)
+                length += size
+            if chunk:
+                yield chunk
+
+        async def check(chunk):
+            return chunk, await self.entries_exists(urls=chunk, return_id=True, format='json')
+
+        found, failed = {}, set()
+        async for chunk, result in bounded_map(check, chunks(), concurrency=concurrency):
+            if not isinstance(result, dict):
+                failed.update(chunk)
+                continue
+            for variant, entry in result.items():
+                if entry:
+                    found[normalize_url(variant)] = entry
+
+        results = {}
+        for url, key in keys.items():
+            if key in found:
+                results[url] = found[key]
+            elif url not in failed and key not in failed:
+                results[url] = None
+        return results
+
+    async def post_entries_bulk(self, items, concurrency=8, batch_size=50):
+        """
+        Create many entries, skipping the ones already stored
+
+        The items are read by batches of `batch_size`, checked with one
+        entries_exists() call per batch, then the missing ones are created
+        with at most `concurrency` post_entries() calls at once.
+        The items are read lazily so the input can be a huge (async)
+        iterable.
+
+        :param items: (async) iterable of urls, or of dicts with an 'url'
+            key and the other parameters of post_entries
+        :param concurrency: int max number of entries created at once
+        :param batch_size: int number of urls per entries_exists call
+        :return async iterator of dicts
+            {'url': url, 'status': 'created'|'existed'|'failed', 'id': id}
+            with an 'error' message for the failed ones
+        """
+        async def plan():
+            async for batch in achunks(items, batch_size):
+                batch = [{'url': item} if isinstance(item, str) else dict(item)
+                         for item in batch]
+                urls = list(dict.fromkeys(item['url'] for item in batch))
+                try:
+                    found = await self.entries_exists(urls=urls, return_id=True, format='json')
+                except httpx.HTTPError:
+                    found = None
+                if not isinstance(found, dict):
+                    # the check failed, wallabag does not duplicate an url
+                    # posted twice so creating them all is still safe
+                    found = {}
+                seen = set()
+                for item in batch:
+                    if item['url'] in seen:
+                        continue
+                    seen.add(item['url'])
+                    yield item, found.get(item['url'])
+
+        async def create(job):
+            item, entry_id = job
+            url = item.pop('url')
+            if entry_id:
+                return {'url': url, 'status': 'existed', 'id': entry_id}
+            try:
+                data = await self.post_entries(url, format='json', **item)
+            except httpx.HTTPError as exc:
+                return {'url': url, 'status': 'failed', 'id': None, 'error': str(exc)}
+            if data is None:
+                return {'url': url, 'status': 'failed', 'id': None, 'error': 'request failed'}
+            return {'url': url, 'status': 'created', 'id': data.get('id')}
+
+        async for result in bounded_map(create, plan(), concurrency=concurrency):
+            yield result
+
     # TAGS
 
-    async def get_entry_tags(self, entry):
+    async def get_entry_tags(self, entry, format=None):
         """
         GET /api/entries/{entry}/tags.{_format}
 
         Retrieve all tags for an entry
 
         :param entry \\w+ integer The entry ID
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return data related to the ext
         """
-        url = '/api/entries/{entry}/tags.{ext}'.format(entry=entry, ext=self.format)
+        url = '/api/entries/{entry}/tags.{ext}'.format(entry=entry, ext=self._ext(format))
         return await self.query(url, "get", **{})
 
-    async def post_entry_tags(self, entry, tags):
+    async def post_entry_tags(self, entry, tags, format=None):
         """
         POST /api/entries/{entry}/tags.{_format}
 
@@ -383,80 +1243,236 @@ class WallabagAPI(object):
 
         :param entry \\w+ integer The entry ID
         :param tags: list of tags (urlencoded)
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return result
         """
         params = {'tags': []}
         if len(tags) > 0 and isinstance(tags, list):
             params['tags'] = ', '.join(tags)
-        path = '/api/entries/{entry}/tags.{ext}'.format(entry=entry, ext=self.format)
+        path = '/api/entries/{entry}/tags.{ext}'.format(entry=entry, ext=self._ext(format))
         return await self.query(path, "post", **params)
 
-    async def delete_entry_tag(self, entry, tag):
+    async def delete_entry_tag(self, entry, tag, format=None):
         """
         DELETE /api/entries/{entry}/tags/{tag}.{_format}
 
         Permanently remove one tag for an entry
 
         :param entry \\w+ integer The entry ID
-        :param tag: string The Tag
+        :param tag: integer The Tag ID
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return data related to the ext
         """
-        url = '/api/entries/{entry}/tags/{tag}.{ext}'.format(entry=entry, tag=tag, ext=self.format)
+        url = '/api/entries/{entry}/tags/{tag}.{ext}'.format(entry=entry, tag=tag, ext=self._ext(format))
         return await self.query(url, "delete", **{})
 
-    async def get_tags(self):
+    async def get_tags(self, format=None, models=False):
         """
         GET /api/tags.{_format}
 
         Retrieve all tags
 
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
+        :param models: bool return a list of Tag instead of dicts (JSON only)
         :return data related to the ext
         """
-        path = '/api/tags.{ext}'.format(ext=self.format)
-        return await self.query(path, "get", **{})
+        path = '/api/tags.{ext}'.format(ext='json' if models else self._ext(format))
+        data = await self.query(path, "get", **{})
+        return [Tag.from_dict(tag) for tag in data] if models and data is not None else data
 
-    async def delete_tag(self, tag):
+    async def delete_tag(self, tag, format=None):
         """
         DELETE /api/tags/{tag}.{_format}
 
         Permanently remove one tag from every entry
 
         :param tag: string The Tag
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return data related to the ext
         """
-        path = '/api/tags/{tag}.{ext}'.format(tag=tag, ext=self.format)
+        path = '/api/tags/{tag}.{ext}'.format(tag=tag, ext=self._ext(format))
         return await self.query(path, "delete", **{})
 
-    async def delete_tag_label(self, tag):
+    async def delete_tag_label(self, tag, format=None):
         """
         DELETE /api/tag/label.{_format}
 
         Permanently remove one tag from every entry.
 
         :param tag: string The Tag
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return data related to the ext
         """
-        path = '/api/tag/label.{ext}'.format(ext=self.format)
+        path = '/api/tag/label.{ext}'.format(ext=self._ext(format))
         params = {'tag': tag}
         return await self.query(path, "delete", **params)
 
-    async def delete_tags_label(self, tags):
+    async def delete_tags_label(self, tags, format=None):
         """
         DELETE /api/tags/label.{_format}
 
         Permanently remove some tags from every entry.
 
         :param tags: list of tags (urlencoded)
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return data related to the ext
         """
-        path = '/api/tag/label.{ext}'.format(ext=self.format)
+        path = '/api/tags/label.{ext}'.format(ext=self._ext(format))
         params = {'tags': []}
         if len(tags) > 0 and isinstance(tags, list):
             params['tags'] = ', '.join(tags)
         return await self.query(path, "delete", **params)
 
+    async def retag(self, entries, add=(), remove=(), concurrency=8, per_page=500):
+        """
+        Add and remove tags on many entries with as few queries as possible
+
+        The current tags are read either entry by entry (get_entry_tags) or
+        tag by tag (get_entries with the tags filter), whichever needs
+        fewer pages. Then only the missing tags are added, all at once for
+        each entry, and only the present tags are removed. A tag carried by
+        none of the other entries is removed with one delete_tag_label.
+
+        :param entries: iterable of entry IDs
+        :param add: list of tag labels to add
+        :param remove: list of tag labels to remove
+        :param concurrency: int max number of queries at once
+        :param per_page: int entries per page when reading by tag
+        :return dict summary: 'reads' and 'calls' done, 'naive_calls' one
+            call per entry and per tag, 'saved' (0 when the reads cost more
+            than they saved) and the 'failed' calls
+        :raise httpx.HTTPError when the tags of an entry, or the entries of
+            a tag, could not all be read, before any change: a tag carried
+            by entries not read could be removed from all of them at once
+        """
+        entries = list(dict.fromkeys(entries))
+        add = [tag for tag in add if tag not in remove]
+        wanted = set(entries)
+        current = {entry: set() for entry in entries}
+        # label -> id, and entries carrying each tag to remove
+        tag_ids = {}
+        carriers = {tag: set() for tag in remove}
+        reads = 0
+
+        # read by tag when the pages of the tags are fewer than the entries
+        first_pages = {}
+        for tag in set(add) | set(remove):
+            first_pages[tag] = await self.get_entries(format='json', tags=[tag], perPage=per_page,
+                                                      detail='metadata')
+            reads += 1
+        by_tag = all(first_pages.values()) and \
+            sum(int(page.get('pages') or 1) for page in first_pages.values()) <= len(entries)
+
+        if by_tag:
+            for tag, page in first_pages.items():
+                items = list(page.get('_embedded', {}).get('items', []))
+                if int(page.get('pages') or 1) > 1:
+                    async for item in self.iter_entries(tags=[tag], perPage=per_page, detail='metadata', page=2):
+                        items.append(item)
+                reads += max(0, int(page.get('pages') or 1) - 1)
+                for item in items:
+                    for entry_tag in item.get('tags') or []:
+                        tag_ids[entry_tag['label']] = entry_tag['id']
+                    if tag in carriers:
+                        carriers[tag].add(item['id'])
+                    if item['id'] in wanted:
+                        current[item['id']].add(tag)
+        else:
+            async def read(entry):
+                # a tag not read would stay on the entry without notice
+                path = '/api/entries/{entry}/tags.json'.format(entry=entry)
+                return entry, await self._request(path, "get", {}, raise_errors=True)
+
+            async for entry, tags in bounded_map(read, entries, concurrency=concurrency):
+                reads += 1
+                for entry_tag in tags or []:
+                    tag_ids[entry_tag['label']] = entry_tag['id']
+                    current[entry].add(entry_tag['label'])
+
+        calls = []
+        for entry in entries:
+            missing = [tag for tag in add if tag not in current[entry]]
+            if missing:
+                calls.append((self.post_entry_tags, (entry, missing)))
+        for tag in remove:
+            having = {entry for entry in entries if tag in current[entry]}
+            if not having:
+                continue
+            if by_tag and carriers[tag] <= wanted and len(having) > 1:
+                calls.append((self.delete_tag_label, (tag,)))
+            else:
+                calls.extend((self.delete_entry_tag, (entry, tag_ids[tag])) for entry in having)
+
+        summary = await self._run_calls(calls, concurrency)
+        summary['reads'] = reads
+        summary['naive_calls'] = len(entries) * (len(add) + len(remove))
+        summary['saved'] = max(0, summary['naive_calls'] - summary['calls'] - reads)
+        return summary
+
+    async def rename_tag(self, old, new, concurrency=8, per_page=500):
+        """
+        Rename a tag: add the new one to every entry carrying the old one,
+        then remove the old one from all of them with one query.
+        The old tag is kept if the new one could not be added everywhere.
+
+        :param old: string label of the tag to rename
+        :param new: string new label
+        :param concurrency: int max number of queries at once
+        :param per_page: int entries per page when reading the entries
+        :return dict summary, see retag()
+        :raise httpx.HTTPError when the entries of the old tag could not
+            all be read, before any change
+        """
+        entries = []
+        seen = 0
+        async for item in self.iter_entries(tags=[old], perPage=per_page, detail='metadata'):
+            seen += 1
+            if new not in [tag['label'] for tag in item.get('tags') or []]:
+                entries.append(item['id'])
+        reads = max(1, -(-seen // per_page))
+
+        summary = await self._run_calls([(self.post_entry_tags, (entry, [new])) for entry in entries],
+                                        concurrency)
+        if not summary['failed']:
+            last = await self._run_calls([(self.delete_tag_label, (old,))], 1)
+            summary['calls'] += last['calls']
+            summary['failed'] = last['failed']
+        summary['reads'] = reads
+        summary['naive_calls'] = 2 * len(entries)
+        summary['saved'] = max(0, summary['naive_calls'] - summary['calls'] - reads)
+        return summary
+
+    async def _run_calls(self, calls, concurrency):
+        """
+        run the planned calls concurrently
+        :param calls: list of (coroutine function, args) or
+            (coroutine function, args, kwargs)
+        :param concurrency: int max number of calls at once
+        :return dict number of 'calls' and the 'failed' ones
+        """
+        async def run(call):
+            func, args, kwargs = (call + ({},))[:3]
+            try:
+                result = await func(*args, format='json', **kwargs)
+            except httpx.HTTPError as exc:
+                return call, str(exc)
+            return call, None if result is not None else 'request failed'
+
+        failed = []
+        async for call, error in bounded_map(run, calls, concurrency=concurrency):
+            func, args = call[:2]
+            if error is not None:
+                failed.append({'call': func.__name__, 'args': args, 'error': error})
+        return {'calls': len(calls), 'failed': failed}
+
     # ANNOTATIONS
-    async def delete_annotations(self, annotation):
+    async def delete_annotations(self, annotation, format=None):
         """
         DELETE /api/annotations/{annotation}.{_format}
 
@@ -465,26 +1481,33 @@ class WallabagAPI(object):
         :param annotation \\w+ string The annotation ID
 
         Will returns annotation for this entry
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return data related to the ext
         """
-        url = '/api/annotations/{annotation}.{ext}'.format(annotation=annotation, ext=self.format)
+        url = '/api/annotations/{annotation}.{ext}'.format(annotation=annotation, ext=self._ext(format))
         return await self.query(url, "delete", **{})
 
-    async def put_annotations(self, annotation):
+    async def put_annotations(self, annotation, format=None, text=None):
         """
         PUT /api/annotations/{annotation}.{_format}
 
         Updates an annotation.
 
         :param annotation \\w+ string The annotation ID
+        :param text: string the new text of the annotation, the only field
+            Wallabag lets change: the quote and the ranges stay
 
         Will returns annotation for this entry
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return data related to the ext
         """
-        url = '/api/annotations/{annotation}.{ext}'.format(annotation=annotation, ext=self.format)
-        return await self.query(url, "put", **{})
+        params = {'text': text} if text is not None else {}
+        url = '/api/annotations/{annotation}.{ext}'.format(annotation=annotation, ext=self._ext(format))
+        return await self._request(url, "put", params, json_body=True)
 
-    async def get_annotations(self, entry):
+    async def get_annotations(self, entry, format=None, models=False):
         """
         GET /api/annotations/{entry}.{_format}
 
@@ -493,12 +1516,18 @@ class WallabagAPI(object):
         :param entry \\w+ integer The entry ID
 
         Will returns annotation for this entry
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
+        :param models: bool return a list of Annotation instead of dicts (JSON only)
         :return data related to the ext
         """
-        url = '/api/annotations/{entry}.{ext}'.format(entry=entry, ext=self.format)
-        return await self.query(url, "get", **{})
+        url = '/api/annotations/{entry}.{ext}'.format(entry=entry, ext='json' if models else self._ext(format))
+        data = await self.query(url, "get", **{})
+        if models and data is not None:
+            return [Annotation.from_dict(annotation) for annotation in data.get('rows', [])]
+        return data
 
-    async def post_annotations(self, entry, **kwargs):
+    async def post_annotations(self, entry, format=None, **kwargs):
         """
         POST /api/annotations/{entry}.{_format}
 
@@ -506,6 +1535,8 @@ class WallabagAPI(object):
 
         :param entry \\w+ integer The entry ID
 
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
         :return
         """
         params = dict({'ranges': [],
@@ -518,10 +1549,103 @@ class WallabagAPI(object):
         if 'text' in kwargs:
             params['text'] = kwargs['text']
 
-        url = '/api/annotations/{entry}.{ext}'.format(entry=entry, ext=self.format)
-        return await self.query(url, "post", **params)
+        url = '/api/annotations/{entry}.{ext}'.format(entry=entry, ext=self._ext(format))
+        # Wallabag reads the annotations from a JSON body, not from a form
+        return await self._request(url, "post", params, json_body=True)
+
+    async def get_annotations_many(self, entries, concurrency=4):
+        """
+        get_annotations() of many entries, `concurrency` at once
+
+        :param entries: iterable or async iterable of entry IDs
+        :param concurrency: int max number of queries at once
+        :return async iterator of (entry ID, list of the annotations), as
+            soon as they are received; the list is None when the query failed
+        """
+        async def read(entry):
+            try:
+                data = await self.get_annotations(entry, format='json')
+            except httpx.HTTPError:
+                data = None
+            return entry, data.get('rows', []) if data is not None else None
+
+        async for result in bounded_map(read, entries, concurrency=concurrency):
+            yield result
+
+    async def sync_annotations(self, entry, desired, concurrency=4):
+        """
+        Make the annotations of an entry the desired ones, with as few
+        queries as possible
+
+        An annotation is the same as a desired one with the same 'id', or
+        else with the same quote and ranges. Then only the text is updated
+        when it differs, the others are created or deleted. An annotation
+        whose quote or ranges changed is deleted and created again.
+
+        :param entry: integer The entry ID
+        :param desired: list of dicts with 'quote', 'ranges', 'text' and
+            optionally the 'id' of an existing annotation
+        :param concurrency: int max number of queries at once
+        :return dict summary: the 'created', 'updated', 'deleted' and
+            'unchanged' numbers, the 'calls' done and the 'failed' ones,
+            or None when the current annotations could not be read
+        """
+        data = await self.get_annotations(entry, format='json')
+        if data is None:
+            return None
+        rows = {annotation['id']: annotation for annotation in data.get('rows', [])}
+        current = dict(rows)
+
+        def key(annotation):
+            ranges = [sorted((name, str(value)) for name, value in dict(item).items())
+                      for item in annotation.get('ranges') or []]
+            return annotation.get('quote') or '', repr(ranges)
+
+        by_key = {}
+        for annotation in current.values():
+            by_key.setdefault(key(annotation), []).append(annotation['id'])
+
+        calls = []
+        summary = {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+        for annotation in desired:
+            found = None
+            if annotation.get('id') in current and key(current[annotation['id']]) == key(annotation):
+                found = annotation['id']
+                by_key[key(annotation)].remove(found)
+            elif by_key.get(key(annotation)):
+                found = by_key[key(annotation)].pop(0)
+            if found is None:
+                fields = {name: annotation[name] for name in ('quote', 'ranges', 'text') if name in annotation}
+                calls.append((self.post_annotations, (entry,), fields))
+                summary['created'] += 1
+                continue
+            del current[found]
+            if (annotation.get('text') or '') != (rows[found].get('text') or ''):
+                calls.append((self.put_annotations, (found,), {'text': annotation.get('text') or ''}))
+                summary['updated'] += 1
+            else:
+                summary['unchanged'] += 1
+        for annotation in current:
+            calls.append((self.delete_annotations, (annotation,)))
+            summary['deleted'] += 1
+
+        summary.update(await self._run_calls(calls, concurrency))
+        return summary
 
     # VERSION
+    async def get_version(self, format=None):
+        """
+        GET /api/version.{_format}
+
+        Retrieve version number
+
+        :param format: xml|json|txt|csv|pdf|epub|mobi|html, default to the
+            extension of this instance
+        :return data related to the ext
+        """
+        url = '/api/version.{ext}'.format(ext=self._ext(format))
+        return await self.query(url, "get", **{})
+
     @property
     async def version(self):
         """
@@ -531,17 +1655,19 @@ class WallabagAPI(object):
 
         :return data related to the ext
         """
-        url = '/api/version.{ext}'.format(ext=self.format)
-        return await self.query(url, "get", **{})
+        return await self.get_version()
 
     @classmethod
-    async def get_token(cls, host, **params):
+    async def get_token(cls, host, client=None, **params):
         """
         POST /oauth/v2/token
 
         Get a new token
 
         :param host: host of the service
+        :param client: httpx.AsyncClient to use, for example the `client`
+            of an existing WallabagAPI instance to reuse its connections.
+            A temporary one is created if not provided.
         :param params: will contain :
 
         params = {"grant_type": "password",
@@ -554,6 +1680,9 @@ class WallabagAPI(object):
         """
         params['grant_type'] = "password"
         path = "/oauth/v2/token"
+        if client is not None:
+            resp = await client.post(host + path, data=params)
+            return resp.json()['access_token']
         async with httpx.AsyncClient() as client:
             resp = await client.post(host + path, data=params)
             return resp.json()['access_token']
@@ -0,0 +1,83 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the entries iterator, without Wallabag server
+"""
+
+import asyncio
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+
+
+class TestIterEntries(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+    total = 95
+    per_page = 10
+
+    async def handler(self, request):
+        page = int(request.url.params.get('page', 1))
+        per_page = int(request.url.params.get('perPage', 30))
+        self.requested.append(page)
+        if page in self.failing:
+            return httpx.Response(500, json={'error': 'page lost'})
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # the later pages answer first, the order should not change
+        await asyncio.sleep(0.01 / page)
+        self.in_flight -= 1
+        first = (page - 1) * per_page
+        items = [{'id': i} for i in range(first, min(first + per_page, self.total))]
+        pages = -(-self.total // per_page)
+        return httpx.Response(200, json={'page': page, 'limit': per_page, 'pages': pages,
+                                         'total': self.total, '_embedded': {'items': items}})
+
+    async def asyncSetUp(self):
+        self.requested = []
+        self.failing = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        self.w = WallabagAPI(host=self.host, token='abc', client=client)
+
+    async def asyncTearDown(self):
+        await self.w.client.aclose()
+
+    async def test_iter_entries_in_order(self):
+        ids = [entry['id'] async for entry in self.w.iter_entries(window=3, perPage=self.per_page)]
+        self.assertEqual(ids, list(range(self.total)))
+        self.assertEqual(sorted(self.requested), list(range(1, 11)))
+        self.assertLessEqual(self.max_in_flight, 3)
+        self.assertGreater(self.max_in_flight, 1)
+
+    async def test_iter_entries_from_page(self):
+        ids = [entry['id'] async for entry in self.w.iter_entries(page=9, perPage=self.per_page)]
+        self.assertEqual(ids, list(range(80, 95)))
+
+    async def test_iter_entries_stop_early(self):
+        entries = self.w.iter_entries(window=2, perPage=self.per_page, sort='updated')
+        async for entry in entries:
+            if entry['id'] == 12:
+                break
+        await entries.aclose()
+        self.assertLessEqual(len(self.requested), 5)
+
+    async def test_iter_entries_failed_page(self):
+        self.failing = {4}
+        ids = []
+        with self.assertRaises(httpx.HTTPStatusError):
+            async for entry in self.w.iter_entries(window=3, perPage=self.per_page):
+                ids.append(entry['id'])
+        # the entries before the failed page, and nothing after it
+        self.assertEqual(ids, list(range(30)))
+
+        self.failing = {1}
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.w.iter_entries(perPage=self.per_page).__anext__()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the exports, without Wallabag server
+"""
+
+import io
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.retry import RetryPolicy
+
+CHUNK = b'x' * 1000
+
+
+class TestExport(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    def handler(self, request):
+        entry = request.url.path.split('/')[3]
+        if entry == '404':
+            return httpx.Response(404)
+
+        async def body():
+            for _ in range(100):
+                yield CHUNK
+        return httpx.Response(200, headers={'Content-Type': 'application/epub+zip'}, content=body())
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        self.w = WallabagAPI(host=self.host, token='abc', client=client, retry=RetryPolicy(max_retries=0))
+
+    async def asyncTearDown(self):
+        self.directory.cleanup()
+        await self.w.client.aclose()
+
+    async def test_get_entry_export_returns_bytes(self):
+        data = await self.w.get_entry_export(1)
+        self.assertEqual(data, CHUNK * 100)
+
+    async def test_export_entry_to_path(self):
+        path = os.path.join(self.directory.name, 'one.epub')
+        size = await self.w.export_entry_to(1, path, format='epub')
+        self.assertEqual(size, 100000)
+        self.assertEqual(os.path.getsize(path), 100000)
+
+    async def test_export_entry_to_fileobj(self):
+        f = io.BytesIO()
+        await self.w.export_entry_to(1, f, format='pdf', chunk_size=4096)
+        self.assertEqual(f.getvalue(), CHUNK * 100)
+
+    async def test_export_entry_to_error(self):
+        path = os.path.join(self.directory.name, 'missing.epub')
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.w.export_entry_to(404, path, format='epub')
+        self.assertEqual(os.listdir(self.directory.name), [])
+        with self.assertRaises(ValueError):
+            await self.w.export_entry_to(1, path, format='doc')
+
+    async def test_export_entries(self):
+        directory = os.path.join(self.directory.name, 'exports')
+        report = await self.w.export_entries([1, 2, 404, 3], directory, format='epub', concurrency=2)
+        self.assertEqual(report['exported'], 3)
+        self.assertEqual(report['bytes'], 300000)
+        self.assertEqual([failed['id'] for failed in report['failed']], [404])
+        self.assertGreater(report['bytes_per_second'], 0)
+        self.assertEqual(sorted(os.listdir(directory)), ['1.epub', '2.epub', '3.epub'])
+
+
+if __name__ == '__main__':
+    unittest.main()
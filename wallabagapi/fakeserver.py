@@ -0,0 +1,625 @@
+# coding: utf-8
+"""
+   Wallabag API - fake Wallabag server, for the tests and the benchmarks
+
+   An ASGI application keeping the entries, tags and annotations in
+   memory. Use it without network through httpx.ASGITransport:
+
+   >>> app = FakeWallabag(latency=0.005)
+   >>> app.populate(1000)
+   >>> client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+   >>> wall = WallabagAPI(host='http://wallabag', token=FakeWallabag.TOKEN, client=client)
+
+   or as a server (requires uvicorn):
+
+   python -m wallabagapi.fakeserver --port 8000 --entries 1000
+"""
+
+import argparse
+import asyncio
+import collections
+import datetime
+import json
+import random
+import re
+import secrets
+import time
+import urllib.parse
+
+from wallabagapi.hooks import endpoint_template
+
+__author__ = 'foxmask'
+
+__all__ = ['FakeWallabag']
+
+EXPORT_CONTENT_TYPES = {
+    'json': 'application/json',
+    'xml': 'application/xml',
+    'txt': 'text/plain; charset=UTF-8',
+    'csv': 'text/csv; charset=UTF-8',
+    'html': 'text/html; charset=UTF-8',
+    'pdf': 'application/pdf',
+    'epub': 'application/epub+zip',
+    'mobi': 'application/x-mobipocket-ebook',
+}
+EXT = r'\.(?P<ext>xml|json|txt|csv|pdf|epub|mobi|html)$'
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status, message=''):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def format_date(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S%z')
+
+
+class FakeWallabag(object):
+    """
+        ASGI application answering like the API of Wallabag 2.4.
+
+        :param latency: seconds added to each response
+        :param jitter: seconds added at random to `latency`
+        :param error_rate: float between 0 and 1, share of the requests
+            answered by one of `error_statuses` instead
+        :param error_statuses: statuses of the injected errors
+        :param export_size: bytes of the pdf/epub/mobi exports
+        :param seed: seed of the latency jitter and of the errors
+    """
+    VERSION = '2.4.2'
+    # token always accepted, besides the ones given by /oauth/v2/token
+    TOKEN = 'fake-token'
+    CLIENT_ID = 'client'
+    CLIENT_SECRET = 'secret'
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_statuses=(503,),
+                 export_size=256 * 1024, token_lifetime=3600, users=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.export_size = export_size
+        self.token_lifetime = token_lifetime
+        self.users = dict(users) if users is not None else {'wallabag': 'wallabag'}
+        self.random = random.Random(seed)
+        self.entries = {}
+        self.tags = {}
+        self.annotations = {}
+        self.tokens = {self.TOKEN: None}
+        self.refresh_tokens = {}
+        # (method, endpoint template): number of requests received
+        self.requests = collections.Counter()
+        # [method, path, params, status, times] of the errors to answer
+        self.failures = []
+        self._ids = collections.Counter()
+        self._clock = 0
+        self.routes = [(method, re.compile(pattern + EXT), getattr(self, handler))
+                       for method, pattern, handler in (
+                           ('GET', r'^/api/entries/exists', 'entries_exists'),
+                           ('GET', r'^/api/entries', 'get_entries'),
+                           ('POST', r'^/api/entries', 'post_entries'),
+                           ('GET', r'^/api/entries/(?P<entry>\d+)/export', 'export_entry'),
+                           ('PATCH', r'^/api/entries/(?P<entry>\d+)/reload', 'reload_entry'),
+                           ('GET', r'^/api/entries/(?P<entry>\d+)/tags', 'get_entry_tags'),
+                           ('POST', r'^/api/entries/(?P<entry>\d+)/tags', 'post_entry_tags'),
+                           ('DELETE', r'^/api/entries/(?P<entry>\d+)/tags/(?P<tag>\d+)', 'delete_entry_tag'),
+                           ('GET', r'^/api/entries/(?P<entry>\d+)', 'get_entry'),
+                           ('PATCH', r'^/api/entries/(?P<entry>\d+)', 'patch_entry'),
+                           ('DELETE', r'^/api/entries/(?P<entry>\d+)', 'delete_entry'),
+                           ('GET', r'^/api/tags', 'get_tags'),
+                           ('DELETE', r'^/api/tag/label', 'delete_tag_label'),
+                           ('DELETE', r'^/api/tags/label', 'delete_tags_label'),
+                           ('DELETE', r'^/api/tags/(?P<tag>\d+)', 'delete_tag'),
+                           ('GET', r'^/api/annotations/(?P<entry>\d+)', 'get_annotations'),
+                           ('POST', r'^/api/annotations/(?P<entry>\d+)', 'post_annotation'),
+                           ('PUT', r'^/api/annotations/(?P<annotation>\d+)', 'put_annotation'),
+                           ('DELETE', r'^/api/annotations/(?P<annotation>\d+)', 'delete_annotation'),
+                           ('GET', r'^/api/version', 'get_version'),
+                       )]
+
+    def fail(self, method, path, status=500, times=1, **params):
+        """
+        answer `status` to the next `times` requests of `method` on `path`
+        having `params`, like a server failing on one page
+        :param method: 'GET', 'POST'...
+        :param path: exact path, like '/api/entries.json'
+        :param params: parameters of the requests to fail, like page=2
+        """
+        self.failures.append([method, path, {name: str(value) for name, value in params.items()}, status, times])
+
+    def _failure(self, method, path, params):
+        for failure in self.failures:
+            if failure[:2] == [method, path] and all(params.get(name) == value
+                                                     for name, value in failure[2].items()):
+                failure[4] -= 1
+                if not failure[4]:
+                    self.failures.remove(failure)
+                return failure[3]
+        return None
+
+    # DATA
+    def now(self):
+        # whole seconds like the dates of the API, strictly increasing so
+        # that the updates can be told apart
+        self._clock = max(self._clock + 1, int(time.time()))
+        return self._clock
+
+    def next_id(self, kind):
+        self._ids[kind] += 1
+        return self._ids[kind]
+
+    def add_entry(self, url, title='', content='', tags=(), archive=False, starred=False, **fields):
+        """
+        store an entry, as POST /api/entries would
+        :return dict the entry
+        """
+        now = self.now()
+        entry = {
+            'id': self.next_id('entry'),
+            'url': url,
+            'given_url': url,
+            'origin_url': fields.get('origin_url'),
+            'hashed_url': None,
+            'title': title or url,
+            'content': content,
+            'is_archived': int(bool(archive)),
+            'is_starred': int(bool(starred)),
+            'is_public': bool(fields.get('public', False)),
+            'created_at': now,
+            'updated_at': now,
+            'published_at': fields.get('published_at'),
+            'archived_at': now if archive else None,
+            'starred_at': now if starred else None,
+            'published_by': [author for author in fields.get('authors', '').split(',') if author] or None,
+            'tags': [],
+            'mimetype': 'text/html',
+            'language': fields.get('language') or 'en',
+            'reading_time': len(content.split()) // 200,
+            'domain_name': urllib.parse.urlsplit(url).hostname,
+            'preview_picture': None,
+            'user_id': 1,
+            'user_name': 'wallabag',
+        }
+        self.entries[entry['id']] = entry
+        self._tag(entry, tags)
+        return entry
+
+    def populate(self, number, tags=('news', 'python', 'later'), content_size=2000):
+        """
+        store `number` entries, the nth one tagged with tags[n % len(tags)]
+        """
+        paragraph = '<p>' + ('lorem ipsum dolor sit amet ' * (content_size // 27 + 1))[:content_size] + '</p>'
+        for n in range(number):
+            self.add_entry('https://example.com/articles/{}'.format(n), title='Article {}'.format(n),
+                           content=paragraph, tags=[tags[n % len(tags)]] if tags else ())
+
+    def _tag(self, entry, labels):
+        for label in labels:
+            label = label.strip()
+            if not label:
+                continue
+            if label not in self.tags:
+                self.tags[label] = {'id': self.next_id('tag'), 'label': label,
+                                    'slug': re.sub(r'\W+', '-', label.lower())}
+            if label not in [tag['label'] for tag in entry['tags']]:
+                entry['tags'].append(self.tags[label])
+
+    def _entry(self, entry_id):
+        entry = self.entries.get(int(entry_id))
+        if entry is None:
+            raise HTTPError(404, 'Entry not found')
+        return entry
+
+    def _dump_entry(self, entry, detail='full'):
+        data = dict(entry)
+        for name in ('created_at', 'updated_at', 'archived_at', 'starred_at'):
+            data[name] = format_date(entry[name])
+        data['tags'] = list(entry['tags'])
+        data['annotations'] = [self._dump_annotation(a) for a in self.annotations.values()
+                               if a['entry'] == entry['id']]
+        if detail == 'metadata':
+            data['content'] = None
+        return data
+
+    def _dump_annotation(self, annotation):
+        data = {name: value for name, value in annotation.items() if name != 'entry'}
+        data['created_at'] = format_date(annotation['created_at'])
+        data['updated_at'] = format_date(annotation['updated_at'])
+        return data
+
+    @staticmethod
+    def _labels(value):
+        return [label.strip() for label in (value or '').split(',') if label.strip()]
+
+    @staticmethod
+    def _flag(params, name):
+        value = params.get(name)
+        if value in (None, ''):
+            return None
+        return int(value)
+
+    # ENTRIES
+    def get_entries(self, params, ext):
+        entries = list(self.entries.values())
+        for name in ('archive', 'starred'):
+            value = self._flag(params, name)
+            if value is not None:
+                entries = [e for e in entries if e['is_archived' if name == 'archive' else 'is_starred'] == value]
+        since = params.get('since')
+        if since:
+            entries = [e for e in entries if e['updated_at'] > int(since)]
+        for label in self._labels(params.get('tags')):
+            entries = [e for e in entries if label in [tag['label'] for tag in e['tags']]]
+        if params.get('domain_name'):
+            entries = [e for e in entries if e['domain_name'] == params['domain_name']]
+        sort = params.get('sort') or 'created'
+        if sort not in ('created', 'updated', 'archived'):
+            raise HTTPError(400, 'Sort expected: created, updated, archived')
+        entries.sort(key=lambda e: (e[sort + '_at'] or 0, e['id']), reverse=params.get('order', 'desc') != 'asc')
+
+        page = int(params.get('page') or 1)
+        per_page = int(params.get('perPage') or 30)
+        total = len(entries)
+        pages = max(1, -(-total // per_page))
+        if page < 1 or page > pages:
+            raise HTTPError(404, 'Page "{}" does not exist.'.format(page))
+        detail = params.get('detail') or 'full'
+        items = [self._dump_entry(e, detail) for e in entries[(page - 1) * per_page:page * per_page]]
+        return {'page': page, 'limit': per_page, 'pages': pages, 'total': total,
+                '_links': {'self': {'href': '/api/entries?page={}&perPage={}'.format(page, per_page)}},
+                '_embedded': {'items': items}}
+
+    def post_entries(self, params, ext):
+        url = params.get('url')
+        if not url:
+            raise HTTPError(400, 'url is missing')
+        for entry in self.entries.values():
+            if entry['url'] == url:
+                # wallabag updates the entry already stored
+                if params.get('title'):
+                    entry['title'] = params['title']
+                self._tag(entry, self._labels(params.get('tags')))
+                entry['updated_at'] = self.now()
+                return self._dump_entry(entry)
+        fields = {name: params[name] for name in ('origin_url', 'published_at', 'authors', 'language')
+                  if params.get(name)}
+        entry = self.add_entry(url, title=params.get('title') or '', content=params.get('content') or '',
+                               tags=self._labels(params.get('tags')), archive=self._flag(params, 'archive'),
+                               starred=self._flag(params, 'starred'), public=self._flag(params, 'public'),
+                               **fields)
+        return self._dump_entry(entry)
+
+    def entries_exists(self, params, ext):
+        ids = {entry['url']: entry['id'] for entry in self.entries.values()}
+        ids.update({entry['given_url']: entry['id'] for entry in self.entries.values()})
+        return_id = params.get('return_id') in ('1', 'true')
+
+        def exists(url):
+            if return_id:
+                return ids.get(url)
+            return url in ids
+        if 'urls[]' in params.lists:
+            return {url: exists(url) for url in params.lists['urls[]']}
+        if params.get('url') is None:
+            raise HTTPError(400, 'url or urls[] is missing')
+        return {'exists': exists(params['url'])}
+
+    def get_entry(self, params, ext, entry):
+        return self._dump_entry(self._entry(entry))
+
+    def patch_entry(self, params, ext, entry):
+        entry = self._entry(entry)
+        now = self.now()
+        if params.get('title'):
+            entry['title'] = params['title']
+        if params.get('content'):
+            entry['content'] = params['content']
+        if params.get('language'):
+            entry['language'] = params['language']
+        archive, starred = self._flag(params, 'archive'), self._flag(params, 'starred')
+        if archive is not None:
+            entry['is_archived'] = archive
+            entry['archived_at'] = now if archive else None
+        if starred is not None:
+            entry['is_starred'] = starred
+            entry['starred_at'] = now if starred else None
+        self._tag(entry, self._labels(params.get('tags')))
+        entry['updated_at'] = now
+        return self._dump_entry(entry)
+
+    def reload_entry(self, params, ext, entry):
+        entry = self._entry(entry)
+        entry['updated_at'] = self.now()
+        return self._dump_entry(entry)
+
+    def delete_entry(self, params, ext, entry):
+        entry = self._entry(entry)
+        data = self._dump_entry(entry)
+        del self.entries[entry['id']]
+        for annotation_id in [a['id'] for a in self.annotations.values() if a['entry'] == entry['id']]:
+            del self.annotations[annotation_id]
+        return data
+
+    def export_entry(self, params, ext, entry):
+        entry = self._entry(entry)
+        if ext in ('pdf', 'epub', 'mobi'):
+            return ExportBody(self.export_size)
+        if ext in ('json', 'xml'):
+            return self._dump_entry(entry)
+        return '{title}\n\n{content}'.format(title=entry['title'], content=entry['content'])
+
+    # TAGS
+    def get_entry_tags(self, params, ext, entry):
+        return list(self._entry(entry)['tags'])
+
+    def post_entry_tags(self, params, ext, entry):
+        entry = self._entry(entry)
+        self._tag(entry, self._labels(params.get('tags')))
+        entry['updated_at'] = self.now()
+        return self._dump_entry(entry)
+
+    def delete_entry_tag(self, params, ext, entry, tag):
+        entry = self._entry(entry)
+        tags = [t for t in entry['tags'] if t['id'] != int(tag)]
+        if len(tags) == len(entry['tags']):
+            raise HTTPError(404, 'Tag not found')
+        entry['tags'] = tags
+        entry['updated_at'] = self.now()
+        return self._dump_entry(entry)
+
+    def get_tags(self, params, ext):
+        used = {tag['id'] for entry in self.entries.values() for tag in entry['tags']}
+        return [tag for tag in self.tags.values() if tag['id'] in used]
+
+    def _remove_tags(self, labels):
+        removed = []
+        for label in labels:
+            tag = self.tags.pop(label, None)
+            if tag is None:
+                continue
+            removed.append(tag)
+            now = self.now()
+            for entry in self.entries.values():
+                if tag in entry['tags']:
+                    entry['tags'].remove(tag)
+                    entry['updated_at'] = now
+        return removed
+
+    def delete_tag(self, params, ext, tag):
+        for label, value in self.tags.items():
+            if value['id'] == int(tag):
+                return self._remove_tags([label])[0]
+        raise HTTPError(404, 'Tag not found')
+
+    def delete_tag_label(self, params, ext):
+        removed = self._remove_tags([params.get('tag', '')])
+        if not removed:
+            raise HTTPError(404, 'Tag not found')
+        return removed[0]
+
+    def delete_tags_label(self, params, ext):
+        removed = self._remove_tags(self._labels(params.get('tags')))
+        if not removed:
+            raise HTTPError(404, 'Tags not found')
+        return removed
+
+    # ANNOTATIONS
+    def get_annotations(self, params, ext, entry):
+        entry = self._entry(entry)
+        rows = [self._dump_annotation(a) for a in self.annotations.values() if a['entry'] == entry['id']]
+        return {'total': len(rows), 'rows': rows}
+
+    def post_annotation(self, params, ext, entry):
+        entry = self._entry(entry)
+        now = self.now()
+        annotation = {'id': self.next_id('annotation'), 'entry': entry['id'], 'annotator_schema_version': 'v1.0',
+                      'text': params.get('text', ''), 'quote': params.get('quote', ''),
+                      'ranges': params.lists.get('ranges', []), 'created_at': now, 'updated_at': now}
+        self.annotations[annotation['id']] = annotation
+        entry['updated_at'] = now
+        return self._dump_annotation(annotation)
+
+    def _annotation(self, annotation_id):
+        annotation = self.annotations.get(int(annotation_id))
+        if annotation is None:
+            raise HTTPError(404, 'Annotation not found')
+        return annotation
+
+    def put_annotation(self, params, ext, annotation):
+        annotation = self._annotation(annotation)
+        if 'text' in params:
+            annotation['text'] = params['text']
+        annotation['updated_at'] = self.now()
+        return self._dump_annotation(annotation)
+
+    def delete_annotation(self, params, ext, annotation):
+        annotation = self._annotation(annotation)
+        del self.annotations[annotation['id']]
+        return self._dump_annotation(annotation)
+
+    # VERSION
+    def get_version(self, params, ext):
+        return self.VERSION
+
+    # OAUTH
+    def oauth_token(self, params):
+        if (params.get('client_id'), params.get('client_secret')) != (self.CLIENT_ID, self.CLIENT_SECRET):
+            return 400, {'error': 'invalid_client', 'error_description': 'The client credentials are invalid'}
+        grant_type = params.get('grant_type')
+        if grant_type == 'password':
+            if self.users.get(params.get('username')) != params.get('password'):
+                return 400, {'error': 'invalid_grant', 'error_description': 'Invalid username and password combination'}
+        elif grant_type == 'refresh_token':
+            if self.refresh_tokens.pop(params.get('refresh_token'), None) is None:
+                return 400, {'error': 'invalid_grant', 'error_description': 'Invalid refresh token'}
+        else:
+            return 400, {'error': 'unsupported_grant_type'}
+        token = secrets.token_hex(16)
+        refresh_token = secrets.token_hex(16)
+        self.tokens[token] = time.time() + self.token_lifetime
+        self.refresh_tokens[refresh_token] = token
+        return 200, {'access_token': token, 'expires_in': self.token_lifetime, 'token_type': 'bearer',
+                     'scope': None, 'refresh_token': refresh_token}
+
+    def authorized(self, params, headers):
+        token = params.get('access_token')
+        authorization = headers.get('authorization', '')
+        if authorization.lower().startswith('bearer '):
+            token = authorization[7:]
+        if token not in self.tokens:
+            return False
+        expires_at = self.tokens[token]
+        return expires_at is None or expires_at > time.time()
+
+    # ASGI
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        method, path = scope['method'], scope['path']
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        params = Params(scope['query_string'].decode('latin-1'))
+        if headers.get('content-type', '').startswith('application/x-www-form-urlencoded'):
+            params.update(body.decode())
+        elif headers.get('content-type', '').startswith('application/json') and body:
+            params.update_json(json.loads(body))
+        self.requests[(method, endpoint_template(path))] += 1
+
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self.jitter * self.random.random())
+        if self.error_rate and self.random.random() < self.error_rate:
+            await self.respond(send, self.random.choice(self.error_statuses), {'error': 'injected'})
+            return
+        status = self._failure(method, path, params)
+        if status is not None:
+            await self.respond(send, status, {'error': 'injected'})
+            return
+
+        if method == 'POST' and path == '/oauth/v2/token':
+            await self.respond(send, *self.oauth_token(params))
+            return
+        if not path.startswith('/api/'):
+            await self.respond(send, 404, {'error': 'not found'})
+            return
+        if not self.authorized(params, headers):
+            await self.respond(send, 401, {'error': 'invalid_grant',
+                                           'error_description': 'The access token provided is invalid.'})
+            return
+
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if match and route_method == method:
+                kwargs = match.groupdict()
+                ext = kwargs.pop('ext')
+                try:
+                    result = handler(params, ext, **kwargs)
+                except HTTPError as exc:
+                    await self.respond(send, exc.status, {'code': exc.status, 'message': exc.message})
+                    return
+                except (TypeError, ValueError) as exc:
+                    await self.respond(send, 400, {'code': 400, 'message': str(exc)})
+                    return
+                await self.respond(send, 200, result, ext)
+                return
+        await self.respond(send, 404 if not any(p.match(path) for _, p, _ in self.routes) else 405,
+                           {'error': 'no route for {} {}'.format(method, path)})
+
+    async def respond(self, send, status, data, ext='json'):
+        content_type = EXPORT_CONTENT_TYPES.get(ext, 'application/json')
+        if isinstance(data, ExportBody):
+            await send({'type': 'http.response.start', 'status': status,
+                        'headers': [(b'content-type', content_type.encode()),
+                                    (b'content-length', str(data.size).encode())]})
+            for chunk in data:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        if isinstance(data, str) and ext not in ('json', 'xml'):
+            body = data.encode()
+        else:
+            content_type = 'application/json'
+            body = json.dumps(data).encode()
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', content_type.encode()),
+                                (b'content-length', str(len(body)).encode())]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+class Params(dict):
+    """
+        query string, form and JSON parameters: the last value of each name,
+        all of them in `lists`
+    """
+
+    def __init__(self, query=''):
+        super().__init__()
+        self.lists = {}
+        self.update(query)
+
+    def update(self, query):
+        for name, value in urllib.parse.parse_qsl(query, keep_blank_values=True):
+            self.lists.setdefault(name, []).append(value)
+            self[name] = value
+
+    def update_json(self, data):
+        for name, value in data.items():
+            self.lists[name] = value if isinstance(value, list) else [value]
+            self[name] = value
+
+
+class ExportBody(object):
+    """
+        body of a binary export, sent in chunks
+    """
+    CHUNK = 64 * 1024
+
+    def __init__(self, size):
+        self.size = size
+
+    def __iter__(self):
+        chunk = b'%PDF' + b'x' * (self.CHUNK - 4)
+        sent = 0
+        while sent < self.size:
+            yield chunk[:self.size - sent]
+            sent += len(chunk)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='fake Wallabag server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--entries', type=int, default=0, help='number of entries stored at start')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to each response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of the requests failing with 503')
+    args = parser.parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:  # optional, pip install uvicorn
+        raise SystemExit("uvicorn is not installed, pip install uvicorn")
+    app = FakeWallabag(latency=args.latency, error_rate=args.error_rate)
+    app.populate(args.entries)
+    print('token: {}'.format(FakeWallabag.TOKEN))
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
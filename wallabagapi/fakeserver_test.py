@@ -0,0 +1,96 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the fake Wallabag server
+"""
+
+import io
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.fakeserver import FakeWallabag
+from wallabagapi.retry import RetryPolicy
+
+
+class TestFakeWallabag(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    async def asyncSetUp(self):
+        self.app = FakeWallabag(export_size=100000, seed=1)
+        self.app.populate(25, tags=('news', 'python'))
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app))
+        self.w = WallabagAPI(host=self.host, token=FakeWallabag.TOKEN, client=self.client, raise_errors=True,
+                             retry=RetryPolicy(backoff=0, jitter=False))
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_oauth(self):
+        w = WallabagAPI(host=self.host, client_id='client', client_secret='secret',
+                        username='wallabag', password='wallabag', client=self.client, raise_errors=True)
+        self.assertEqual(await w.get_version(), '2.4.2')
+        self.assertTrue(w.refresh_token)
+        w.token_expires_at = 0
+        await w.get_version()
+        self.assertEqual(w.stats['token_renewals'], 2)
+        w = WallabagAPI(host=self.host, token='wrong', client=self.client, raise_errors=True)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await w.get_version()
+
+    async def test_entries(self):
+        page = await self.w.get_entries(perPage=10, page=2, tags=['python'])
+        self.assertEqual((page['total'], page['pages'], len(page['_embedded']['items'])), (12, 2, 2))
+        entries = [entry async for entry in self.w.iter_entries(perPage=7, sort='updated', order='asc')]
+        self.assertEqual([entry['id'] for entry in entries], list(range(1, 26)))
+        since = self.app.entries[20]['updated_at']
+        page = await self.w.get_entries(since=since, detail='metadata')
+        self.assertEqual(sorted(entry['id'] for entry in page['_embedded']['items']), [21, 22, 23, 24, 25])
+        self.assertIsNone(page['_embedded']['items'][0]['content'])
+
+    async def test_entry_lifecycle(self):
+        entry = await self.w.post_entries('https://example.org/new', title='New', tags=['a', 'b'])
+        self.assertEqual([tag['label'] for tag in entry['tags']], ['a', 'b'])
+        self.assertEqual(await self.w.entries_exists('https://example.org/new', return_id=True),
+                         {'exists': entry['id']})
+        self.assertEqual(await self.w.entries_exists(urls=['https://example.org/new', 'https://nope']),
+                         {'https://example.org/new': True, 'https://nope': False})
+        entry = await self.w.patch_entries(entry['id'], title='Renamed', archive=1)
+        self.assertEqual((entry['title'], entry['is_archived']), ('Renamed', 1))
+        tag = entry['tags'][0]
+        entry = await self.w.delete_entry_tag(entry['id'], tag['id'])
+        self.assertEqual([t['label'] for t in entry['tags']], ['b'])
+        await self.w.delete_entries(entry['id'])
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.w.get_entry(entry['id'])
+
+    async def test_tags(self):
+        self.assertEqual([tag['label'] for tag in await self.w.get_tags()], ['news', 'python'])
+        await self.w.post_entry_tags(1, ['later'])
+        self.assertEqual([t['label'] for t in await self.w.get_entry_tags(1)], ['news', 'later'])
+        await self.w.delete_tag_label('news')
+        self.assertEqual([tag['label'] for tag in await self.w.get_tags()], ['python', 'later'])
+
+    async def test_annotations(self):
+        annotation = await self.w.post_annotations(1, text='note', quote='lorem')
+        self.assertEqual((await self.w.get_annotations(1))['total'], 1)
+        await self.w.delete_annotations(annotation['id'])
+        self.assertEqual((await self.w.get_annotations(1))['rows'], [])
+
+    async def test_export(self):
+        f = io.BytesIO()
+        self.assertEqual(await self.w.export_entry_to(1, f, format='epub'), 100000)
+        self.assertTrue((await self.w.get_entry_export(1, format='txt')).startswith('Article 0'))
+
+    async def test_error_injection(self):
+        self.app.error_rate = 0.5
+        for _ in range(10):
+            self.assertEqual(await self.w.get_version(), '2.4.2')
+        self.assertGreater(self.w.stats['retries'], 0)
+        self.assertEqual(self.app.requests[('GET', '/api/version')], self.w.stats['requests'])
+
+
+if __name__ == '__main__':
+    unittest.main()
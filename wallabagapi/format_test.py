@@ -0,0 +1,62 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the formats and JSON backends, without Wallabag server
+"""
+
+import json
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi import jsonlib
+from wallabagapi.core import WallabagAPI
+
+
+class TestJsonBackends(unittest.TestCase):
+
+    def test_get_loads(self):
+        self.assertIs(jsonlib.get_loads('json'), json.loads)
+        self.assertIs(jsonlib.get_loads(len), len)
+        with self.assertRaises(ValueError):
+            jsonlib.get_loads('yaml')
+        expected = 'json' if jsonlib.orjson is None else 'orjson'
+        self.assertEqual(jsonlib.get_loads().__module__.split('.')[0], expected)
+
+
+class TestFormats(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    def handler(self, request):
+        self.paths.append(request.url.path)
+        if request.url.path.endswith('.txt'):
+            return httpx.Response(200, text='some text')
+        if request.url.path.endswith('.pdf'):
+            return httpx.Response(200, headers={'Content-Type': 'application/pdf'}, content=b'%PDF')
+        return httpx.Response(200, json={'id': 1})
+
+    async def asyncSetUp(self):
+        self.paths = []
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        self.w = WallabagAPI(host=self.host, token='abc', client=client, json_backend='json')
+
+    async def asyncTearDown(self):
+        await self.w.client.aclose()
+
+    async def test_format_per_call(self):
+        self.assertEqual(await self.w.get_entry(1), {'id': 1})
+        self.assertEqual(await self.w.get_entry_export(1, format='pdf'), b'%PDF')
+        self.assertEqual(await self.w.get_entry_export(1, format='txt'), 'some text')
+        self.assertEqual(await self.w.get_version(), {'id': 1})
+        self.assertEqual(self.paths, ['/api/entries/1.json', '/api/entries/1/export.pdf',
+                                      '/api/entries/1/export.txt', '/api/version.json'])
+
+    async def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            await self.w.get_tags(format='doc')
+        self.assertEqual(self.paths, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
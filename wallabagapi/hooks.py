@@ -0,0 +1,217 @@
+# coding: utf-8
+"""
+   Wallabag API - instrumentation hooks of the queries
+"""
+
+import collections
+import math
+import re
+import time
+
+__author__ = 'foxmask'
+
+__all__ = ['RequestEvent', 'LatencyHistogram', 'OpenTelemetryHook', 'PrometheusHook', 'endpoint_template']
+
+# (pattern, template) tried in order on the path without its extension
+ROUTES = [
+    (re.compile(r'^/api/entries/\d+/tags/[^/]+$'), '/api/entries/{entry}/tags/{tag}'),
+    (re.compile(r'^/api/entries/\d+/export$'), '/api/entries/{entry}/export'),
+    (re.compile(r'^/api/entries/\d+/(tags|reload)$'), r'/api/entries/{entry}/\1'),
+    (re.compile(r'^/api/entries/\d+$'), '/api/entries/{entry}'),
+    (re.compile(r'^/api/annotations/\d+$'), '/api/annotations/{id}'),
+    (re.compile(r'^/api/tags/(?!label$)[^/]+$'), '/api/tags/{tag}'),
+]
+EXTENSION = re.compile(r'\.(xml|json|txt|csv|pdf|epub|mobi|html)$')
+
+
+def endpoint_template(path):
+    """
+    template of a path, to group the events of the same endpoint
+    :param path: like /api/entries/12/tags/3.json
+    :return string like /api/entries/{entry}/tags/{tag}
+    """
+    path = EXTENSION.sub('', path)
+    for pattern, template in ROUTES:
+        if pattern.match(path):
+            return pattern.sub(template, path)
+    return path
+
+
+class RequestEvent(object):
+    """
+        what happened during one query, given to the hooks once it is
+        over.
+
+        `timings` holds the seconds spent in 'connect' (DNS resolution
+        included, httpcore does not tell them apart), 'tls' and 'ttfb'
+        (until the headers of the response) by the last attempt. They
+        are missing when a pooled connection is reused, or when the
+        transport does not trace its requests.
+    """
+    __slots__ = ('method', 'path', 'endpoint', 'status', 'bytes', 'retries', 'cache', 'timings',
+                 'total', 'error', 'started')
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint_template(path)
+        self.status = None
+        self.bytes = 0
+        self.retries = 0
+        # 'hit', 'revalidated', 'miss' when the query goes through the cache
+        self.cache = None
+        self.timings = {}
+        self.total = 0.0
+        self.error = None
+        self.started = time.perf_counter()
+
+    def trace(self):
+        """
+        httpcore trace extension of an attempt, filling `timings`
+        :return coroutine function
+        """
+        self.timings = timings = {}
+        started = {}
+        sent = time.perf_counter()
+
+        async def trace(name, info):
+            now = time.perf_counter()
+            step, _, state = name.rpartition('.')
+            if state == 'started':
+                started[step] = now
+            elif state == 'complete':
+                if step in ('connection.connect_tcp', 'connection.connect_unix_socket'):
+                    timings['connect'] = now - started.get(step, sent)
+                elif step == 'connection.start_tls':
+                    timings['tls'] = now - started.get(step, sent)
+                elif step.endswith('.receive_response_headers'):
+                    timings['ttfb'] = now - sent
+        return trace
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__ if name != 'started'}
+
+    def __repr__(self):
+        return '<RequestEvent {method} {endpoint} {status} {total:.3f}s>'.format(
+            method=self.method.upper(), endpoint=self.endpoint, status=self.status, total=self.total)
+
+
+class LatencyHistogram(object):
+    """
+        hook aggregating the durations per method and endpoint in
+        logarithmic buckets (5% wide), so that the memory does not grow
+        with the number of queries
+
+        >>> histogram = LatencyHistogram()
+        >>> wall.add_hook(histogram)
+        >>> histogram.summary()
+    """
+    GROWTH = 1.05
+    MIN = 1e-4
+
+    def __init__(self):
+        self._buckets = collections.defaultdict(collections.Counter)
+        self.counts = collections.Counter()
+        self.errors = collections.Counter()
+
+    def _bucket(self, seconds):
+        if seconds <= self.MIN:
+            return 0
+        return int(math.log(seconds / self.MIN, self.GROWTH)) + 1
+
+    def _bound(self, bucket):
+        # upper bound of a bucket
+        return self.MIN * self.GROWTH ** bucket
+
+    def __call__(self, event):
+        key = (event.method.upper(), event.endpoint)
+        self._buckets[key][self._bucket(event.total)] += 1
+        self.counts[key] += 1
+        if event.error is not None or (event.status or 0) >= 400:
+            self.errors[key] += 1
+
+    def percentile(self, key, q):
+        """
+        :param key: tuple (METHOD, endpoint)
+        :param q: float between 0 and 100
+        :return seconds, within 5%, or None without any query
+        """
+        buckets = self._buckets.get(key)
+        if not buckets:
+            return None
+        rank = q / 100 * sum(buckets.values())
+        seen = 0
+        for bucket, count in sorted(buckets.items()):
+            seen += count
+            if seen >= rank:
+                break
+        return self._bound(bucket)
+
+    def summary(self):
+        """
+        :return dict {'METHOD endpoint': {'count', 'errors', 'p50', 'p95', 'p99'}}
+        """
+        return {'{} {}'.format(*key): {'count': self.counts[key],
+                                       'errors': self.errors[key],
+                                       'p50': self.percentile(key, 50),
+                                       'p95': self.percentile(key, 95),
+                                       'p99': self.percentile(key, 99)}
+                for key in sorted(self._buckets)}
+
+    def reset(self):
+        self._buckets.clear()
+        self.counts.clear()
+        self.errors.clear()
+
+
+class OpenTelemetryHook(object):
+    """
+        hook recording the durations in an OpenTelemetry histogram,
+        requires opentelemetry-api
+    """
+
+    def __init__(self, meter=None, name='wallabag.client.duration'):
+        """
+        :param meter: opentelemetry Meter, the global one by default
+        :param name: name of the histogram
+        """
+        if meter is None:
+            try:
+                from opentelemetry import metrics
+            except ImportError:  # optional, pip install opentelemetry-api
+                raise ImportError("opentelemetry is not installed, pip install opentelemetry-api")
+            meter = metrics.get_meter('wallabagapi')
+        self.histogram = meter.create_histogram(name, unit='s', description='duration of the Wallabag queries')
+
+    def __call__(self, event):
+        attributes = {'http.request.method': event.method.upper(), 'http.route': event.endpoint}
+        if event.status is not None:
+            attributes['http.response.status_code'] = event.status
+        if event.cache is not None:
+            attributes['wallabag.cache'] = event.cache
+        self.histogram.record(event.total, attributes=attributes)
+
+
+class PrometheusHook(object):
+    """
+        hook recording the durations in a Prometheus histogram,
+        requires prometheus_client
+    """
+
+    def __init__(self, registry=None, name='wallabag_request_duration_seconds'):
+        """
+        :param registry: prometheus_client CollectorRegistry, the default
+            one when None
+        :param name: name of the histogram
+        """
+        try:
+            import prometheus_client
+        except ImportError:  # optional, pip install prometheus_client
+            raise ImportError("prometheus_client is not installed, pip install prometheus_client")
+        kwargs = {} if registry is None else {'registry': registry}
+        self.histogram = prometheus_client.Histogram(name, 'duration of the Wallabag queries',
+                                                     ['method', 'endpoint', 'status'], **kwargs)
+
+    def __call__(self, event):
+        status = 'error' if event.status is None and event.error is not None else str(event.status or '')
+        self.histogram.labels(event.method.upper(), event.endpoint, status).observe(event.total)
@@ -0,0 +1,142 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the instrumentation hooks, without Wallabag server
+"""
+
+import http.server
+import threading
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.cache import MemoryCache
+from wallabagapi.core import WallabagAPI
+from wallabagapi.hooks import LatencyHistogram, RequestEvent, endpoint_template
+from wallabagapi.retry import RetryPolicy
+
+
+class TestTemplates(unittest.TestCase):
+
+    def test_endpoint_template(self):
+        self.assertEqual(endpoint_template('/api/entries.json'), '/api/entries')
+        self.assertEqual(endpoint_template('/api/entries/12.json'), '/api/entries/{entry}')
+        self.assertEqual(endpoint_template('/api/entries/12/tags.json'), '/api/entries/{entry}/tags')
+        self.assertEqual(endpoint_template('/api/entries/12/tags/3.json'), '/api/entries/{entry}/tags/{tag}')
+        self.assertEqual(endpoint_template('/api/entries/12/export.epub'), '/api/entries/{entry}/export')
+        self.assertEqual(endpoint_template('/api/entries/exists.json'), '/api/entries/exists')
+        self.assertEqual(endpoint_template('/api/tags/foo.json'), '/api/tags/{tag}')
+        self.assertEqual(endpoint_template('/api/tags/label.json'), '/api/tags/label')
+        self.assertEqual(endpoint_template('/api/annotations/4.json'), '/api/annotations/{id}')
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            event = RequestEvent('get', '/api/entries/{}.json'.format(ms))
+            event.status = 200 if ms != 100 else 500
+            event.total = ms / 1000
+            histogram(event)
+        summary = histogram.summary()['GET /api/entries/{entry}']
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['errors'], 1)
+        self.assertAlmostEqual(summary['p50'], 0.050, delta=0.050 * 0.05)
+        self.assertAlmostEqual(summary['p95'], 0.095, delta=0.095 * 0.05)
+        self.assertAlmostEqual(summary['p99'], 0.099, delta=0.099 * 0.05)
+        self.assertIsNone(histogram.percentile(('GET', '/api/tags'), 50))
+
+
+class TestHooks(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    def handler(self, request):
+        self.received += 1
+        if request.url.path == '/api/entries/2.json' and self.received == 1:
+            return httpx.Response(503)
+        if request.url.path == '/api/entries/404.json':
+            return httpx.Response(404)
+        return httpx.Response(200, json={'id': 1})
+
+    async def asyncSetUp(self):
+        self.received = 0
+        self.events = []
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        self.w = WallabagAPI(host=self.host, token='abc', client=client, cache=MemoryCache(),
+                             retry=RetryPolicy(backoff=0, jitter=False), hooks=[self.events.append])
+
+    async def asyncTearDown(self):
+        await self.w.client.aclose()
+
+    async def test_events(self):
+        await self.w.get_entry(2)
+        await self.w.get_entry(2)
+        await self.w.get_entry(404)
+        await self.w.patch_entries(2, title='x')
+        first, hit, missing, patch = self.events
+        self.assertEqual((first.method, first.endpoint, first.status), ('get', '/api/entries/{entry}', 200))
+        self.assertEqual(first.retries, 1)
+        self.assertEqual(first.cache, 'miss')
+        self.assertEqual(first.bytes, len(b'{"id":1}'))
+        self.assertEqual(hit.cache, 'hit')
+        self.assertIsNone(hit.status)
+        self.assertEqual(missing.status, 404)
+        self.assertEqual((patch.method, patch.cache), ('patch', None))
+        self.assertTrue(all(event.total >= 0 for event in self.events))
+
+    async def test_broken_hook_and_removal(self):
+        def broken(event):
+            raise RuntimeError('broken')
+        self.w.add_hook(broken)
+        with self.assertLogs(level='ERROR'):
+            self.assertEqual(await self.w.get_entry(1), {'id': 1})
+        self.w.remove_hook(broken)
+        self.w.remove_hook(self.events.append)
+        await self.w.get_entry(3)
+        self.assertEqual(len(self.events), 1)
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"id": 1}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTimings(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    async def test_trace(self):
+        histogram = LatencyHistogram()
+        events = []
+        host = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+        async with WallabagAPI(host=host, token='abc', hooks=[histogram, events.append]) as w:
+            await w.get_entry(1)
+            await w.get_entry(2)
+        self.assertIn('connect', events[0].timings)
+        self.assertIn('ttfb', events[0].timings)
+        # the connection of the first query is reused
+        self.assertNotIn('connect', events[1].timings)
+        self.assertLessEqual(events[1].timings['ttfb'], events[1].total)
+        self.assertEqual(histogram.summary()['GET /api/entries/{entry}']['count'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
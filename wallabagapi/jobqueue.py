@@ -0,0 +1,288 @@
+# coding: utf-8
+"""
+   Wallabag API - durable queue of the changes to send to Wallabag
+"""
+
+import asyncio
+import collections
+import json
+import sqlite3
+
+from wallabagapi.bulk import BulkJob
+from wallabagapi.lazy import lazy_import
+from wallabagapi.urlindex import normalize_url
+
+__author__ = 'foxmask'
+
+httpx = lazy_import('httpx')
+
+__all__ = ['WriteQueue']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT,
+    key TEXT,
+    params TEXT,
+    state TEXT DEFAULT 'pending',
+    attempts INTEGER DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, seq);
+"""
+
+KINDS = ('create', 'patch', 'delete', 'add_tags', 'remove_tag')
+
+
+class WriteQueue(object):
+    """
+        Changes to send to Wallabag, written in SQLite before being sent,
+        so that a job stopped in the middle, even killed, resumes where
+        it stopped.
+
+        The jobs of the same entry (or of the same url for the creations)
+        are sent one after the other, in the order they were queued; the
+        others at most `concurrency` at once. A job maybe sent before the
+        stop is sent again: the creations first check whether the url
+        exists, a deletion of a missing entry or tag is done, the other
+        changes give the same result twice.
+
+        >>> queue = WriteQueue(wall, 'changes.db')
+        >>> queue.create('https://example.com/', tags=['later'])
+        >>> queue.patch(12, archive=1)
+        >>> await queue.run()
+    """
+
+    def __init__(self, wallabag, path='wallabag-queue.db', concurrency=8, batch_size=500, flush_every=200):
+        """
+        :param wallabag: WallabagAPI instance
+        :param path: path of the SQLite database of the jobs
+        :param concurrency: int max number of queries at once
+        :param batch_size: int jobs read from the database at once
+        :param flush_every: int results kept in memory before being
+            written, at most this number of jobs are sent again after a
+            crash
+        """
+        self.wallabag = wallabag
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.flush_every = flush_every
+        self.db = sqlite3.connect(path)
+        # a killed process loses nothing with WAL, only a power cut may
+        # lose the last jobs queued
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    # QUEUEING
+    def put(self, kind, **params):
+        """
+        queue one job
+        :param kind: 'create' (url and the fields of post_entries), 'patch'
+            (entry and the fields of patch_entries), 'delete' (entry),
+            'add_tags' (entry, tags list) or 'remove_tag' (entry, tag ID)
+        :param params: the parameters of the job
+        :return int number of the job
+        """
+        return self.put_many([(kind, params)])[0]
+
+    def put_many(self, jobs):
+        """
+        queue many jobs in one transaction
+        :param jobs: iterable of (kind, params dict), see put()
+        :return list of the numbers of the jobs
+        """
+        rows = []
+        for kind, params in jobs:
+            if kind not in KINDS:
+                raise ValueError('job expected: {}'.format(', '.join(KINDS)))
+            key = 'url:' + normalize_url(params['url']) if kind == 'create' else 'entry:{}'.format(params['entry'])
+            rows.append((kind, key, json.dumps(params)))
+        with self.db:
+            # the write lock before reading the last number: sqlite3 would
+            # only begin the transaction with the INSERT, and another
+            # process could queue jobs in between
+            self.db.execute("BEGIN IMMEDIATE")
+            row = self.db.execute("SELECT seq FROM sqlite_sequence WHERE name = 'jobs'").fetchone()
+            last = row[0] if row else 0
+            self.db.executemany("INSERT INTO jobs (kind, key, params) VALUES (?, ?, ?)", rows)
+        return list(range(last + 1, last + 1 + len(rows)))
+
+    def create(self, url, **fields):
+        return self.put('create', url=url, **fields)
+
+    def patch(self, entry, **fields):
+        return self.put('patch', entry=entry, **fields)
+
+    def delete(self, entry):
+        return self.put('delete', entry=entry)
+
+    def add_tags(self, entry, tags):
+        return self.put('add_tags', entry=entry, tags=list(tags))
+
+    def remove_tag(self, entry, tag):
+        return self.put('remove_tag', entry=entry, tag=tag)
+
+    # STATE
+    def counts(self):
+        """
+        :return dict number of jobs 'pending', 'done' and 'failed'
+        """
+        counts = dict.fromkeys(('pending', 'done', 'failed'), 0)
+        counts.update(self.db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+        return counts
+
+    def failures(self):
+        """
+        :return list of dicts of the failed jobs: 'seq', 'kind', 'params', 'error'
+        """
+        return [{'seq': seq, 'kind': kind, 'params': json.loads(params), 'error': error}
+                for seq, kind, params, error in self.db.execute(
+                    "SELECT seq, kind, params, error FROM jobs WHERE state = 'failed' ORDER BY seq")]
+
+    def result(self, seq):
+        """
+        :param seq: int number of a job
+        :return tuple (state, result): the result is the ID of the entry
+            of a 'create' when it is done, None otherwise
+        """
+        row = self.db.execute("SELECT state, result FROM jobs WHERE seq = ?", (seq,)).fetchone()
+        if row is None:
+            raise KeyError(seq)
+        return row[0], json.loads(row[1]) if row[1] else None
+
+    def retry_failed(self):
+        """
+        queue the failed jobs again
+        :return int number of jobs
+        """
+        with self.db:
+            return self.db.execute("UPDATE jobs SET state = 'pending', error = NULL WHERE state = 'failed'").rowcount
+
+    def purge(self):
+        """
+        forget the jobs done
+        :return int number of jobs removed
+        """
+        with self.db:
+            return self.db.execute("DELETE FROM jobs WHERE state = 'done'").rowcount
+
+    # SENDING
+    async def _execute(self, job):
+        """
+        send one job
+        :return tuple (state, result, error), state being 'done', 'failed',
+            or 'pending' when it should be sent again later
+        """
+        kind, params, attempts = job[1], json.loads(job[3]), job[4]
+        try:
+            if kind == 'create' and attempts:
+                # maybe created before the stop
+                found = await self.wallabag.entries_exists(url=params['url'], return_id=True, format='json')
+                if isinstance(found, dict) and found.get('exists'):
+                    return 'done', found['exists'], None
+            data = await self.wallabag._write_job(kind, params)
+        except httpx.HTTPStatusError as exc:
+            status = exc.response.status_code
+            if status == 404 and kind in ('delete', 'remove_tag'):
+                return 'done', None, None
+            if status in BulkJob.RETRYABLE_STATUSES:
+                return 'pending', None, str(exc)
+            return 'failed', None, str(exc)
+        except httpx.RequestError as exc:
+            return 'pending', None, str(exc)
+        return 'done', data.get('id') if kind == 'create' and isinstance(data, dict) else None, None
+
+    def _load(self, after):
+        """
+        read the next pending jobs, and count an attempt for each of them
+        """
+        jobs = self.db.execute("SELECT seq, kind, key, params, attempts FROM jobs "
+                               "WHERE state = 'pending' AND seq > ? ORDER BY seq LIMIT ?",
+                               (after, self.batch_size)).fetchall()
+        with self.db:
+            self.db.executemany("UPDATE jobs SET attempts = attempts + 1 WHERE seq = ?", [(job[0],) for job in jobs])
+        return jobs
+
+    def _flush(self, results):
+        with self.db:
+            self.db.executemany("UPDATE jobs SET state = ?, result = ?, error = ? WHERE seq = ?",
+                                [(state, json.dumps(result) if result is not None else None, error, seq)
+                                 for seq, state, result, error in results])
+        results.clear()
+
+    async def run(self):
+        """
+        send the pending jobs
+
+        A job failing because of the network or of a retryable status
+        (429, 5xx) stays pending, and the next jobs of its entry wait for
+        the next run. A job refused by Wallabag (4xx) is failed, see
+        failures() and retry_failed().
+
+        :return dict number of jobs 'done', 'failed' and 'deferred' (still
+            pending) by this run
+        """
+        summary = collections.Counter(done=0, failed=0, deferred=0)
+        ready = collections.deque()
+        # key -> jobs waiting for the one of the same key in flight
+        waiting = {}
+        busy, blocked = set(), set()
+        tasks = {}
+        results = []
+        last = 0
+        exhausted = False
+        try:
+            while True:
+                while len(tasks) < self.concurrency:
+                    if ready:
+                        job = ready.popleft()
+                        tasks[asyncio.ensure_future(self._execute(job))] = job
+                        continue
+                    if exhausted or sum(len(jobs) for jobs in waiting.values()) >= self.batch_size:
+                        break
+                    jobs = self._load(last)
+                    if not jobs:
+                        exhausted = True
+                        break
+                    last = jobs[-1][0]
+                    for job in jobs:
+                        key = job[2]
+                        if key in blocked:
+                            summary['deferred'] += 1
+                        elif key in busy:
+                            waiting.setdefault(key, collections.deque()).append(job)
+                        else:
+                            busy.add(key)
+                            ready.append(job)
+                if not tasks:
+                    break
+
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    job = tasks.pop(task)
+                    seq, key = job[0], job[2]
+                    state, result, error = task.result()
+                    results.append((seq, state, result, error))
+                    summary['deferred' if state == 'pending' else state] += 1
+                    if state == 'pending':
+                        # keep the order of the jobs of this key
+                        blocked.add(key)
+                        summary['deferred'] += len(waiting.pop(key, ()))
+                        busy.discard(key)
+                    elif waiting.get(key):
+                        ready.append(waiting[key].popleft())
+                    else:
+                        waiting.pop(key, None)
+                        busy.discard(key)
+                if len(results) >= self.flush_every:
+                    self._flush(results)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._flush(results)
+        return dict(summary)
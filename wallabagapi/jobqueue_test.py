@@ -0,0 +1,145 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the durable queue of changes, without Wallabag server
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.fakeserver import FakeWallabag
+from wallabagapi.jobqueue import WriteQueue
+from wallabagapi.retry import RetryPolicy
+
+
+class TestWriteQueue(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'queue.db')
+        self.app = FakeWallabag()
+        self.app.populate(10)
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app))
+        self.w = WallabagAPI(host=self.host, token=FakeWallabag.TOKEN, client=self.client,
+                             retry=RetryPolicy(max_retries=0))
+        self.queue = WriteQueue(self.w, self.path, concurrency=4)
+
+    async def asyncTearDown(self):
+        self.queue.close()
+        await self.client.aclose()
+        self.directory.cleanup()
+
+    async def test_run(self):
+        created = self.queue.create('https://new.example/', tags=['later'])
+        for title in ('first', 'second', 'third'):
+            self.queue.patch(1, title=title)
+        self.queue.add_tags(2, ['read'])
+        self.queue.remove_tag(3, 1)
+        self.queue.delete(4)
+        self.queue.delete(404)
+        refused = self.queue.patch(404, title='missing')
+        self.assertEqual(created, 1)
+        self.assertEqual(self.queue.put_many([('patch', {'entry': 6, 'starred': 1})] * 2), [10, 11])
+        with self.assertRaises(ValueError):
+            self.queue.put('publish', entry=1)
+
+        self.assertEqual(await self.queue.run(), {'done': 10, 'failed': 1, 'deferred': 0})
+        self.assertEqual(self.queue.counts(), {'pending': 0, 'done': 10, 'failed': 1})
+        self.assertEqual(self.queue.result(created), ('done', 11))
+        self.assertEqual(self.queue.failures()[0]['seq'], refused)
+        self.assertEqual(self.app.entries[1]['title'], 'third')
+        self.assertEqual([tag['label'] for tag in self.app.entries[2]['tags']], ['python', 'read'])
+        self.assertNotIn(4, self.app.entries)
+        self.assertEqual(self.app.entries[6]['is_starred'], 1)
+
+        self.assertEqual(await self.queue.run(), {'done': 0, 'failed': 0, 'deferred': 0})
+        self.assertEqual(self.queue.retry_failed(), 1)
+        self.assertEqual(self.queue.purge(), 10)
+        self.assertEqual(self.queue.patch(7, starred=1), 12)
+
+    async def test_writers(self):
+        # processes queueing into the same file get the numbers of their jobs
+        def put(writer):
+            queue = WriteQueue(self.w, self.path)
+            numbers = {}
+            for batch in range(100):
+                jobs = [('patch', {'entry': writer, 'title': '{}-{}'.format(batch, job)}) for job in range(5)]
+                numbers.update(zip(queue.put_many(jobs), (params['title'] for _, params in jobs)))
+            queue.close()
+            return writer, numbers
+
+        with ThreadPoolExecutor(4) as executor:
+            written = list(executor.map(put, range(4)))
+        rows = {seq: (json.loads(params)['entry'], json.loads(params)['title'])
+                for seq, params in self.queue.db.execute("SELECT seq, params FROM jobs")}
+        self.assertEqual(len(rows), 2000)
+        self.assertEqual({seq: (writer, title) for writer, numbers in written for seq, title in numbers.items()},
+                         rows)
+
+    async def test_order_per_entry(self):
+        sent = []
+
+        async def handler(request):
+            entry = int(request.url.path.split('/')[3].split('.')[0])
+            sent.append((entry, dict(httpx.QueryParams(request.content.decode()))['title']))
+            # the first entries answer the slowest
+            await asyncio.sleep(0.01 * (3 - entry))
+            return httpx.Response(200, json={'id': entry})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            self.queue.wallabag = WallabagAPI(host=self.host, token='abc', client=client)
+            self.queue.put_many(('patch', {'entry': entry, 'title': str(n)}) for n in range(5) for entry in (1, 2))
+            self.assertEqual(await self.queue.run(), {'done': 10, 'failed': 0, 'deferred': 0})
+        for entry in (1, 2):
+            self.assertEqual([title for sent_entry, title in sent if sent_entry == entry], list('01234'))
+        # both entries were sent at the same time
+        self.assertNotEqual([entry for entry, _ in sent], [1] * 5 + [2] * 5)
+
+    async def test_transient_errors(self):
+        self.queue.patch(1, title='first')
+        self.queue.patch(1, title='second')
+        self.queue.patch(2, title='other')
+        self.app.error_rate = 1
+        self.app.error_statuses = (503,)
+        self.assertEqual(await self.queue.run(), {'done': 0, 'failed': 0, 'deferred': 3})
+        self.app.error_rate = 0
+        self.assertEqual(await self.queue.run(), {'done': 3, 'failed': 0, 'deferred': 0})
+        self.assertEqual(self.app.entries[1]['title'], 'second')
+
+    async def test_resume(self):
+        self.app.latency = 0.01
+        self.queue.put_many(('create', {'url': 'https://new.example/{}'.format(n)}) for n in range(40))
+        task = asyncio.ensure_future(self.queue.run())
+        await asyncio.sleep(0.05)
+        # stopped in the middle, as if the process was killed
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        created = len(self.app.entries) - 10
+        self.assertTrue(0 < created < 40)
+        # the results received before the stop were written
+        finished = self.queue.counts()['done']
+        self.assertGreater(finished, 0)
+
+        self.queue.close()
+        self.queue = WriteQueue(self.w, self.path, concurrency=4)
+        self.app.requests.clear()
+        self.assertEqual(await self.queue.run(), {'done': 40 - finished, 'failed': 0, 'deferred': 0})
+        self.assertEqual(self.queue.counts(), {'pending': 0, 'done': 40, 'failed': 0})
+        self.assertEqual(len(self.app.entries), 50)
+        # the creations maybe sent before the stop were checked first
+        self.assertGreater(self.app.requests[('GET', '/api/entries/exists')], 0)
+        self.assertEqual(self.app.requests[('POST', '/api/entries')], 40 - created)
+
+
+if __name__ == '__main__':
+    unittest.main()
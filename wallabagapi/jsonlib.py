@@ -0,0 +1,35 @@
+# coding: utf-8
+"""
+   Wallabag API - JSON decoding backends
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional, pip install wallabag_api[fast]
+    orjson = None
+
+__author__ = 'foxmask'
+
+__all__ = ['get_loads']
+
+
+def get_loads(backend='auto'):
+    """
+    function decoding the JSON responses
+    :param backend: 'auto' (orjson when it is installed, json otherwise),
+        'orjson', 'json', or a function taking bytes
+    :return function
+    """
+    if callable(backend):
+        return backend
+    if backend == 'auto':
+        backend = 'json' if orjson is None else 'orjson'
+    if backend == 'orjson':
+        if orjson is None:
+            raise ImportError("orjson is not installed, pip install orjson")
+        return orjson.loads
+    if backend == 'json':
+        return json.loads
+    raise ValueError("json backend expected: auto, orjson, json")
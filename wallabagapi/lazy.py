@@ -0,0 +1,30 @@
+# coding: utf-8
+"""
+   Wallabag API - modules imported on first use
+"""
+
+import importlib.util
+import sys
+
+__author__ = 'foxmask'
+
+__all__ = ['lazy_import']
+
+
+def lazy_import(name):
+    """
+    module executed on the first access to one of its attributes, so that
+    importing wallabagapi stays fast when the module is not used
+    :param name: name of the module, like 'httpx'
+    :return module
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError("No module named {!r}".format(name), name=name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
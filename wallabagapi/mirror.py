@@ -0,0 +1,214 @@
+# coding: utf-8
+"""
+   Wallabag API - local SQLite mirror of the entries
+"""
+
+import json
+import sqlite3
+
+from wallabagapi.changes import UpdatedEntries, deleted_ids, parse_date
+
+__author__ = 'foxmask'
+
+__all__ = ['Mirror', 'parse_date']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    url TEXT,
+    given_url TEXT,
+    origin_url TEXT,
+    title TEXT,
+    is_archived INTEGER,
+    is_starred INTEGER,
+    updated_at REAL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_url ON entries (url);
+CREATE INDEX IF NOT EXISTS entries_given_url ON entries (given_url);
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    label TEXT,
+    slug TEXT
+);
+CREATE TABLE IF NOT EXISTS entry_tags (
+    entry_id INTEGER,
+    tag_id INTEGER,
+    PRIMARY KEY (entry_id, tag_id)
+);
+CREATE INDEX IF NOT EXISTS entry_tags_tag ON entry_tags (tag_id);
+CREATE TABLE IF NOT EXISTS annotations (
+    id INTEGER PRIMARY KEY,
+    entry_id INTEGER,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS annotations_entry ON annotations (entry_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class Mirror(object):
+    """
+        Keep a local copy of the entries, their tags and annotations in a
+        SQLite database.
+
+        sync() only fetches the entries updated since the previous sync,
+        and the local read methods never query the server.
+    """
+
+    def __init__(self, wallabag, path=':memory:', per_page=100, window=4):
+        """
+        :param wallabag: WallabagAPI instance
+        :param path: path of the SQLite database
+        :param per_page: int entries per page fetched
+        :param window: int pages fetched concurrently
+        """
+        self.wallabag = wallabag
+        self.per_page = per_page
+        self.window = window
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    @property
+    def high_water_mark(self):
+        """
+        :return float timestamp of the most recent update mirrored
+        """
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'since'").fetchone()
+        return float(row[0]) if row else 0
+
+    async def sync(self, detect_deletions=True):
+        """
+        fetch the entries updated after the high water mark and store them
+
+        :param detect_deletions: bool check the number of entries of the
+            server, and look for the deleted ones only when it differs
+        :return dict number of 'updated' and 'deleted' entries
+        :raise httpx.HTTPError when a page could not be read: the entries
+            read are kept, but the high water mark does not move and
+            nothing is deleted, the next sync starts from the same point
+        """
+        updates = UpdatedEntries(self.wallabag, since=self.high_water_mark, per_page=self.per_page,
+                                 window=self.window)
+        updated = 0
+        batch = []
+        async for entry in updates:
+            batch.append(entry)
+            if len(batch) >= self.per_page:
+                updated += self._store(batch)
+                batch = []
+        if batch:
+            updated += self._store(batch)
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('since', ?)",
+                            (str(updates.high_water_mark),))
+
+        deleted = 0
+        if detect_deletions:
+            local = {row[0] for row in self.db.execute("SELECT id FROM entries")}
+            deleted = self._remove(await deleted_ids(self.wallabag, local, per_page=max(self.per_page, 500),
+                                                     window=self.window))
+        return {'updated': updated, 'deleted': deleted}
+
+    def _store(self, entries):
+        """
+        upsert a batch of entries in one transaction
+        :param entries: list of dict
+        :return int number of entries new or changed
+        """
+        known = dict(self.db.execute("SELECT id, updated_at FROM entries WHERE id IN ({})".format(
+            ', '.join('?' * len(entries))), [entry['id'] for entry in entries]))
+        stored = 0
+        with self.db:
+            for entry in entries:
+                updated_at = parse_date(entry.get('updated_at')) or 0
+                if known.get(entry['id']) == updated_at:
+                    # fetched again because of the overlap of the since filter
+                    continue
+                stored += 1
+                self.db.execute("INSERT OR REPLACE INTO entries "
+                                "(id, url, given_url, origin_url, title, is_archived, is_starred, updated_at, data) "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                (entry['id'], entry.get('url'), entry.get('given_url'), entry.get('origin_url'),
+                                 entry.get('title'), entry.get('is_archived'), entry.get('is_starred'),
+                                 updated_at, json.dumps(entry)))
+                self.db.execute("DELETE FROM entry_tags WHERE entry_id = ?", (entry['id'],))
+                for tag in entry.get('tags') or []:
+                    self.db.execute("INSERT OR REPLACE INTO tags (id, label, slug) VALUES (?, ?, ?)",
+                                    (tag['id'], tag['label'], tag['slug']))
+                    self.db.execute("INSERT OR IGNORE INTO entry_tags (entry_id, tag_id) VALUES (?, ?)",
+                                    (entry['id'], tag['id']))
+                self.db.execute("DELETE FROM annotations WHERE entry_id = ?", (entry['id'],))
+                self.db.executemany("INSERT OR REPLACE INTO annotations (id, entry_id, data) VALUES (?, ?, ?)",
+                                    [(annotation['id'], entry['id'], json.dumps(annotation))
+                                     for annotation in entry.get('annotations') or []])
+        return stored
+
+    def _remove(self, deleted):
+        """
+        :param deleted: iterable of the ids of the entries deleted on the server
+        :return int number of entries deleted locally
+        """
+        deleted = [(entry_id,) for entry_id in deleted]
+        with self.db:
+            self.db.executemany("DELETE FROM entries WHERE id = ?", deleted)
+            self.db.executemany("DELETE FROM entry_tags WHERE entry_id = ?", deleted)
+            self.db.executemany("DELETE FROM annotations WHERE entry_id = ?", deleted)
+        return len(deleted)
+
+    # LOCAL READS
+    def count(self):
+        """
+        :return int number of entries mirrored
+        """
+        return self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get_entry(self, entry):
+        """
+        :param entry: int the entry ID
+        :return dict or None
+        """
+        row = self.db.execute("SELECT data FROM entries WHERE id = ?", (entry,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_entries_by_tag(self, tag):
+        """
+        :param tag: string label or slug of the tag
+        :return list of dict
+        """
+        rows = self.db.execute("SELECT e.data FROM entries e "
+                               "JOIN entry_tags et ON et.entry_id = e.id "
+                               "JOIN tags t ON t.id = et.tag_id "
+                               "WHERE t.label = ? OR t.slug = ? ORDER BY e.id", (tag, tag))
+        return [json.loads(row[0]) for row in rows]
+
+    def get_entries_by_url(self, url):
+        """
+        :param url: string url, given url or original url of the entry
+        :return list of dict
+        """
+        rows = self.db.execute("SELECT data FROM entries WHERE url = ? OR given_url = ? OR origin_url = ? "
+                               "ORDER BY id", (url, url, url))
+        return [json.loads(row[0]) for row in rows]
+
+    def get_tags(self):
+        """
+        :return list of dict id, label, slug of the tags used by the entries
+        """
+        rows = self.db.execute("SELECT DISTINCT t.id, t.label, t.slug FROM tags t "
+                               "JOIN entry_tags et ON et.tag_id = t.id ORDER BY t.label")
+        return [{'id': row[0], 'label': row[1], 'slug': row[2]} for row in rows]
+
+    def get_annotations(self, entry):
+        """
+        :param entry: int the entry ID
+        :return list of dict
+        """
+        rows = self.db.execute("SELECT data FROM annotations WHERE entry_id = ? ORDER BY id", (entry,))
+        return [json.loads(row[0]) for row in rows]
@@ -0,0 +1,130 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the local mirror, without Wallabag server
+"""
+
+import datetime
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.mirror import Mirror, parse_date
+
+
+def date(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S%z')
+
+
+class TestMirror(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+    tag_ids = {'foo': 1, 'bar': 2}
+
+    def handler(self, request):
+        self.requests.append(request)
+        params = request.url.params
+        since = int(params.get('since', 0))
+        entries = sorted((e for e in self.library.values() if parse_date(e['updated_at']) > since),
+                         key=lambda e: (e['updated_at'], e['id']))
+        page, per_page = int(params.get('page', 1)), int(params.get('perPage', 30))
+        if (page, per_page) in self.failing:
+            self.failing.remove((page, per_page))
+            return httpx.Response(500, json={'error': 'page lost'})
+        items = entries[(page - 1) * per_page:page * per_page]
+        return httpx.Response(200, json={'page': page, 'limit': per_page, 'total': len(entries) + self.hidden,
+                                         'pages': max(1, -(-len(entries) // per_page)),
+                                         '_embedded': {'items': items}})
+
+    def save(self, entry_id, tags=()):
+        self.now += 10
+        self.library[entry_id] = {
+            'id': entry_id, 'url': 'https://example.com/{}'.format(entry_id), 'title': 'entry',
+            'is_archived': 0, 'is_starred': 0, 'updated_at': date(self.now),
+            'tags': [{'id': self.tag_ids[tag], 'label': tag, 'slug': tag} for tag in tags],
+            'annotations': [{'id': entry_id * 10, 'text': 'note', 'quote': 'q', 'ranges': []}]}
+
+    async def asyncSetUp(self):
+        self.requests = []
+        self.failing = set()
+        # entries counted in the totals but missing from the pages
+        self.hidden = 0
+        self.library = {}
+        self.now = 1600000000
+        for entry_id in range(1, 26):
+            self.save(entry_id, tags=['foo'] if entry_id % 5 == 0 else [])
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        self.w = WallabagAPI(host=self.host, token='abc', client=client)
+        self.mirror = Mirror(self.w, per_page=10)
+
+    async def asyncTearDown(self):
+        self.mirror.close()
+        await self.w.client.aclose()
+
+    async def test_full_then_incremental_sync(self):
+        self.assertEqual(await self.mirror.sync(), {'updated': 25, 'deleted': 0})
+        self.assertEqual(self.mirror.count(), 25)
+        self.assertEqual(self.mirror.high_water_mark, self.now)
+
+        self.save(3, tags=['bar'])
+        self.save(26)
+        self.requests.clear()
+        self.assertEqual(await self.mirror.sync(), {'updated': 2, 'deleted': 0})
+        # one page of changes and the count of the entries
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(self.requests[0].url.params['sort'], 'updated')
+        self.assertEqual([e['id'] for e in self.mirror.get_entries_by_tag('bar')], [3])
+
+    async def test_deletions(self):
+        await self.mirror.sync()
+        del self.library[7]
+        del self.library[8]
+        self.assertEqual(await self.mirror.sync(), {'updated': 0, 'deleted': 2})
+        self.assertIsNone(self.mirror.get_entry(7))
+        self.assertEqual(self.mirror.get_annotations(8), [])
+
+    async def test_failed_page(self):
+        self.failing = {(2, 10)}
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.mirror.sync()
+        # the entries of the first page are kept, and read again next time
+        self.assertEqual(self.mirror.count(), 10)
+        self.assertEqual(self.mirror.high_water_mark, 0)
+        self.assertEqual(await self.mirror.sync(), {'updated': 15, 'deleted': 0})
+        self.assertEqual(self.mirror.high_water_mark, self.now)
+
+    async def test_failed_listing(self):
+        for entry_id in range(26, 1201):
+            self.save(entry_id)
+        self.mirror.per_page = 500
+        await self.mirror.sync()
+        del self.library[7]
+        self.failing = {(2, 500)}
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.mirror.sync()
+        self.assertEqual(self.mirror.count(), 1200)
+        self.assertEqual(await self.mirror.sync(), {'updated': 0, 'deleted': 1})
+
+    async def test_incomplete_listing(self):
+        await self.mirror.sync()
+        del self.library[7]
+        # fewer ids listed than the total: nothing is taken for deleted
+        self.hidden = 2
+        self.assertEqual(await self.mirror.sync(), {'updated': 0, 'deleted': 0})
+        self.hidden = 0
+        self.assertEqual(await self.mirror.sync(), {'updated': 0, 'deleted': 1})
+
+    async def test_local_reads(self):
+        await self.mirror.sync()
+        self.requests.clear()
+        self.assertEqual(self.mirror.get_entry(4)['id'], 4)
+        self.assertEqual([e['id'] for e in self.mirror.get_entries_by_tag('foo')], [5, 10, 15, 20, 25])
+        self.assertEqual(self.mirror.get_entries_by_url('https://example.com/12')[0]['id'], 12)
+        self.assertEqual(self.mirror.get_tags(), [{'id': 1, 'label': 'foo', 'slug': 'foo'}])
+        self.assertEqual(self.mirror.get_annotations(2)[0]['id'], 20)
+        self.assertEqual(self.requests, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
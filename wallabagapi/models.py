@@ -0,0 +1,166 @@
+# coding: utf-8
+"""
+   Wallabag API - lightweight models of the entries, tags and annotations
+"""
+
+import datetime
+
+__author__ = 'foxmask'
+
+__all__ = ['Entry', 'Tag', 'Annotation', 'EntriesPage', 'parse_datetime']
+
+
+def parse_datetime(value):
+    """
+    convert a date of wallabag (2021-03-01T10:20:30+0100) into a datetime
+    :param value: string
+    :return datetime or None
+    """
+    if not value:
+        return None
+    return datetime.datetime.strptime(value, '%Y-%m-%dT%H:%M:%S%z')
+
+
+class Model(object):
+    """
+        base of the models: the fields are slots, filled from the dict
+        decoded from the JSON response, the others keys are dropped
+    """
+    # slots filled as is, the ones starting with _ are parsed on access
+    __slots__ = ()
+
+    def __init__(self, **kwargs):
+        for name in self.__slots__:
+            setattr(self, name, kwargs.get(name.lstrip('_')))
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        :param data: dict decoded from the JSON response
+        """
+        obj = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(obj, name, data.get(name.lstrip('_')))
+        return obj
+
+    def _parsed(self, name, parse):
+        # parse the raw value kept in the slot once, then keep the result
+        value = getattr(self, name)
+        if isinstance(value, (str, list)):
+            value = parse(value)
+            setattr(self, name, value)
+        return value
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.id == other.id
+
+    def __hash__(self):
+        return hash((type(self), self.id))
+
+    def __repr__(self):
+        return '<{cls} {id}>'.format(cls=type(self).__name__, id=self.id)
+
+
+class Tag(Model):
+    __slots__ = ('id', 'label', 'slug')
+
+
+class Annotation(Model):
+    __slots__ = ('id', 'text', 'quote', 'ranges', '_created_at', '_updated_at')
+
+    @property
+    def created_at(self):
+        return self._parsed('_created_at', parse_datetime)
+
+    @property
+    def updated_at(self):
+        return self._parsed('_updated_at', parse_datetime)
+
+
+class Entry(Model):
+    """
+        An entry, the dates, tags and annotations are only converted when
+        they are read. The content is the string decoded from the
+        response, it is not copied nor cleaned: use
+        get_entries(detail='metadata') to not download it at all.
+    """
+    __slots__ = ('id', 'url', 'given_url', 'origin_url', 'title', '_content',
+                 'is_archived', 'is_starred', 'is_public',
+                 '_created_at', '_updated_at', '_published_at', '_archived_at', '_starred_at',
+                 'published_by', '_tags', '_annotations',
+                 'mimetype', 'language', 'reading_time', 'domain_name', 'preview_picture')
+
+    @property
+    def content(self):
+        return self._content
+
+    @property
+    def created_at(self):
+        return self._parsed('_created_at', parse_datetime)
+
+    @property
+    def updated_at(self):
+        return self._parsed('_updated_at', parse_datetime)
+
+    @property
+    def published_at(self):
+        return self._parsed('_published_at', parse_datetime)
+
+    @property
+    def archived_at(self):
+        return self._parsed('_archived_at', parse_datetime)
+
+    @property
+    def starred_at(self):
+        return self._parsed('_starred_at', parse_datetime)
+
+    @property
+    def tags(self):
+        return self._parsed('_tags', lambda tags: tuple(Tag.from_dict(tag) for tag in tags)) or ()
+
+    @property
+    def annotations(self):
+        return self._parsed('_annotations',
+                            lambda annotations: tuple(Annotation.from_dict(a) for a in annotations)) or ()
+
+
+class EntriesPage(object):
+    """
+        A page of GET /api/entries. The entries are built when they are
+        read, and replace the dicts of the response.
+    """
+    __slots__ = ('page', 'limit', 'pages', 'total', '_items')
+
+    def __init__(self, page=1, limit=0, pages=0, total=0, items=()):
+        self.page = page
+        self.limit = limit
+        self.pages = pages
+        self.total = total
+        self._items = list(items)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        :param data: dict decoded from the JSON response
+        """
+        return cls(page=data.get('page'), limit=data.get('limit'), pages=data.get('pages'),
+                   total=data.get('total'), items=data.get('_embedded', {}).get('items', []))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+        item = self._items[index]
+        if isinstance(item, dict):
+            item = self._items[index] = Entry.from_dict(item)
+        return item
+
+    def __iter__(self):
+        for index in range(len(self._items)):
+            yield self[index]
+
+    def __repr__(self):
+        return '<EntriesPage {page}/{pages} of {total} entries>'.format(page=self.page, pages=self.pages,
+                                                                         total=self.total)
@@ -0,0 +1,82 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the models, without Wallabag server
+"""
+
+import datetime
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.models import Annotation, EntriesPage, Entry, Tag
+
+ENTRY = {'id': 1, 'title': 'foo', 'url': 'https://example.com/', 'content': '<p>foo</p>',
+         'is_archived': 0, 'is_starred': 1, 'created_at': '2021-03-01T10:20:30+0100',
+         'updated_at': '2021-03-02T10:20:30+0100', 'published_at': None,
+         'tags': [{'id': 3, 'label': 'bar', 'slug': 'bar'}],
+         'annotations': [{'id': 7, 'text': 'note', 'quote': 'foo', 'ranges': []}],
+         'headers': {'server': 'nginx'}, '_links': {'self': {'href': '/api/entries/1'}}}
+
+
+class TestModels(unittest.TestCase):
+
+    def test_entry(self):
+        entry = Entry.from_dict(dict(ENTRY))
+        self.assertFalse(hasattr(entry, '__dict__'))
+        self.assertEqual(entry.title, 'foo')
+        self.assertEqual(entry.content, '<p>foo</p>')
+        self.assertEqual(entry._updated_at, '2021-03-02T10:20:30+0100')
+        self.assertEqual(entry.updated_at, datetime.datetime(2021, 3, 2, 9, 20, 30, tzinfo=datetime.timezone.utc))
+        self.assertIsInstance(entry._updated_at, datetime.datetime)
+        self.assertIsNone(entry.published_at)
+        self.assertEqual(entry.tags, (Tag(id=3, label='bar', slug='bar'),))
+        self.assertEqual(entry.tags[0].label, 'bar')
+        self.assertEqual(entry.annotations[0], Annotation(id=7))
+        self.assertEqual(Entry.from_dict({'id': 2}).tags, ())
+
+    def test_entries_page(self):
+        page = EntriesPage.from_dict({'page': 1, 'pages': 3, 'total': 5, 'limit': 2,
+                                      '_embedded': {'items': [dict(ENTRY), dict(ENTRY, id=2)]}})
+        self.assertEqual(len(page), 2)
+        self.assertIsInstance(page._items[1], dict)
+        self.assertEqual(page[1].id, 2)
+        self.assertIsInstance(page._items[1], Entry)
+        self.assertEqual([entry.id for entry in page], [1, 2])
+        self.assertEqual([entry.id for entry in page[:1]], [1])
+        self.assertEqual(page.total, 5)
+
+
+class TestModelsQueries(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    def handler(self, request):
+        path = request.url.path
+        if path == '/api/entries.json':
+            return httpx.Response(200, json={'page': 1, 'pages': 1, 'total': 1, 'limit': 30,
+                                             '_embedded': {'items': [ENTRY]}})
+        if path == '/api/tags.json':
+            return httpx.Response(200, json=ENTRY['tags'])
+        if path == '/api/annotations/1.json':
+            return httpx.Response(200, json={'total': 1, 'rows': ENTRY['annotations']})
+        return httpx.Response(200, json=ENTRY)
+
+    async def asyncSetUp(self):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        self.w = WallabagAPI(host=self.host, token='abc', client=client, extension='xml')
+
+    async def asyncTearDown(self):
+        await self.w.client.aclose()
+
+    async def test_models(self):
+        page = await self.w.get_entries(models=True)
+        self.assertEqual(page[0].title, 'foo')
+        self.assertEqual((await self.w.get_entry(1, models=True)).id, 1)
+        self.assertEqual(await self.w.get_tags(models=True), [Tag(id=3)])
+        self.assertEqual((await self.w.get_annotations(1, models=True))[0].text, 'note')
+
+
+if __name__ == '__main__':
+    unittest.main()
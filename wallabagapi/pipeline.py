@@ -0,0 +1,123 @@
+# coding: utf-8
+"""
+   Wallabag API - processing of the entries in a pool of processes
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import math
+import os
+import re
+
+from wallabagapi.bulk import achunks
+from wallabagapi.search import strip_html
+
+__author__ = 'foxmask'
+
+__all__ = ['process_entries', 'text_and_stats']
+
+WORDS_PER_MINUTE = 200
+
+IMAGE = re.compile(r'<img\b', re.I)
+LINK = re.compile(r'<a\b', re.I)
+
+
+def text_and_stats(entry):
+    """
+    default transform: the text of the content and its reading stats.
+    The html content is dropped from the result, so that less data comes
+    back from the workers.
+    :param entry: dict of an entry
+    :return dict, the entry with 'text' instead of 'content', and 'stats':
+        'words', 'characters', 'images', 'links' and 'reading_time' in
+        minutes
+    """
+    content = entry.get('content') or ''
+    text = strip_html(content)
+    words = len(text.split())
+    result = {name: value for name, value in entry.items() if name != 'content'}
+    result['text'] = text
+    result['stats'] = {'words': words, 'characters': len(text), 'images': len(IMAGE.findall(content)),
+                       'links': len(LINK.findall(content)),
+                       'reading_time': math.ceil(words / WORDS_PER_MINUTE)}
+    return result
+
+
+def _run_chunk(func, chunk):
+    # run in a worker: a module level function, so that it is picklable
+    return [func(entry) for entry in chunk]
+
+
+async def process_entries(entries, func=text_and_stats, executor=None, workers=None, chunk_size=16,
+                          max_pending=None):
+    """
+    apply `func` to each entry in a pool of processes, keeping the order
+
+    The entries are sent to the workers by chunks of `chunk_size`. At most
+    `max_pending` chunks are in the pool at once: the entries are not read
+    further while the workers are behind, and the next chunk is read while
+    they work, so that the network and the CPU run side by side.
+
+    :param entries: iterable or async iterable of entries, like
+        WallabagAPI.iter_entries()
+    :param func: function taking an entry dict, defined at the top level
+        of a module (it is pickled), default to text_and_stats
+    :param executor: concurrent.futures.Executor to use, a
+        ProcessPoolExecutor of `workers` processes is created (and shut
+        down at the end) when None
+    :param workers: int number of processes, default to the number of CPUs
+        (and the number of workers of `executor` for `max_pending`)
+    :param chunk_size: int entries sent to a worker at once
+    :param max_pending: int chunks in the pool at once, default to twice
+        the number of workers
+    :return async iterator of the results of `func`, in the order of the
+        entries
+    """
+    if chunk_size < 1:
+        raise ValueError('chunk_size should be at least 1')
+    workers = workers or os.cpu_count() or 1
+    owned = executor is None
+    if owned:
+        executor = concurrent.futures.ProcessPoolExecutor(workers)
+    if max_pending is None:
+        max_pending = 2 * workers
+    loop = asyncio.get_running_loop()
+    chunks = achunks(entries, chunk_size).__aiter__()
+    pending = collections.deque()
+    reading = None
+    exhausted = False
+    try:
+        while True:
+            if reading is None and not exhausted and len(pending) < max_pending:
+                reading = asyncio.ensure_future(chunks.__anext__())
+            if not pending and reading is None:
+                break
+            # wait for the first chunk done, or for the next chunk read
+            waited = {pending[0]} if pending else set()
+            if reading is not None:
+                waited.add(reading)
+            done, _ = await asyncio.wait(waited, return_when=asyncio.FIRST_COMPLETED)
+            if reading in done:
+                try:
+                    chunk = reading.result()
+                except StopAsyncIteration:
+                    exhausted = True
+                else:
+                    pending.append(loop.run_in_executor(executor, _run_chunk, func, chunk))
+                reading = None
+            while pending and pending[0].done():
+                for result in pending.popleft().result():
+                    yield result
+    finally:
+        if reading is not None:
+            reading.cancel()
+            # the chunks can only be closed once the reading stopped
+            await asyncio.wait([reading])
+        # cancelling the futures of run_in_executor() cancels the chunks not
+        # started yet (shutdown(cancel_futures=True) needs Python 3.9)
+        for future in pending:
+            future.cancel()
+        await chunks.aclose()
+        if owned:
+            executor.shutdown(wait=False)
@@ -0,0 +1,94 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the processing of the entries in processes, without Wallabag server
+"""
+
+import concurrent.futures
+import os
+import threading
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.fakeserver import FakeWallabag
+from wallabagapi.pipeline import process_entries, text_and_stats
+
+
+def pid_of(entry):
+    return entry['id'], os.getpid()
+
+
+class TestTransform(unittest.TestCase):
+
+    def test_text_and_stats(self):
+        content = '<p>One <a href="/">two</a></p><img src="x.png"><script>no()</script>' + '<p>word</p>' * 398
+        result = text_and_stats({'id': 1, 'title': 'title', 'content': content})
+        self.assertNotIn('content', result)
+        self.assertEqual(result['text'][:13], 'One two word ')
+        self.assertEqual(result['stats'], {'words': 400, 'characters': 1997, 'images': 1, 'links': 1,
+                                           'reading_time': 2})
+        self.assertEqual(text_and_stats({'id': 2, 'content': None})['stats']['words'], 0)
+
+
+class TestPipeline(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    async def asyncSetUp(self):
+        self.app = FakeWallabag()
+        self.app.populate(50, content_size=500)
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app))
+        self.w = WallabagAPI(host=self.host, token=FakeWallabag.TOKEN, client=self.client)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_processes(self):
+        results = [result async for result in self.w.iter_entries_processed(workers=2, chunk_size=4, perPage=10)]
+        self.assertEqual([result['id'] for result in results],
+                         [entry['id'] async for entry in self.w.iter_entries(perPage=10)])
+        self.assertEqual(results[0]['stats']['words'], 93)
+
+        with concurrent.futures.ProcessPoolExecutor(2) as executor:
+            pids = [pid async for pid in process_entries(self.w.iter_entries(perPage=10), pid_of,
+                                                         executor=executor, chunk_size=2)]
+        self.assertEqual(len(pids), 50)
+        self.assertNotIn(os.getpid(), {pid for _, pid in pids})
+
+    async def test_backpressure(self):
+        read = []
+        running = threading.Semaphore(0)
+
+        def entries():
+            for entry_id in range(100):
+                read.append(entry_id)
+                yield {'id': entry_id}
+
+        def slow(entry):
+            running.acquire(timeout=1)
+            return entry['id']
+
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            results = process_entries(entries(), slow, executor=executor, workers=2, chunk_size=5, max_pending=3)
+            # the workers are stuck: only 3 chunks, and the one being read
+            first = results.__anext__()
+            for _ in range(100):
+                running.release()
+            self.assertEqual(await first, 0)
+            self.assertLessEqual(len(read), 5 * 4 + 1)
+            self.assertEqual([result async for result in results], list(range(1, 100)))
+
+    async def test_close(self):
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            results = process_entries(self.w.iter_entries(perPage=10), text_and_stats, executor=executor,
+                                      chunk_size=5)
+            self.assertEqual((await results.__anext__())['id'], 50)
+            await results.aclose()
+        with self.assertRaises(ValueError):
+            await process_entries([], chunk_size=0).__anext__()
+
+
+if __name__ == '__main__':
+    unittest.main()
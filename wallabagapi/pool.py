@@ -0,0 +1,242 @@
+# coding: utf-8
+"""
+   Wallabag API - many accounts over shared connections
+"""
+
+import collections
+import time
+import weakref
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.lazy import lazy_import
+from wallabagapi.ratelimit import RateLimiter
+
+__author__ = 'foxmask'
+
+httpx = lazy_import('httpx')
+
+__all__ = ['WallabagPool']
+
+# what is kept of an account when its session is evicted
+TOKEN_FIELDS = ('token', 'refresh_token', 'token_expires_at')
+
+
+class WallabagPool(object):
+    """
+        Sessions of many Wallabag accounts, possibly on many hosts.
+
+        The accounts of a host share one httpx.AsyncClient, and so its
+        connections. A session (a WallabagAPI with its own token and
+        limiter) only exists while the account is used: the least
+        recently used ones are dropped beyond `max_sessions` or after
+        `idle_timeout` seconds, keeping their token for the next session.
+
+        A WallabagAPI still referred to after the eviction of its session
+        keeps working: it is the one returned by the next session() of its
+        account, and the client of its host stays open while it lives.
+
+        >>> pool = WallabagPool(max_in_flight_per_account=4, max_in_flight_per_host=32)
+        >>> pool.add_account('alice', host=my_host, client_id='id', client_secret='secret',
+        ...                  username='alice', password='pass')
+        >>> await pool.session('alice').get_entries()
+        >>> await pool.aclose()
+    """
+
+    def __init__(self,
+                 max_sessions=256,
+                 idle_timeout=300,
+                 max_in_flight_per_account=4,
+                 max_in_flight_per_host=32,
+                 rate_per_account=None,
+                 rate_per_host=None,
+                 max_keepalive_connections=20,
+                 keepalive_expiry=5.0,
+                 http2=False,
+                 timeout=30.0,
+                 user_agent="WallabagPython/1.3.0 "
+                            " +https://gitlab.com/foxmask/wallabagapi",
+                 transport=None,
+                 **defaults):
+        """
+        :param max_sessions: int max number of sessions kept at once
+        :param idle_timeout: seconds before an unused session is dropped
+        :param max_in_flight_per_account: int max requests in flight of
+            one account, None for no limit
+        :param max_in_flight_per_host: int max requests in flight to one
+            host, for all its accounts, None for no limit
+        :param rate_per_account: float max requests per second of one
+            account, None for no limit
+        :param rate_per_host: float max requests per second to one host
+        :param max_keepalive_connections: idle connections kept open per host
+        :param keepalive_expiry: seconds before an idle connection is closed
+        :param http2: enable HTTP/2 (requires ``httpx[http2]``)
+        :param timeout: default timeout in seconds of each request
+        :param user_agent
+        :param transport: httpx transport of the clients, mostly for tests
+        :param defaults: other parameters of the WallabagAPI of every
+            account (retry, cache, token_cache, hooks...)
+        """
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_in_flight_per_account = max_in_flight_per_account
+        self.max_in_flight_per_host = max_in_flight_per_host
+        self.rate_per_account = rate_per_account
+        self.rate_per_host = rate_per_host
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.transport = transport
+        self.defaults = defaults
+        self.stats = collections.Counter()
+        self._accounts = {}
+        # key: (WallabagAPI, last use), the least recently used first
+        self._sessions = collections.OrderedDict()
+        # evicted sessions still referred to by the application
+        self._evicted = weakref.WeakValueDictionary()
+        # host: WallabagAPI alive using its client
+        self._apis = collections.defaultdict(weakref.WeakSet)
+        self._clients = {}
+        self._host_limiters = {}
+
+    def add_account(self, key, host, **credentials):
+        """
+        register an account, no connection is made
+        :param key: any hashable identifying the account
+        :param host: string url of its Wallabag
+        :param credentials: token, client_id, client_secret, username,
+            password, refresh_token, token_expires_at and any other
+            parameter of WallabagAPI
+        """
+        self._accounts[key] = dict(credentials, host=host.rstrip('/'))
+
+    def remove_account(self, key):
+        self._evict(key)
+        self._evicted.pop(key, None)
+        del self._accounts[key]
+
+    def __contains__(self, key):
+        return key in self._accounts
+
+    def __len__(self):
+        """
+        :return int number of live sessions
+        """
+        return len(self._sessions)
+
+    def session(self, key):
+        """
+        :param key: key of an account given to add_account()
+        :return WallabagAPI of the account, created if needed
+        """
+        now = time.monotonic()
+        self._evict_idle(now)
+        if key in self._sessions:
+            api = self._sessions.pop(key)[0]
+        else:
+            api = self._open(key)
+        self._sessions[key] = (api, now)
+        while len(self._sessions) > self.max_sessions:
+            self._evict(next(iter(self._sessions)))
+        return api
+
+    def _open(self, key):
+        api = self._evicted.pop(key, None)
+        if api is not None:
+            # its token may have been renewed since the eviction
+            return api
+        account = self._accounts[key]
+        host = account['host']
+        limiter = self._host_limiter(host)
+        if self.max_in_flight_per_account is not None or self.rate_per_account is not None:
+            limiter = RateLimiter(rate=self.rate_per_account, max_in_flight=self.max_in_flight_per_account,
+                                  parent=limiter)
+        params = dict(self.defaults, user_agent=self.user_agent)
+        params.update(account)
+        params.update(client=self._client(host), rate_limiter=limiter)
+        self.stats['sessions'] += 1
+        api = WallabagAPI(**params)
+        self._apis[host].add(api)
+        # the token renewed by the API after its eviction
+        weakref.finalize(api, _keep_token, self._accounts, key, vars(api)).atexit = False
+        return api
+
+    def _client(self, host):
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            max_connections = self.max_in_flight_per_host or 100
+            limits = httpx.Limits(max_connections=max_connections,
+                                  max_keepalive_connections=min(self.max_keepalive_connections, max_connections),
+                                  keepalive_expiry=self.keepalive_expiry)
+            client = self._clients[host] = httpx.AsyncClient(limits=limits, http2=self.http2,
+                                                             timeout=self.timeout, transport=self.transport,
+                                                             headers={'User-Agent': self.user_agent})
+        return client
+
+    def _host_limiter(self, host):
+        if self.max_in_flight_per_host is None and self.rate_per_host is None:
+            return None
+        if host not in self._host_limiters:
+            self._host_limiters[host] = RateLimiter(rate=self.rate_per_host,
+                                                    max_in_flight=self.max_in_flight_per_host)
+        return self._host_limiters[host]
+
+    def _evict(self, key):
+        """
+        drop the session of an account, keeping its token
+        """
+        session = self._sessions.pop(key, None)
+        if session is not None:
+            api = session[0]
+            self._accounts[key].update({name: getattr(api, name) for name in TOKEN_FIELDS})
+            self._evicted[key] = api
+            self.stats['evictions'] += 1
+
+    def _evict_idle(self, now):
+        while self._sessions:
+            key, (api, used) = next(iter(self._sessions.items()))
+            if now - used < self.idle_timeout:
+                break
+            self._evict(key)
+
+    async def prune(self):
+        """
+        drop the idle sessions, and close the clients of the hosts
+        without session nor evicted WallabagAPI still referred to
+        """
+        self._evict_idle(time.monotonic())
+        for host in [host for host in self._clients if not self._apis[host]]:
+            await self._clients.pop(host).aclose()
+            self._host_limiters.pop(host, None)
+            self._apis.pop(host, None)
+
+    async def aclose(self):
+        """
+        drop every session and close the connections
+        """
+        for key in list(self._sessions):
+            self._evict(key)
+        self._evicted.clear()
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        self._host_limiters.clear()
+        self._apis.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+
+def _keep_token(accounts, key, fields):
+    """
+    keep the token of a WallabagAPI of the pool when it is deleted
+    :param accounts: dict of the accounts of the pool
+    :param key: key of the account
+    :param fields: vars() of the WallabagAPI
+    """
+    if key in accounts:
+        accounts[key].update({name: fields[name] for name in TOKEN_FIELDS})
@@ -0,0 +1,124 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the pool of accounts, without Wallabag server
+"""
+
+import asyncio
+import collections
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.pool import WallabagPool
+from wallabagapi.ratelimit import RateLimiter
+
+
+class TestParentLimiter(IsolatedAsyncioTestCase):
+
+    async def test_parent(self):
+        host = RateLimiter(max_in_flight=1)
+        account = RateLimiter(max_in_flight=2, parent=host)
+        await account.acquire()
+        waiting = asyncio.ensure_future(account.acquire())
+        await asyncio.sleep(0.01)
+        self.assertFalse(waiting.done())
+        account.release()
+        self.assertTrue(await waiting)
+        account.release()
+        self.assertFalse(host._semaphore.locked())
+
+
+class TestWallabagPool(IsolatedAsyncioTestCase):
+
+    async def handler(self, request):
+        if request.url.path == '/oauth/v2/token':
+            self.renewals += 1
+            return httpx.Response(200, json={'access_token': 'new', 'refresh_token': 'r2', 'expires_in': 3600})
+        token = request.url.params['access_token']
+        key = (request.url.host, token)
+        self.in_flight[key] += 1
+        self.in_flight[request.url.host] += 1
+        self.peak[key] = max(self.peak[key], self.in_flight[key])
+        self.peak[request.url.host] = max(self.peak[request.url.host], self.in_flight[request.url.host])
+        await asyncio.sleep(0.01)
+        self.in_flight[key] -= 1
+        self.in_flight[request.url.host] -= 1
+        return httpx.Response(200, json={'token': token})
+
+    async def asyncSetUp(self):
+        self.renewals = 0
+        self.in_flight = collections.Counter()
+        self.peak = collections.Counter()
+        self.pool = WallabagPool(max_sessions=2, max_in_flight_per_account=2, max_in_flight_per_host=3,
+                                 transport=httpx.MockTransport(self.handler))
+        for name in ('a', 'b', 'c'):
+            self.pool.add_account(name, host='http://one', token=name)
+        self.pool.add_account('d', host='http://two/', token='d')
+
+    async def asyncTearDown(self):
+        await self.pool.aclose()
+
+    async def test_shared_clients(self):
+        self.assertIs(self.pool.session('a').client, self.pool.session('b').client)
+        self.assertIsNot(self.pool.session('a').client, self.pool.session('d').client)
+        self.assertEqual(self.pool.session('d').host, 'http://two')
+
+    async def test_caps(self):
+        calls = [self.pool.session(name).get_entry(i) for name in ('a', 'b') for i in range(6)]
+        calls += [self.pool.session('d').get_entry(i) for i in range(6)]
+        results = await asyncio.gather(*calls)
+        self.assertEqual(results[0], {'token': 'a'})
+        self.assertEqual(self.peak[('one', 'a')], 2)
+        self.assertEqual(self.peak[('one', 'b')], 2)
+        self.assertEqual(self.peak['one'], 3)
+        self.assertEqual(self.peak[('two', 'd')], 2)
+
+    async def test_lru_eviction_keeps_the_token(self):
+        self.pool.add_account('e', host='http://one', client_id='id', client_secret='secret',
+                              refresh_token='r1')
+        await self.pool.session('e').get_entry(1)
+        self.assertEqual(self.renewals, 1)
+        self.pool.session('a')
+        self.pool.session('b')
+        self.assertEqual(len(self.pool), 2)
+        self.assertEqual(self.pool.stats['evictions'], 1)
+        self.assertEqual(await self.pool.session('e').get_entry(1), {'token': 'new'})
+        self.assertEqual(self.renewals, 1)
+
+    async def test_idle_sessions(self):
+        self.pool.idle_timeout = 0
+        client = self.pool.session('d').client
+        self.pool.session('a')
+        self.assertEqual(len(self.pool), 1)
+        await self.pool.prune()
+        self.assertEqual(len(self.pool), 0)
+        self.assertTrue(client.is_closed)
+
+    async def test_kept_session(self):
+        self.pool.idle_timeout = 0
+        self.pool.add_account('e', host='http://two', client_id='id', client_secret='secret',
+                              refresh_token='r1', token='old', token_expires_at=0)
+        kept = self.pool.session('e')
+        self.pool.session('a')
+        self.assertEqual(len(self.pool), 1)
+        await self.pool.prune()
+        self.assertEqual(len(self.pool), 0)
+        # the evicted API still works, and its host keeps its client
+        self.assertFalse(kept.client.is_closed)
+        self.assertEqual(await kept.get_entry(1), {'token': 'new'})
+        self.assertEqual(self.renewals, 1)
+        # the next session of the account goes on with its token
+        self.assertIs(self.pool.session('e'), kept)
+        self.pool.session('a')
+        kept.token = 'renewed'
+        client = kept.client
+        del kept
+        await self.pool.prune()
+        self.assertTrue(client.is_closed)
+        self.assertEqual(await self.pool.session('e').get_entry(1), {'token': 'renewed'})
+        self.assertEqual(self.renewals, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
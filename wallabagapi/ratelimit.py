@@ -0,0 +1,102 @@
+# coding: utf-8
+"""
+   Wallabag API - client side rate limiter
+"""
+
+import asyncio
+import time
+
+__author__ = 'foxmask'
+
+__all__ = ['RateLimiter']
+
+
+class RateLimiter(object):
+    """
+        Token bucket limiting the number of requests per second, and the
+        number of requests in flight.
+
+        One instance can be shared by several WallabagAPI to apply one
+        limit to all of them, or be the parent of the limiters of each
+        WallabagAPI to apply a global limit on top of theirs.
+    """
+
+    def __init__(self, rate=None, burst=None, max_in_flight=None, parent=None):
+        """
+        :param rate: float requests per second, None for no limit
+        :param burst: int requests that can be sent at once after an idle
+            period, default to one second of `rate`
+        :param max_in_flight: int max requests waiting for their response,
+            None for no limit
+        :param parent: RateLimiter acquired after this one, for example
+            the one of the host shared by the limiters of its accounts
+        """
+        if rate is not None and rate <= 0:
+            raise ValueError('rate should be positive')
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate or 1))
+        self.max_in_flight = max_in_flight
+        self.parent = parent
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        # number of acquire() that had to wait, and how long
+        self.throttled = 0
+        self.throttled_time = 0.0
+        self._lock = None
+        self._semaphore = None
+
+    async def acquire(self):
+        """
+        wait for the permission to send one request
+        :return bool True if the request had to wait
+        """
+        start = time.monotonic()
+        if self.max_in_flight is not None:
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            await self._semaphore.acquire()
+        try:
+            if self.rate is not None:
+                if self._lock is None:
+                    self._lock = asyncio.Lock()
+                # the lock makes the waiting requests go one after the other
+                async with self._lock:
+                    self._refill()
+                    if self.tokens < 1:
+                        await asyncio.sleep((1 - self.tokens) / self.rate)
+                        self._refill()
+                    self.tokens -= 1
+            if self.parent is not None:
+                await self.parent.acquire()
+        except BaseException:
+            # the parent releases itself when its acquire() fails
+            if self._semaphore is not None:
+                self._semaphore.release()
+            raise
+        waited = time.monotonic() - start
+        if waited > 0.001:
+            self.throttled += 1
+            self.throttled_time += waited
+            return True
+        return False
+
+    def release(self):
+        """
+        the response of the request is received
+        """
+        if self._semaphore is not None:
+            self._semaphore.release()
+        if self.parent is not None:
+            self.parent.release()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *args):
+        self.release()
@@ -0,0 +1,105 @@
+# coding: utf-8
+"""
+   Wallabag API - retry policy of the queries
+"""
+
+import random
+import time
+
+__author__ = 'foxmask'
+
+__all__ = ['RetryPolicy']
+
+
+class RetryPolicy(object):
+    """
+        Decide if a query has to be sent again, and when.
+
+        429 and 503 mean the server refused to handle the request, so they
+        are retried whatever the method. The other transient errors
+        (502, 504, network errors) are only retried for the idempotent
+        methods, as the server may already have done the work.
+
+        Subclass it and override `should_retry` / `delay` to plug another
+        policy in WallabagAPI(retry=...).
+    """
+    REFUSED_STATUSES = (429, 503)
+
+    def __init__(self,
+                 max_retries=3,
+                 backoff=0.5,
+                 max_backoff=30.0,
+                 jitter=True,
+                 statuses=(429, 502, 503, 504),
+                 idempotent_methods=('get', 'put', 'patch', 'delete')):
+        """
+        :param max_retries: int number of retries after the first attempt
+        :param backoff: float seconds to wait before the first retry, then
+            doubled at each attempt
+        :param max_backoff: float max seconds to wait between 2 attempts
+        :param jitter: bool wait a random time between 0 and the backoff
+            so that concurrent clients do not retry all at once
+        :param statuses: HTTP status codes to retry
+        :param idempotent_methods: methods that can be sent twice safely
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = statuses
+        self.idempotent_methods = idempotent_methods
+
+    def should_retry(self, attempt, method, response=None, exc=None):
+        """
+        :param attempt: int number of retries already done
+        :param method: get|post|patch|delete|put
+        :param response: httpx.Response received, if any
+        :param exc: httpx.RequestError raised, if any
+        :return bool
+        """
+        if attempt >= self.max_retries:
+            return False
+        if response is not None:
+            if response.status_code not in self.statuses:
+                return False
+            return response.status_code in self.REFUSED_STATUSES or method in self.idempotent_methods
+        return exc is not None and method in self.idempotent_methods
+
+    def delay(self, attempt, response=None):
+        """
+        seconds to wait before the next attempt, `Retry-After` first
+        :param attempt: int number of retries already done
+        :param response: httpx.Response received, if any
+        :return float
+        """
+        retry_after = self.retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        delay = min(self.backoff * (2 ** attempt), self.max_backoff)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    @staticmethod
+    def retry_after(response):
+        """
+        read the Retry-After header, in seconds or as an HTTP date
+        :param response: httpx.Response
+        :return float or None
+        """
+        if response is None:
+            return None
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        # rare, not worth importing the email package with wallabagapi
+        import email.utils
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, date.timestamp() - time.time())
@@ -0,0 +1,102 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the retry policy and the rate limiter,
+   without Wallabag server
+"""
+
+import asyncio
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.ratelimit import RateLimiter
+from wallabagapi.retry import RetryPolicy
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_should_retry(self):
+        policy = RetryPolicy(max_retries=2)
+        self.assertTrue(policy.should_retry(0, 'post', response=httpx.Response(429)))
+        self.assertTrue(policy.should_retry(0, 'get', response=httpx.Response(502)))
+        self.assertFalse(policy.should_retry(0, 'post', response=httpx.Response(502)))
+        self.assertFalse(policy.should_retry(0, 'get', response=httpx.Response(404)))
+        self.assertFalse(policy.should_retry(2, 'get', response=httpx.Response(503)))
+        self.assertTrue(policy.should_retry(1, 'get', exc=httpx.ConnectError('down')))
+
+    def test_delay(self):
+        policy = RetryPolicy(backoff=1, max_backoff=5, jitter=False)
+        self.assertEqual([policy.delay(attempt) for attempt in range(4)], [1, 2, 4, 5])
+        resp = httpx.Response(429, headers={'Retry-After': '3'})
+        self.assertEqual(policy.delay(0, resp), 3)
+        resp = httpx.Response(429, headers={'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        self.assertEqual(policy.delay(0, resp), 0)
+        jittered = RetryPolicy(backoff=1)
+        self.assertTrue(all(0 <= jittered.delay(2) <= 4 for _ in range(20)))
+
+
+class TestFlakyServer(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    def handler(self, request):
+        self.received += 1
+        # one request out of three is refused
+        if self.received % 6 == 3:
+            return httpx.Response(429, headers={'Retry-After': '0'})
+        if self.received % 6 == 0:
+            return httpx.Response(503)
+        return httpx.Response(200, json=[{'id': 1, 'label': 'foo', 'slug': 'foo'}])
+
+    async def asyncSetUp(self):
+        self.received = 0
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_retry_until_success(self):
+        w = WallabagAPI(host=self.host, token='abc', client=self.client,
+                        retry=RetryPolicy(max_retries=5, backoff=0.001))
+        results = await asyncio.gather(*[w.get_tags() for _ in range(30)])
+        self.assertTrue(all(results))
+        self.assertGreater(w.stats['retries'], 0)
+        self.assertEqual(w.stats['requests'], self.received)
+
+    async def test_no_retry(self):
+        w = WallabagAPI(host=self.host, token='abc', client=self.client,
+                        retry=RetryPolicy(max_retries=0))
+        results = [await w.get_tags() for _ in range(3)]
+        self.assertIsNone(results[2])
+        self.assertEqual(self.received, 3)
+
+    async def test_raise_errors(self):
+        w = WallabagAPI(host=self.host, token='abc', client=self.client,
+                        retry=RetryPolicy(max_retries=0), raise_errors=True)
+        await w.get_tags()
+        await w.get_tags()
+        with self.assertRaises(httpx.HTTPStatusError):
+            await w.get_tags()
+
+    async def test_throughput_close_to_the_rate(self):
+        rate = 200
+        limiter = RateLimiter(rate=rate, burst=1, max_in_flight=10)
+        w = WallabagAPI(host=self.host, token='abc', client=self.client, rate_limiter=limiter,
+                        retry=RetryPolicy(max_retries=5, backoff=0.001))
+        start = time.monotonic()
+        results = await asyncio.gather(*[w.get_tags() for _ in range(60)])
+        elapsed = time.monotonic() - start
+        self.assertTrue(all(results))
+        # the retries go through the limiter too
+        throughput = self.received / elapsed
+        self.assertLessEqual(throughput, rate * 1.1)
+        self.assertGreater(throughput, rate * 0.6)
+        self.assertGreater(w.stats['throttled'], 0)
+        self.assertEqual(limiter.throttled, w.stats['throttled'])
+
+
+if __name__ == '__main__':
+    unittest.main()
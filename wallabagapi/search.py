@@ -0,0 +1,300 @@
+# coding: utf-8
+"""
+   Wallabag API - local full-text search of the entries
+"""
+
+import html
+import json
+import re
+import sqlite3
+
+from wallabagapi.changes import UpdatedEntries, deleted_ids, parse_date
+
+__author__ = 'foxmask'
+
+__all__ = ['SearchIndex', 'strip_html', 'match_query']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    url TEXT,
+    title TEXT,
+    domain TEXT,
+    language TEXT,
+    is_archived INTEGER,
+    is_starred INTEGER,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS document_tags (
+    label TEXT,
+    entry_id INTEGER,
+    PRIMARY KEY (label, entry_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS document_tags_entry ON document_tags (entry_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS fts USING fts5(
+    title, content, tags, domain, authors,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# weights of the columns of fts in the ranking: title, content, tags, domain, authors
+WEIGHTS = (10.0, 1.0, 5.0, 2.0, 3.0)
+
+HIDDEN = re.compile(r'<(script|style|head)\b.*?</\1\s*>', re.S | re.I)
+TAG = re.compile(r'<[^>]*>')
+SPACES = re.compile(r'\s+')
+WORD = re.compile(r'\w+\*?')
+
+
+def strip_html(content):
+    """
+    text of an html content, without the tags, scripts and styles
+    :param content: string
+    :return string
+    """
+    if not content:
+        return ''
+    text = TAG.sub(' ', HIDDEN.sub(' ', content))
+    return SPACES.sub(' ', html.unescape(text)).strip()
+
+
+def match_query(text):
+    """
+    FTS5 query of the words of a text, all of them being required; a
+    word ending with * matches the words starting with it
+    :param text: string typed by a user
+    :return string, empty when there is no word
+    """
+    words = []
+    for word in WORD.findall(text):
+        prefix = word.endswith('*')
+        word = word.rstrip('*')
+        if word:
+            words.append('"{word}"{star}'.format(word=word, star='*' if prefix else ''))
+    return ' '.join(words)
+
+
+class SearchIndex(object):
+    """
+        Inverted index of the title, content (without html), tags, domain
+        and authors of the entries, in SQLite FTS5.
+
+        sync() only fetches the entries updated since the previous sync,
+        add() indexes entries read elsewhere (a Mirror, watch() events),
+        and search() never queries the server.
+    """
+
+    def __init__(self, wallabag=None, path=':memory:', per_page=100, window=4):
+        """
+        :param wallabag: WallabagAPI instance, needed by sync() only
+        :param path: path of the SQLite database
+        :param per_page: int entries per page fetched
+        :param window: int pages fetched concurrently
+        """
+        self.wallabag = wallabag
+        self.per_page = per_page
+        self.window = window
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    @property
+    def high_water_mark(self):
+        """
+        :return float timestamp of the most recent update indexed
+        """
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'since'").fetchone()
+        return float(row[0]) if row else 0
+
+    async def sync(self, detect_deletions=True):
+        """
+        fetch the entries updated after the high water mark and index them
+
+        :param detect_deletions: bool check the number of entries of the
+            server, and look for the deleted ones only when it differs
+        :return dict number of 'updated' and 'deleted' entries
+        :raise httpx.HTTPError when a page could not be read: the entries
+            read are kept, but the high water mark does not move and
+            nothing is deleted, the next sync starts from the same point
+        """
+        updates = UpdatedEntries(self.wallabag, since=self.high_water_mark, per_page=self.per_page,
+                                 window=self.window)
+        updated = 0
+        batch = []
+        async for entry in updates:
+            batch.append(entry)
+            if len(batch) >= self.per_page:
+                updated += self._index(batch)[0]
+                batch = []
+        if batch:
+            updated += self._index(batch)[0]
+        self._set_high_water_mark(updates.high_water_mark)
+
+        deleted = 0
+        if detect_deletions:
+            local = {row[0] for row in self.db.execute("SELECT id FROM documents")}
+            deleted = self.discard(await deleted_ids(self.wallabag, local, per_page=max(self.per_page, 500),
+                                                     window=self.window))
+        return {'updated': updated, 'deleted': deleted}
+
+    def add_from_mirror(self, mirror, batch_size=500):
+        """
+        index the entries of a Mirror updated after the high water mark,
+        without querying the server
+        :param mirror: wallabagapi.mirror.Mirror
+        :param batch_size: int entries per transaction
+        :return int number of entries new or changed
+        """
+        cursor = mirror.db.execute("SELECT data FROM entries WHERE updated_at >= ? ORDER BY updated_at",
+                                   (self.high_water_mark,))
+        updated = 0
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return updated
+            updated += self.add([json.loads(row[0]) for row in rows])
+
+    def add(self, entries):
+        """
+        index a batch of entries in one transaction, skipping the ones
+        already indexed at the same date, and move the high water mark
+        forward
+        :param entries: list of dict, as returned by get_entries
+        :return int number of entries new or changed
+        """
+        indexed, latest = self._index(entries)
+        self._set_high_water_mark(latest)
+        return indexed
+
+    def _set_high_water_mark(self, value):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('since', ?)",
+                            (str(max(value, self.high_water_mark)),))
+
+    def _index(self, entries):
+        """
+        add() without moving the high water mark
+        :return tuple (int number of entries new or changed, float most
+            recent update of the entries)
+        """
+        # the same entry may come twice when it changed during a sync
+        entries = list({entry['id']: entry for entry in entries}.values())
+        if not entries:
+            return 0, 0
+        known = dict(self.db.execute("SELECT id, updated_at FROM documents WHERE id IN ({})".format(
+            ', '.join('?' * len(entries))), [entry['id'] for entry in entries]))
+        latest = 0
+        documents, tags, texts = [], [], []
+        for entry in entries:
+            updated_at = parse_date(entry.get('updated_at')) or 0
+            latest = max(latest, updated_at)
+            if known.get(entry['id']) == updated_at:
+                continue
+            labels = [tag['label'] for tag in entry.get('tags') or []]
+            documents.append((entry['id'], entry.get('url'), entry.get('title'), entry.get('domain_name'),
+                              entry.get('language'), entry.get('is_archived'), entry.get('is_starred'),
+                              updated_at))
+            tags.extend((label, entry['id']) for label in labels)
+            texts.append((entry['id'], entry.get('title') or '', strip_html(entry.get('content')),
+                          ' '.join(labels), entry.get('domain_name') or '',
+                          ' '.join(entry.get('published_by') or [])))
+        with self.db:
+            changed = [(row[0],) for row in documents if row[0] in known]
+            self.db.executemany("DELETE FROM fts WHERE rowid = ?", changed)
+            self.db.executemany("DELETE FROM document_tags WHERE entry_id = ?", changed)
+            self.db.executemany("INSERT OR REPLACE INTO documents "
+                                "(id, url, title, domain, language, is_archived, is_starred, updated_at) "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", documents)
+            self.db.executemany("INSERT OR IGNORE INTO document_tags (label, entry_id) VALUES (?, ?)", tags)
+            self.db.executemany("INSERT INTO fts (rowid, title, content, tags, domain, authors) "
+                                "VALUES (?, ?, ?, ?, ?, ?)", texts)
+        return len(documents), latest
+
+    def discard(self, entries):
+        """
+        remove entries from the index
+        :param entries: iterable of entry IDs
+        :return int number of entries removed
+        """
+        ids = [(entry,) for entry in entries]
+        with self.db:
+            removed = sum(self.db.execute("DELETE FROM documents WHERE id = ?", row).rowcount for row in ids)
+            self.db.executemany("DELETE FROM fts WHERE rowid = ?", ids)
+            self.db.executemany("DELETE FROM document_tags WHERE entry_id = ?", ids)
+        return removed
+
+    def optimize(self):
+        """
+        merge the segments of the index, worth it after a large sync
+        """
+        with self.db:
+            self.db.execute("INSERT INTO fts (fts) VALUES ('optimize')")
+
+    def count(self):
+        """
+        :return int number of entries indexed
+        """
+        return self.db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def search(self, query, limit=20, offset=0, raw=False, archive=None, starred=None, tags=(), domain=None,
+               language=None, since=None):
+        """
+        entries matching a query, the most relevant first (bm25, a match
+        in the title weighing more than in the tags, the authors, the
+        domain then the content)
+
+        :param query: string, the words to find
+        :param limit: int max number of results
+        :param offset: int results to skip
+        :param raw: bool `query` is in the FTS5 syntax (OR, NOT, "phrase",
+            title:word...) instead of plain words all required
+        :param archive: 0 or 1 filter on the archived entries
+        :param starred: 0 or 1 filter on the starred entries
+        :param tags: list of tag labels the entries all have
+        :param domain: string domain name of the entries
+        :param language: string language of the entries
+        :param since: timestamp, entries updated after it
+        :return list of dict: 'id', 'title', 'url', 'domain', 'score' (the
+            higher the better) and 'snippet' of the content
+        """
+        match = query if raw else match_query(query)
+        if not match:
+            return []
+        # rank the matches first, then make the snippets of the returned
+        # ones only: a snippet costs more than the ranking
+        sql = ["SELECT fts.rowid AS id, bm25(fts, {weights}) AS rank FROM fts".format(
+            weights=', '.join(str(weight) for weight in WEIGHTS))]
+        sql.append("WHERE fts MATCH ?")
+        params = [match]
+        for column, value in (('is_archived', archive), ('is_starred', starred), ('domain', domain),
+                              ('language', language)):
+            if value is not None:
+                sql.append("AND d.{column} = ?".format(column=column))
+                params.append(int(value) if column.startswith('is_') else value)
+        if since is not None:
+            sql.append("AND d.updated_at > ?")
+            params.append(since)
+        tags = list(dict.fromkeys(tags or ()))
+        if tags:
+            sql.append("AND d.id IN (SELECT entry_id FROM document_tags WHERE label IN ({}) "
+                       "GROUP BY entry_id HAVING COUNT(*) = ?)".format(', '.join('?' * len(tags))))
+            params.extend(tags)
+            params.append(len(tags))
+        if len(sql) > 2:
+            # the filters read the documents, only join them when needed
+            sql.insert(1, "JOIN documents d ON d.id = fts.rowid")
+        sql.append("ORDER BY rank LIMIT ? OFFSET ?")
+        params.extend((limit, offset))
+        sql = ("WITH ranked AS ({ranked}) "
+               "SELECT d.id, d.title, d.url, d.domain, -ranked.rank, snippet(fts, 1, '[', ']', '...', 12) "
+               "FROM ranked JOIN fts ON fts.rowid = ranked.id JOIN documents d ON d.id = ranked.id "
+               "WHERE fts MATCH ? ORDER BY ranked.rank".format(ranked=' '.join(sql)))
+        params.append(match)
+        return [{'id': row[0], 'title': row[1], 'url': row[2], 'domain': row[3], 'score': row[4], 'snippet': row[5]}
+                for row in self.db.execute(sql, params)]
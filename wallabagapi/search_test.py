@@ -0,0 +1,103 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the local full-text search, without Wallabag server
+"""
+
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.fakeserver import FakeWallabag
+from wallabagapi.mirror import Mirror
+from wallabagapi.search import SearchIndex, match_query, strip_html
+
+
+class TestHelpers(unittest.TestCase):
+
+    def test_strip_html(self):
+        self.assertEqual(strip_html('<p>Caf&eacute; <b>au</b>\n lait</p><script>var x = "<p>";</script>'),
+                         'Café au lait')
+        self.assertEqual(strip_html(None), '')
+
+    def test_match_query(self):
+        self.assertEqual(match_query('c++ AND "pyth*'), '"c" "AND" "pyth"*')
+        self.assertEqual(match_query('--'), '')
+
+
+class TestSearchIndex(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    async def asyncSetUp(self):
+        self.app = FakeWallabag()
+        self.app.populate(20)
+        self.app.add_entry('https://python.example/asyncio', title='Asyncio in Python',
+                           content='<p>event loops and coroutines</p>', tags=['python', 'later'], authors='Guido')
+        self.app.add_entry('https://blog.example/loops', title='Loops',
+                           content='<p>for loops in Python, <em>asyncio</em> excepted</p>', starred=True)
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app))
+        self.w = WallabagAPI(host=self.host, token=FakeWallabag.TOKEN, client=self.client)
+        self.index = SearchIndex(self.w)
+
+    async def asyncTearDown(self):
+        self.index.close()
+        await self.client.aclose()
+
+    async def test_search(self):
+        self.assertEqual(await self.index.sync(), {'updated': 22, 'deleted': 0})
+        results = self.index.search('asyncio')
+        # the title weighs more than the content
+        self.assertEqual([result['id'] for result in results], [21, 22])
+        self.assertGreater(results[0]['score'], results[1]['score'])
+        self.assertEqual(results[1]['snippet'], 'for loops in Python, [asyncio] excepted')
+        self.assertEqual([r['id'] for r in self.index.search('guido')], [21])
+        self.assertEqual([r['id'] for r in self.index.search('corout*')], [21])
+        self.assertEqual([r['id'] for r in self.index.search('asyncio', starred=1)], [22])
+        self.assertEqual([r['id'] for r in self.index.search('asyncio', tags=['python', 'later'])], [21])
+        self.assertEqual([r['id'] for r in self.index.search('asyncio', domain='blog.example')], [22])
+        self.assertEqual([r['id'] for r in self.index.search('title:loops OR guido', raw=True)], [22, 21])
+        self.assertEqual(len(self.index.search('lorem', limit=5, offset=18)), 2)
+        self.assertEqual(self.index.search(''), [])
+
+    async def test_incremental(self):
+        await self.index.sync()
+        await self.w.patch_entries(22, title='Generators')
+        await self.w.delete_entries(21)
+        self.assertEqual(await self.index.sync(), {'updated': 1, 'deleted': 1})
+        result, = self.index.search('asyncio')
+        self.assertEqual((result['id'], result['title'], result['url'], result['domain']),
+                         (22, 'Generators', 'https://blog.example/loops', 'blog.example'))
+        self.assertEqual(self.index.search('loops', tags=['later']), [])
+        self.assertEqual(self.index.count(), 21)
+        self.assertEqual(await self.index.sync(detect_deletions=False), {'updated': 0, 'deleted': 0})
+
+    async def test_failed_page(self):
+        self.index.per_page = 10
+        self.app.fail('GET', '/api/entries.json', page=2, perPage=10)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.index.sync()
+        self.assertEqual((self.index.count(), self.index.high_water_mark), (10, 0))
+        self.assertEqual(await self.index.sync(), {'updated': 12, 'deleted': 0})
+
+        await self.w.delete_entries(21)
+        self.app.fail('GET', '/api/entries.json', page=1, perPage=500)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.index.sync()
+        self.assertEqual(self.index.count(), 22)
+        self.assertEqual(await self.index.sync(), {'updated': 0, 'deleted': 1})
+
+    async def test_add_from_mirror(self):
+        mirror = Mirror(self.w)
+        await mirror.sync()
+        index = SearchIndex()
+        self.assertEqual(index.add_from_mirror(mirror, batch_size=7), 22)
+        self.assertEqual(index.add_from_mirror(mirror), 0)
+        self.assertEqual([r['id'] for r in index.search('coroutines')], [21])
+        index.close()
+        mirror.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
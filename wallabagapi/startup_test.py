@@ -0,0 +1,71 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the import of the package, without Wallabag server
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import unittest
+
+import httpx
+
+from wallabagapi import lazy
+from wallabagapi.core import WallabagAPI
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# microseconds, cumulative time of `import wallabagapi.core` without httpx
+# (mostly asyncio), with room for slow machines
+BUDGET = 300000
+
+
+def import_time(module):
+    """
+    :return tuple (cumulative import time in microseconds, modules
+        loaded, root logger handlers) in a new interpreter
+    """
+    code = ("import logging, sys\nimport {0}\n"
+            "print(' '.join(sys.modules))\nprint(len(logging.getLogger().handlers))").format(module)
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                             cwd=ROOT, check=True)
+    loaded, handlers = process.stdout.splitlines()
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        _, cumulative, name = line.rsplit('|', 2)
+        if name.strip() == module:
+            return int(cumulative), loaded.split(), int(handlers)
+    raise AssertionError('{} not found in {}'.format(module, process.stderr[-500:]))
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_import_core(self):
+        best, loaded, handlers = min(import_time('wallabagapi.core') for _ in range(3))
+        for module in ('httpx._client', 'httpcore', 'email.utils'):
+            self.assertNotIn(module, loaded)
+        # the logging stays as the application configured it
+        self.assertEqual(handlers, 0)
+        self.assertLess(best, BUDGET)
+
+    def test_lazy_import(self):
+        self.assertIs(lazy.lazy_import('httpx'), httpx)
+        self.assertIs(WallabagAPI(host='http://wallabag', token='abc').client.__class__, httpx.AsyncClient)
+        with self.assertRaises(ImportError):
+            lazy.lazy_import('wallabagapi_missing')
+
+    def test_logger(self):
+        with self.assertLogs('wallabagapi.core', level='ERROR'):
+            logging.getLogger('wallabagapi.core').error('shown to the handlers of the application')
+        self.assertTrue(any(isinstance(handler, logging.NullHandler)
+                            for handler in logging.getLogger('wallabagapi').handlers))
+        # installed by the package, whichever module the application imports
+        code = ("import logging, sys\nimport wallabagapi.lazy\nprint('wallabagapi.core' in sys.modules)\n"
+                "print([type(handler).__name__ for handler in logging.getLogger('wallabagapi').handlers])")
+        process = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=ROOT, check=True)
+        self.assertEqual(process.stdout.splitlines(), ['False', "['NullHandler']"])
+
+
+if __name__ == '__main__':
+    unittest.main()
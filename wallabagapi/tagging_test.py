@@ -0,0 +1,119 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the batch tag operations, without Wallabag server
+"""
+
+import re
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from urllib.parse import parse_qs
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+
+
+class TestTagging(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    def tag(self, label):
+        if label not in self.tag_ids:
+            self.tag_ids[label] = len(self.tag_ids) + 1
+        return {'id': self.tag_ids[label], 'label': label, 'slug': label}
+
+    def handler(self, request):
+        self.calls.append((request.method, request.url.path))
+        path, params = request.url.path, request.url.params
+        if path == '/api/entries.json':
+            wanted = [tag.strip() for tag in params['tags'].split(',')]
+            items = [{'id': entry, 'tags': [self.tag(t) for t in sorted(tags)]}
+                     for entry, tags in sorted(self.entries.items()) if set(wanted) <= tags]
+            page, per_page = int(params['page']), int(params['perPage'])
+            if page in self.failing:
+                return httpx.Response(500, json={'error': 'page lost'})
+            return httpx.Response(200, json={'page': page, 'pages': max(1, -(-len(items) // per_page)),
+                                             'total': len(items), 'limit': per_page,
+                                             '_embedded': {'items': items[(page - 1) * per_page:page * per_page]}})
+        if path == '/api/tag/label.json':
+            for tags in self.entries.values():
+                tags.discard(params['tag'])
+            return httpx.Response(200, json={})
+        match = re.match(r'^/api/entries/(\d+)/tags(?:/(\d+))?\.json$', path)
+        entry = int(match.group(1))
+        if request.method == 'GET':
+            if entry in self.failing_entries:
+                return httpx.Response(500, json={'error': 'entry lost'})
+            return httpx.Response(200, json=[self.tag(t) for t in sorted(self.entries[entry])])
+        if request.method == 'POST':
+            labels = parse_qs(request.content.decode())['tags'][0].split(',')
+            self.entries[entry].update(label.strip() for label in labels)
+        if request.method == 'DELETE':
+            label = {v: k for k, v in self.tag_ids.items()}[int(match.group(2))]
+            self.entries[entry].discard(label)
+        return httpx.Response(200, json={'id': entry})
+
+    async def asyncSetUp(self):
+        self.calls = []
+        self.failing = set()
+        self.failing_entries = set()
+        self.tag_ids = {}
+        self.entries = {entry: {'old'} if entry <= 40 else set() for entry in range(1, 101)}
+        self.entries[1].add('new')
+        self.entries[100].add('other')
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        self.w = WallabagAPI(host=self.host, token='abc', client=client)
+
+    async def asyncTearDown(self):
+        await self.w.client.aclose()
+
+    async def test_retag_by_tag(self):
+        summary = await self.w.retag(range(1, 61), add=['new'], remove=['old'], per_page=50)
+        self.assertTrue(all('new' in self.entries[entry] for entry in range(1, 61)))
+        self.assertTrue(all('old' not in tags for tags in self.entries.values()))
+        # 2 pages of tags, 59 entries to tag and the old tag removed at once
+        self.assertEqual(summary['reads'], 2)
+        self.assertEqual(summary['calls'], 60)
+        self.assertEqual(summary['naive_calls'], 120)
+        self.assertEqual(summary['saved'], 58)
+        self.assertIn(('DELETE', '/api/tag/label.json'), self.calls)
+        self.assertEqual(summary['failed'], [])
+
+    async def test_retag_by_entry(self):
+        summary = await self.w.retag([1, 2, 100], add=['new', 'more'], remove=['old', 'other'], per_page=10)
+        self.assertEqual(self.entries[1], {'new', 'more'})
+        self.assertEqual(self.entries[2], {'new', 'more'})
+        self.assertEqual(self.entries[100], {'new', 'more'})
+        self.assertEqual(self.entries[3], {'old'})
+        # the old tag is carried by other entries, it is removed entry by entry
+        self.assertNotIn(('DELETE', '/api/tag/label.json'), self.calls)
+        self.assertEqual(summary['reads'], 4 + 3)
+        self.assertEqual(summary['calls'], 3 + 3)
+        # 12 naive calls, 13 queries
+        self.assertEqual(summary['saved'], 0)
+
+    async def test_rename_tag(self):
+        summary = await self.w.rename_tag('old', 'new', per_page=25)
+        self.assertTrue(all('new' in self.entries[entry] and 'old' not in self.entries[entry]
+                            for entry in range(1, 41)))
+        self.assertEqual(summary['calls'], 40)
+        self.assertEqual(summary['reads'], 2)
+        self.assertEqual(summary['naive_calls'], 78)
+
+    async def test_failed_read(self):
+        self.failing = {2}
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.w.rename_tag('old', 'new', per_page=10)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.w.retag(range(1, 61), add=['new'], remove=['old'], per_page=10)
+        # read entry by entry
+        self.failing, self.failing_entries = set(), {2}
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.w.retag([1, 2, 3], add=['more'], remove=['old'], per_page=10)
+        # nothing changed from an incomplete read
+        self.assertEqual({method for method, _ in self.calls}, {'GET'})
+        self.assertTrue(all(self.entries[entry] >= {'old'} for entry in range(1, 41)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,234 @@
+# coding: utf-8
+"""
+   Wallabag API - local index of the urls of the entries
+"""
+
+import collections
+import hashlib
+import math
+import sqlite3
+import urllib.parse
+
+__author__ = 'foxmask'
+
+__all__ = ['UrlIndex', 'BloomFilter', 'normalize_url']
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url):
+    """
+    form of an url used to compare it with another one: scheme and host
+    in lower case, without default port, fragment nor utm_* parameters,
+    the other parameters sorted
+    :param url: string
+    :return string
+    """
+    url = url.strip()
+    try:
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    netloc = parts.hostname or ''
+    if port is not None and DEFAULT_PORTS.get(scheme) != port:
+        netloc = '{host}:{port}'.format(host=netloc, port=port)
+    query = urllib.parse.urlencode(sorted((name, value) for name, value
+                                          in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+                                          if not name.startswith('utm_')))
+    return urllib.parse.urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+
+class BloomFilter(object):
+    """
+        set of strings answering "maybe" or "certainly not", in
+        about 10 bits per string for 1% of false positives
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.01, bits=None):
+        """
+        :param capacity: int number of strings expected
+        :param error_rate: float rate of false positives at `capacity`
+        :param bits: bytes of a filter of the same capacity and rate
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits is not None else bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class UrlIndex(object):
+    """
+        urls of the entries of an account, normalized, and their id, kept
+        in SQLite. A bloom filter in memory answers most of the lookups of
+        unknown urls without reading the database.
+
+        The index only knows what it has been given: build() it from the
+        server or from a Mirror, and keep it up to date with add().
+    """
+
+    def __init__(self, path=':memory:', capacity=100000, error_rate=0.01):
+        """
+        :param path: path of the SQLite database
+        :param capacity: int number of urls expected, the filter is
+            rebuilt twice larger when there are more
+        :param error_rate: float rate of lookups of unknown urls reading
+            the database
+        """
+        self.stats = collections.Counter()
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, id INTEGER)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value)")
+        self.db.commit()
+        meta = dict(self.db.execute("SELECT name, value FROM meta"))
+        capacity = max(capacity, meta.get('capacity', 0))
+        if meta.get('bloom') is not None and (meta.get('capacity'), meta.get('error_rate')) == (capacity, error_rate):
+            self.bloom = BloomFilter(capacity, error_rate, bits=meta['bloom'])
+        else:
+            self._rebuild(capacity, error_rate)
+
+    def _rebuild(self, capacity, error_rate):
+        capacity = max(capacity, len(self) * 2)
+        self.bloom = BloomFilter(capacity, error_rate)
+        for url, in self.db.execute("SELECT url FROM urls"):
+            self.bloom.add(url)
+        self.save()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def add(self, url, entry):
+        """
+        :param url: string
+        :param entry: int id of the entry
+        """
+        self.update([(url, entry)])
+
+    def update(self, items):
+        """
+        :param items: iterable of (url, entry id)
+        """
+        keys = [(normalize_url(url), entry) for url, entry in items if url]
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO urls (url, id) VALUES (?, ?)", keys)
+        for key, _ in keys:
+            self.bloom.add(key)
+        if len(self) > self.bloom.capacity:
+            self._rebuild(self.bloom.capacity * 2, self.bloom.error_rate)
+
+    def discard(self, entry):
+        """
+        forget the urls of a deleted entry, they stay in the bloom filter
+        until it is rebuilt but the database has the last word
+        :param entry: int id of the entry
+        """
+        with self.db:
+            self.db.execute("DELETE FROM urls WHERE id = ?", (entry,))
+
+    def lookup(self, url):
+        """
+        :param url: string
+        :return int id of the entry of this url, or None
+        """
+        self.stats['lookups'] += 1
+        key = normalize_url(url)
+        if key not in self.bloom:
+            self.stats['bloom_negatives'] += 1
+            return None
+        row = self.db.execute("SELECT id FROM urls WHERE url = ?", (key,)).fetchone()
+        if row is None:
+            self.stats['false_positives'] += 1
+            return None
+        return row[0]
+
+    def __contains__(self, url):
+        return self.lookup(url) is not None
+
+    async def build(self, wallabag, per_page=500):
+        """
+        index every entry of the account, without their content
+
+        The urls are written in a new table, which replaces the one of the
+        index once every page was read: until then, and when a page cannot
+        be read, the index answers as before.
+
+        :param wallabag: WallabagAPI
+        :param per_page: int entries per query
+        :return int number of entries
+        :raise httpx.HTTPError when a page could not be read, the index
+            being unchanged
+        """
+        with self.db:
+            self.db.execute("DROP TABLE IF EXISTS urls_new")
+            self.db.execute("CREATE TABLE urls_new (url TEXT PRIMARY KEY, id INTEGER)")
+        count = 0
+        batch = []
+        try:
+            async for entry in wallabag.iter_entries(detail='metadata', perPage=per_page):
+                count += 1
+                batch.extend((entry.get(name), entry['id']) for name in ('url', 'given_url', 'origin_url'))
+                if len(batch) >= 1000:
+                    self._insert_new(batch)
+                    batch = []
+            self._insert_new(batch)
+        except BaseException:
+            with self.db:
+                self.db.execute("DROP TABLE urls_new")
+            raise
+        # both in one transaction: a reader never sees the index without urls
+        self.db.execute("BEGIN")
+        self.db.execute("DROP TABLE urls")
+        self.db.execute("ALTER TABLE urls_new RENAME TO urls")
+        self.db.commit()
+        self._rebuild(self.bloom.capacity, self.bloom.error_rate)
+        return count
+
+    def _insert_new(self, items):
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO urls_new (url, id) VALUES (?, ?)",
+                                [(normalize_url(url), entry) for url, entry in items if url])
+
+    def build_from_mirror(self, mirror):
+        """
+        index the entries of a Mirror, without query
+        :param mirror: wallabagapi.mirror.Mirror
+        :return int number of entries
+        """
+        self.clear()
+        rows = mirror.db.execute("SELECT id, url, given_url, origin_url FROM entries").fetchall()
+        self.update((url, row[0]) for row in rows for url in row[1:])
+        self.save()
+        return len(rows)
+
+    def clear(self):
+        with self.db:
+            self.db.execute("DELETE FROM urls")
+        self.bloom = BloomFilter(self.bloom.capacity, self.bloom.error_rate)
+
+    def save(self):
+        """
+        keep the bloom filter in the database, for the next process
+        """
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                                [('capacity', self.bloom.capacity), ('error_rate', self.bloom.error_rate),
+                                 ('bloom', bytes(self.bloom.bits))])
+
+    def close(self):
+        self.save()
+        self.db.close()
@@ -0,0 +1,114 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of exists_many() and of the index of the urls, without Wallabag server
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.fakeserver import FakeWallabag
+from wallabagapi.mirror import Mirror
+from wallabagapi.urlindex import BloomFilter, UrlIndex, normalize_url
+
+
+class TestNormalize(unittest.TestCase):
+
+    def test_normalize_url(self):
+        self.assertEqual(normalize_url(' HTTPS://Example.COM:443/a?b=2&a=1&utm_source=x#top'),
+                         'https://example.com/a?a=1&b=2')
+        self.assertEqual(normalize_url('http://example.com'), 'http://example.com/')
+        self.assertEqual(normalize_url('http://example.com:8080/A'), 'http://example.com:8080/A')
+        self.assertEqual(normalize_url('http://example.com:x/'), 'http://example.com:x/')
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for n in range(1000):
+            bloom.add('https://example.com/{}'.format(n))
+        self.assertTrue(all('https://example.com/{}'.format(n) in bloom for n in range(1000)))
+        false_positives = sum('https://example.org/{}'.format(n) in bloom for n in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class TestExistsMany(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    async def asyncSetUp(self):
+        self.app = FakeWallabag()
+        self.app.populate(300)
+        self.lengths = []
+        transport = httpx.ASGITransport(app=self.app)
+
+        async def record(request):
+            self.lengths.append(len(str(request.url)))
+        self.client = httpx.AsyncClient(transport=transport, event_hooks={'request': [record]})
+        self.w = WallabagAPI(host=self.host, token=FakeWallabag.TOKEN, client=self.client)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_chunks(self):
+        urls = ['https://example.com/articles/{}'.format(n) for n in range(0, 600, 2)]
+        results = await self.w.exists_many(urls, max_url_length=2000)
+        self.assertEqual([url for url, entry in results.items() if entry], urls[:150])
+        self.assertEqual(results[urls[0]], 1)
+        self.assertIsNone(results[urls[-1]])
+        self.assertGreater(len(self.lengths), 5)
+        self.assertTrue(all(length <= 2000 for length in self.lengths))
+
+    async def test_normalized(self):
+        results = await self.w.exists_many(['HTTPS://EXAMPLE.com/articles/3#comments', 'https://example.com/x'])
+        self.assertEqual(results, {'HTTPS://EXAMPLE.com/articles/3#comments': 4, 'https://example.com/x': None})
+        self.assertEqual(len(self.lengths), 1)
+
+    async def test_index(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'urls.db')
+            index = UrlIndex(path, capacity=100)
+            self.assertEqual(await index.build(self.w, per_page=100), 300)
+            self.assertGreater(index.bloom.capacity, 300)
+            index.close()
+
+            index = UrlIndex(path, capacity=100)
+            self.lengths.clear()
+            urls = ['https://example.com/articles/{}'.format(n) for n in range(250, 1250)]
+            results = await self.w.exists_many(urls, index=index)
+            self.assertEqual(sum(1 for entry in results.values() if entry), 50)
+            self.assertEqual(self.lengths, [])
+            self.assertGreater(index.stats['bloom_negatives'], 900)
+            index.close()
+
+    async def test_failed_build(self):
+        index = UrlIndex(capacity=100)
+        await index.build(self.w, per_page=100)
+        self.app.add_entry('https://example.com/new')
+        self.app.fail('GET', '/api/entries.json', page=2, perPage=100)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await index.build(self.w, per_page=100)
+        # the index answers as before the failed build
+        self.assertEqual(len(index), 300)
+        self.assertEqual(index.lookup('https://example.com/articles/150'), 151)
+        self.assertIsNone(index.lookup('https://example.com/new'))
+        self.assertEqual(await index.build(self.w, per_page=100), 301)
+        self.assertEqual(index.lookup('https://example.com/new'), 301)
+        index.close()
+
+    async def test_index_from_mirror(self):
+        mirror = Mirror(self.w)
+        await mirror.sync()
+        index = UrlIndex()
+        self.assertEqual(index.build_from_mirror(mirror), 300)
+        self.assertEqual(index.lookup('https://example.com/articles/0'), 1)
+        index.discard(1)
+        self.assertIsNone(index.lookup('https://example.com/articles/0'))
+        mirror.close()
+        index.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
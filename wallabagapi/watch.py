@@ -0,0 +1,132 @@
+# coding: utf-8
+"""
+   Wallabag API - events of the entries created, updated or deleted
+"""
+
+import asyncio
+import logging
+
+from wallabagapi.changes import UpdatedEntries, deleted_ids, parse_date
+from wallabagapi.lazy import lazy_import
+
+__author__ = 'foxmask'
+
+httpx = lazy_import('httpx')
+
+__all__ = ['Watcher']
+
+logger = logging.getLogger(__name__)
+
+
+class Watcher(object):
+    """
+        Poll the entries updated since the previous poll, and tell what
+        changed from a compact state: id -> (updated_at, archived, starred).
+
+        The events are dicts {'type': type, 'id': id, 'entry': entry},
+        type being 'created', 'updated', 'archived', 'starred' or
+        'deleted' (the entry is None, it may also have left the filters).
+
+        The interval between two polls is halved after a poll with
+        changes and grows by half after a poll without, between
+        `min_interval` and `max_interval`: a change is seen at most
+        `max_interval` seconds late.
+    """
+
+    def __init__(self, wallabag, interval=30, min_interval=5, max_interval=300, deletions_every=5,
+                 per_page=100, detail='metadata', emit_existing=False, **filters):
+        """
+        :param wallabag: WallabagAPI instance
+        :param interval: seconds between the first poll, done at the start,
+            and the second one
+        :param min_interval: seconds between two polls when it changes a lot
+        :param max_interval: seconds between two polls when nothing changes
+        :param deletions_every: int look for the deleted entries every
+            `deletions_every` polls (one more query, and more only when the
+            number of entries is not the expected one), 0 to never look
+        :param per_page: int entries per query
+        :param detail: 'metadata' or 'full', with or without the content
+        :param emit_existing: bool give a 'created' event for each entry
+            found by the first poll, instead of starting silently
+        :param filters: filters of get_entries (archive, starred, tags...)
+        """
+        if not 0 < min_interval <= max_interval:
+            raise ValueError('0 < min_interval <= max_interval expected')
+        self.wallabag = wallabag
+        self.interval = min(max(interval, min_interval), max_interval)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.deletions_every = deletions_every
+        self.per_page = per_page
+        self.detail = detail
+        self.emit_existing = emit_existing
+        self.filters = filters
+        self.state = {}
+        self.high_water_mark = None
+        self.polls = 0
+        self.errors = 0
+
+    async def poll(self):
+        """
+        look for the changes once
+        :return list of events
+        :raise httpx.HTTPError when a page could not be read: the state and
+            the high water mark stay as they were, the next poll reads the
+            same changes again
+        """
+        first = self.high_water_mark is None
+        updates = UpdatedEntries(self.wallabag, since=self.high_water_mark, per_page=self.per_page,
+                                 detail=self.detail, **self.filters)
+        events = []
+        # id -> state read by this poll, kept only once the poll is complete
+        seen = {}
+        async for entry in updates:
+            updated_at = int(parse_date(entry.get('updated_at')) or 0)
+            current = (updated_at, int(entry.get('is_archived') or 0), int(entry.get('is_starred') or 0))
+            previous = seen.get(entry['id'], self.state.get(entry['id']))
+            seen[entry['id']] = current
+            if previous == current:
+                continue
+            if previous is None:
+                if not first or self.emit_existing:
+                    events.append({'type': 'created', 'id': entry['id'], 'entry': entry})
+                continue
+            types = [name for name, index in (('archived', 1), ('starred', 2))
+                     if current[index] and not previous[index]]
+            for event_type in types or ['updated']:
+                events.append({'type': event_type, 'id': entry['id'], 'entry': entry})
+
+        deleted = set()
+        if not first and self.deletions_every and (self.polls + 1) % self.deletions_every == 0:
+            deleted = await deleted_ids(self.wallabag, self.state.keys() | seen.keys(),
+                                        per_page=max(self.per_page, 500), **self.filters)
+
+        self.state.update(seen)
+        for entry in deleted:
+            del self.state[entry]
+        events.extend({'type': 'deleted', 'id': entry, 'entry': None} for entry in sorted(deleted))
+        self.high_water_mark = int(updates.high_water_mark)
+        self.polls += 1
+        return events
+
+    def _adapt(self, changed):
+        if changed:
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+
+    async def __aiter__(self):
+        while True:
+            try:
+                events = await self.poll()
+            except httpx.HTTPError:
+                # keep watching, a bit later; the other errors are bugs
+                self.errors += 1
+                logger.exception(f"Poll {self.polls + 1} of the entries failed.")
+                self._adapt(False)
+                await asyncio.sleep(self.interval)
+                continue
+            for event in events:
+                yield event
+            self._adapt(events)
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,143 @@
+# coding: utf-8
+"""
+   Wallabag API - Test of the events of the entries, without Wallabag server
+"""
+
+import asyncio
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from wallabagapi.core import WallabagAPI
+from wallabagapi.fakeserver import FakeWallabag
+from wallabagapi.watch import Watcher
+
+
+class TestWatcher(IsolatedAsyncioTestCase):
+
+    host = 'http://wallabag'
+
+    async def asyncSetUp(self):
+        self.app = FakeWallabag()
+        self.app.populate(30)
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app))
+        self.w = WallabagAPI(host=self.host, token=FakeWallabag.TOKEN, client=self.client)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_events(self):
+        watcher = Watcher(self.w, deletions_every=1, per_page=10)
+        self.assertEqual(await watcher.poll(), [])
+        self.assertEqual(len(watcher.state), 30)
+        self.assertEqual(await watcher.poll(), [])
+
+        await self.w.post_entries('https://new.example/')
+        await self.w.patch_entries(3, archive=1)
+        await self.w.patch_entries(4, starred=1)
+        await self.w.patch_entries(5, title='renamed')
+        await self.w.delete_entries(6)
+        events = await watcher.poll()
+        self.assertEqual(sorted((event['type'], event['id']) for event in events),
+                         [('archived', 3), ('created', 31), ('deleted', 6), ('starred', 4), ('updated', 5)])
+        self.assertEqual([event['entry']['title'] for event in events if event['type'] == 'updated'], ['renamed'])
+        self.assertEqual(len(watcher.state), 30)
+        self.assertEqual(await watcher.poll(), [])
+
+    async def test_requests(self):
+        watcher = Watcher(self.w, deletions_every=3, per_page=10)
+        await watcher.poll()
+        self.app.requests.clear()
+        for _ in range(3):
+            await watcher.poll()
+        # one page of the recent changes per poll, and one count
+        self.assertEqual(self.app.requests[('GET', '/api/entries')], 4)
+
+    async def test_filters(self):
+        watcher = Watcher(self.w, emit_existing=True, tags=['python'])
+        self.assertEqual(len(await watcher.poll()), 10)
+        await self.w.patch_entries(2, title='python')
+        await self.w.patch_entries(3, title='news')
+        self.assertEqual([event['id'] for event in await watcher.poll()], [2])
+
+    async def test_first_poll_failed(self):
+        w = WallabagAPI(host=self.host, token='wrong', client=self.client)
+        watcher = Watcher(w)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await watcher.poll()
+        self.assertIsNone(watcher.high_water_mark)
+
+    async def test_failed_page(self):
+        watcher = Watcher(self.w, deletions_every=1, per_page=10)
+        self.app.fail('GET', '/api/entries.json', page=2, perPage=10)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await watcher.poll()
+        # nothing kept of an incomplete poll
+        self.assertEqual((watcher.state, watcher.high_water_mark, watcher.polls), ({}, None, 0))
+        self.assertEqual(await watcher.poll(), [])
+        self.assertEqual(len(watcher.state), 30)
+
+        await self.w.patch_entries(1, title='renamed')
+        await self.w.patch_entries(2, starred=1)
+        await self.w.delete_entries(3)
+        self.app.fail('GET', '/api/entries.json', perPage=500)
+        state, high_water_mark = dict(watcher.state), watcher.high_water_mark
+        with self.assertRaises(httpx.HTTPStatusError):
+            await watcher.poll()
+        self.assertEqual((watcher.state, watcher.high_water_mark), (state, high_water_mark))
+        events = await watcher.poll()
+        self.assertEqual(sorted((event['type'], event['id']) for event in events),
+                         [('deleted', 3), ('starred', 2), ('updated', 1)])
+
+    async def test_adaptive_interval(self):
+        watcher = Watcher(self.w, interval=0.04, min_interval=0.01, max_interval=0.16)
+        for changed in (False, False, False, False):
+            watcher._adapt(changed)
+        self.assertEqual(watcher.interval, 0.16)
+        for changed in ([{}], [{}], [{}], [{}], [{}]):
+            watcher._adapt(changed)
+        self.assertEqual(watcher.interval, 0.01)
+        with self.assertRaises(ValueError):
+            Watcher(self.w, min_interval=10, max_interval=5)
+
+    async def test_watch(self):
+        events = []
+
+        async def consume():
+            async for event in self.w.watch(interval=0.01, min_interval=0.01, max_interval=0.02):
+                events.append(event)
+                if len(events) == 2:
+                    break
+
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.05)
+        await self.w.patch_entries(7, starred=1)
+        await self.w.post_entries('https://new.example/')
+        await asyncio.wait_for(task, 5)
+        self.assertEqual([(event['type'], event['id']) for event in events], [('starred', 7), ('created', 31)])
+
+    async def test_watch_errors(self):
+        watcher = Watcher(self.w, interval=0.01, min_interval=0.01, max_interval=0.01, emit_existing=True)
+        self.app.fail('GET', '/api/entries.json', times=2)
+        events = watcher.__aiter__()
+        # the queries failing are retried at the next poll
+        event = await asyncio.wait_for(events.__anext__(), 5)
+        self.assertEqual((event['type'], watcher.errors, watcher.polls), ('created', 2, 1))
+        await events.aclose()
+
+        async def bug():
+            raise KeyError('id')
+
+        async def consume():
+            async for _ in watcher:
+                pass
+
+        watcher.poll = bug
+        with self.assertRaises(KeyError):
+            await asyncio.wait_for(consume(), 1)
+        self.assertEqual(watcher.errors, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()